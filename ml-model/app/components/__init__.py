@@ -1,12 +1,26 @@
 # Component modules initialization
-from .map_component import create_railway_map, add_train_markers, create_route_visualization
-from .kpi_component import display_kpis, create_metric_card, format_performance_metrics
+from .map_component import (
+    create_railway_map, add_train_markers, create_route_visualization,
+    get_base_railway_map, prepare_base_map, create_live_overlay, display_live_map,
+    add_live_train_updates, release_live_map, live_map_zoom
+)
+from .kpi_component import display_kpis, create_metric_card, format_performance_metrics, analyze_trends
+from .alert_store import AlertStore
 
 __all__ = [
     'create_railway_map',
     'add_train_markers', 
     'create_route_visualization',
+    'get_base_railway_map',
+    'prepare_base_map',
+    'create_live_overlay',
+    'display_live_map',
+    'add_live_train_updates',
+    'release_live_map',
+    'live_map_zoom',
     'display_kpis',
     'create_metric_card',
-    'format_performance_metrics'
-]
\ No newline at end of file
+    'format_performance_metrics',
+    'analyze_trends',
+    'AlertStore'
+]
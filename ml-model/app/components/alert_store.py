@@ -0,0 +1,140 @@
+import bisect
+from datetime import datetime
+import pandas as pd
+
+# Severity levels from most to least urgent
+SEVERITY_LEVELS = ('critical', 'high', 'medium', 'low')
+
+# Severity given to alerts that do not carry one
+DEFAULT_SEVERITY = 'low'
+
+# Layout of alert times shown on the dashboards, e.g. '16/09/2025 11:30'
+ALERT_TIME_FORMAT = '%d/%m/%Y %H:%M'
+
+def normalize_severity(severity):
+    """Lower-case severity name; engines report 'High', the dashboard uses 'high'"""
+    return str(severity).strip().lower() if severity else DEFAULT_SEVERITY
+
+def _time_key(timestamp):
+    """
+    Sortable nanosecond time of an alert timestamp
+    
+    Args:
+        timestamp: datetime, pd.Timestamp, date string (day first) or None
+    
+    Returns:
+        int: Nanoseconds since the epoch; missing or unreadable times use the arrival time
+    """
+    
+    if isinstance(timestamp, str):
+        timestamp = _parse_time(timestamp)
+    if isinstance(timestamp, datetime):
+        return pd.Timestamp(timestamp).value
+    return pd.Timestamp(datetime.now()).value
+
+def _parse_time(text):
+    """Datetime from an ISO or day-first string, or None when unreadable"""
+    for parse in (datetime.fromisoformat, lambda value: datetime.strptime(value, ALERT_TIME_FORMAT)):
+        try:
+            return parse(text)
+        except ValueError:
+            pass
+    # Other layouts go through pandas' slower format inference
+    try:
+        value = pd.to_datetime(text, dayfirst=True)
+    except (ValueError, TypeError):
+        return None
+    return None if value is pd.NaT else value
+
+class AlertStore:
+    """Alerts indexed by severity and time for O(1) counts and paged retrieval"""
+    
+    def __init__(self, alerts=None):
+        self._alerts = []
+        # Index per severity (None holds every alert): (time, arrival) keys kept
+        # sorted, so lengths are the counts and slices are pages
+        self._index = {None: []}
+        if alerts:
+            self.extend(alerts)
+    
+    def add(self, alert):
+        """
+        Insert one alert into the store and its severity index
+        
+        Args:
+            alert (dict): Alert with optional 'severity', 'timestamp' and 'message'
+        
+        Returns:
+            int: Position of the alert in arrival order
+        """
+        
+        position = len(self._alerts)
+        self._alerts.append(alert)
+        key = (_time_key(alert.get('timestamp')), position)
+        severity = normalize_severity(alert.get('severity'))
+        
+        for index in (self._index[None], self._index.setdefault(severity, [])):
+            # Alerts mostly arrive in time order, which is a plain append
+            if not index or index[-1] < key:
+                index.append(key)
+            else:
+                bisect.insort(index, key)
+        return position
+    
+    def extend(self, alerts):
+        """Insert several alerts"""
+        for alert in alerts:
+            self.add(alert)
+    
+    def __len__(self):
+        return len(self._alerts)
+    
+    def count(self, severity=None):
+        """Number of alerts of one severity, or of all alerts when severity is None"""
+        if severity is None:
+            return len(self._alerts)
+        return len(self._index.get(normalize_severity(severity), ()))
+    
+    def counts(self):
+        """
+        Alert counts per severity
+        
+        Returns:
+            dict: Count for every level in SEVERITY_LEVELS plus any other severity seen
+        """
+        
+        counts = {level: 0 for level in SEVERITY_LEVELS}
+        for severity, index in self._index.items():
+            if severity is not None:
+                counts[severity] = len(index)
+        return counts
+    
+    def page_count(self, page_size, severity=None):
+        """Number of pages of page_size alerts, at least one"""
+        return max(-(-self.count(severity) // page_size), 1)
+    
+    def page(self, page=0, page_size=20, severity=None, newest_first=True):
+        """
+        One page of alerts in time order
+        
+        Args:
+            page (int): Zero-based page number
+            page_size (int): Alerts per page
+            severity (str): Optional severity to filter on
+            newest_first (bool): Order pages from the most recent alert
+        
+        Returns:
+            list: Alert dicts of the page; empty beyond the last page
+        """
+        
+        index = self._index[None] if severity is None else self._index.get(normalize_severity(severity), [])
+        if newest_first:
+            end = max(len(index) - page * page_size, 0)
+            keys = index[max(end - page_size, 0):end][::-1]
+        else:
+            keys = index[page * page_size:(page + 1) * page_size]
+        return [self._alerts[position] for _, position in keys]
+    
+    def latest(self, n=10, severity=None):
+        """The n most recent alerts, newest first"""
+        return self.page(0, n, severity)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Above this many points per figure, SVG line and scatter traces become
+# sluggish in the browser and are drawn with WebGL instead
+WEBGL_POINT_THRESHOLD = 10000
+
+# Trace attributes holding the columnar data of a trace
+DATA_ATTRIBUTES = ('x', 'y', 'z', 'customdata')
+
+def typed_array(values):
+    """
+    Columnar values as a NumPy array, which Plotly sends as a binary typed array
+    
+    Args:
+        values (list, tuple, pd.Series, pd.Index or np.ndarray): Trace data
+    
+    Returns:
+        np.ndarray or original value: Numeric and datetime data as arrays;
+            text and mixed data are returned unchanged
+    """
+    
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = values.to_numpy()
+    elif isinstance(values, (list, tuple)):
+        array = np.asarray(values)
+        if array.dtype.kind not in 'biufM':
+            return values
+        values = array
+    return values
+
+def count_points(traces):
+    """Number of points drawn by a list of traces or trace data dicts"""
+    total = 0
+    for trace in traces:
+        y = trace.get('y') if isinstance(trace, dict) else getattr(trace, 'y', None)
+        total += 0 if y is None else len(y)
+    return total
+
+def uses_webgl(traces, point_threshold=WEBGL_POINT_THRESHOLD):
+    """Whether traces together have enough points to be drawn with WebGL"""
+    return count_points(traces) > point_threshold
+
+def apply_render_mode(fig, point_threshold=WEBGL_POINT_THRESHOLD):
+    """
+    Pass trace data as typed arrays and switch to WebGL for large figures
+    
+    Numeric lists become NumPy arrays. Scatter traces become Scattergl when the
+    figure's scatter traces hold more than point_threshold points; attributes
+    WebGL cannot draw are dropped.
+    
+    Args:
+        fig (go.Figure): Figure to adjust
+        point_threshold (int): Points above which WebGL is used
+    
+    Returns:
+        go.Figure: The figure, rebuilt with WebGL traces when over the threshold
+    """
+    
+    scatter = [trace for trace in fig.data if isinstance(trace, go.Scatter)]
+    webgl = bool(scatter) and uses_webgl(scatter, point_threshold)
+    has_lists = any(
+        isinstance(getattr(trace, attribute, None), (list, tuple))
+        for trace in fig.data for attribute in DATA_ATTRIBUTES
+    )
+    if not webgl and not has_lists:
+        return fig
+    
+    # Plotly ignores assignments of equal values, so traces are rebuilt from
+    # their JSON with the arrays converted
+    traces = []
+    for trace in fig.data:
+        spec = {key: value for key, value in trace.to_plotly_json().items() if key != 'type'}
+        for attribute in DATA_ATTRIBUTES:
+            if attribute in spec:
+                spec[attribute] = typed_array(spec[attribute])
+        trace_type = go.Scattergl if webgl and isinstance(trace, go.Scatter) else type(trace)
+        traces.append(trace_type(spec, skip_invalid=True))
+    return go.Figure(data=traces, layout=fig.layout)
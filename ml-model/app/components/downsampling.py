@@ -0,0 +1,201 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Plot width assumed when the caller does not know it; wide-layout charts
+# are rarely drawn wider than this
+DEFAULT_CHART_WIDTH_PX = 1200
+
+# Points kept per horizontal pixel: enough for the minimum and maximum of
+# every pixel column, so spikes survive decimation
+POINTS_PER_PIXEL = 2
+
+# Candidates preselected by min/max per output point before LTTB runs
+MINMAX_RATIO = 4
+
+# Decimated index sets kept in memory, keyed by series, width and range
+MAX_CACHED_SERIES = 128
+
+_DECIMATION_CACHE = OrderedDict()
+_DECIMATION_CACHE_LOCK = threading.Lock()
+
+def _as_index(values):
+    """Values as an Index, with the type of object-held values (e.g. Timestamps) inferred"""
+    if isinstance(values, (pd.Series, pd.Index)) and values.dtype == object:
+        values = values.to_numpy()
+    return pd.Index(values)
+
+def _as_float(values):
+    """Numeric view of x or y values; datetimes become nanoseconds, tz-aware ones in UTC"""
+    index = _as_index(values)
+    if isinstance(index, pd.DatetimeIndex):
+        return index.as_unit('ns').asi8.astype(np.float64)
+    return index.to_numpy(dtype=np.float64)
+
+def can_downsample(x):
+    """
+    Whether x values have an order decimation can work along
+    
+    Args:
+        x (array-like): Positions of a series
+    
+    Returns:
+        bool: True for numeric and datetime x; False for text, categories and mixed values
+    """
+    
+    index = _as_index(x)
+    if isinstance(index, pd.DatetimeIndex):
+        return True
+    return pd.api.types.is_numeric_dtype(index.dtype) and not pd.api.types.is_bool_dtype(index.dtype)
+
+def minmax_indices(y, n_buckets):
+    """
+    Index of the minimum and maximum of every bucket of equal point count
+    
+    Args:
+        y (np.ndarray): Values
+        n_buckets (int): Number of buckets
+    
+    Returns:
+        np.ndarray: Sorted unique indices, including the first and last point
+    """
+    
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    
+    # Pad to a whole number of buckets so all of them reduce in one call
+    size = -(-n // n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    
+    filled = ~np.isnan(buckets).all(axis=1)
+    low = np.where(np.isnan(buckets), np.inf, buckets).argmin(axis=1) + offsets
+    high = np.where(np.isnan(buckets), -np.inf, buckets).argmax(axis=1) + offsets
+    return np.unique(np.concatenate([[0, n - 1], low[filled], high[filled]]))
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets selection of n_out points
+    
+    Args:
+        x (np.ndarray): Sorted positions
+        y (np.ndarray): Values
+        n_out (int): Number of points to keep
+    
+    Returns:
+        np.ndarray: Indices of the kept points, first and last included
+    """
+    
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # Interior points split into n_out - 2 buckets; the average of each
+    # bucket is the third corner of the triangles of the bucket before it
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+    
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        anchor_x, anchor_y = x[selected[i]], y[selected[i]]
+        area = np.abs(
+            (anchor_x - next_x[i]) * (y[start:end] - anchor_y)
+            - (anchor_x - x[start:end]) * (next_y[i] - anchor_y)
+        )
+        selected[i + 1] = start + np.argmax(area)
+    
+    return selected
+
+def downsample_indices(x, y, width_px=DEFAULT_CHART_WIDTH_PX, x_range=None, method='minmax_lttb'):
+    """
+    Points of a series worth drawing at a plot width, cached per series
+    
+    Args:
+        x (array-like): Sorted x values (numbers or datetimes)
+        y (array-like): Values; NaN points are dropped
+        width_px (int): Plot width in pixels
+        x_range (tuple): Optional (start, end) zoom window; one point either
+            side is kept so lines run to the edges
+        method (str): 'minmax_lttb' (shape preserving) or 'minmax' (envelope only)
+    
+    Returns:
+        np.ndarray: Sorted indices into the original series; every index when x is
+            neither numeric nor datetime
+    """
+    
+    if not can_downsample(x):
+        return np.arange(len(x))
+    
+    is_time = isinstance(_as_index(x), pd.DatetimeIndex)
+    x, y = _as_float(x), _as_float(y)
+    n_out = int(width_px * POINTS_PER_PIXEL)
+    
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(x.tobytes())
+    digest.update(y.tobytes())
+    key = (digest.hexdigest(), n_out, None if x_range is None else tuple(x_range), method)
+    
+    with _DECIMATION_CACHE_LOCK:
+        indices = _DECIMATION_CACHE.get(key)
+        if indices is not None:
+            _DECIMATION_CACHE.move_to_end(key)
+            return indices
+    
+    visible = np.flatnonzero(~np.isnan(y))
+    if x_range is not None:
+        start, end = (float(pd.Timestamp(v).value) if is_time else float(v) for v in x_range)
+        first = max(np.searchsorted(x[visible], start, side='left') - 1, 0)
+        last = np.searchsorted(x[visible], end, side='right') + 1
+        visible = visible[first:last]
+    
+    if len(visible) <= n_out:
+        indices = visible
+    elif method == 'minmax':
+        indices = visible[minmax_indices(y[visible], n_out // 2)]
+    else:
+        # Min/max preselection keeps LTTB's sequential pass short
+        candidates = visible[minmax_indices(y[visible], n_out * MINMAX_RATIO // 2)]
+        indices = candidates[lttb_indices(x[candidates], y[candidates], n_out)]
+    
+    with _DECIMATION_CACHE_LOCK:
+        _DECIMATION_CACHE[key] = indices
+        while len(_DECIMATION_CACHE) > MAX_CACHED_SERIES:
+            _DECIMATION_CACHE.popitem(last=False)
+    
+    return indices
+
+def downsample_frame(data, x_col, y_col, width_px=DEFAULT_CHART_WIDTH_PX, x_range=None, method='minmax_lttb'):
+    """
+    Rows of a frame worth drawing as a line of y_col over x_col
+    
+    Args:
+        data (pd.DataFrame): Series data
+        x_col (str): Column for the x-axis
+        y_col (str): Column for the y-axis
+        width_px (int): Plot width in pixels
+        x_range (tuple): Optional (start, end) zoom window
+        method (str): 'minmax_lttb' or 'minmax'
+    
+    Returns:
+        pd.DataFrame: Decimated rows in x order; small frames are returned sorted but whole,
+            and frames whose x is neither numeric nor datetime are returned unchanged
+    """
+    
+    if not can_downsample(data[x_col]):
+        return data
+    if not _as_index(data[x_col]).is_monotonic_increasing:
+        data = data.sort_values(x_col, kind='stable')
+    if len(data) <= width_px * POINTS_PER_PIXEL and x_range is None:
+        return data
+    return data.iloc[downsample_indices(data[x_col].to_numpy(), data[y_col].to_numpy(), width_px, x_range, method)]
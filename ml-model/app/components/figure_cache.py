@@ -0,0 +1,140 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Figure templates kept in memory, one per chart name and styling
+MAX_CACHED_FIGURES = 256
+
+_FIGURE_CACHE = OrderedDict()
+_FIGURE_CACHE_LOCK = threading.Lock()
+_STATS = {'hits': 0, 'patches': 0, 'builds': 0}
+
+def fingerprint(obj):
+    """
+    Stable content hash of chart inputs
+    
+    Args:
+        obj: DataFrame, Series, array, dict, list/tuple or scalar, nested freely
+    
+    Returns:
+        str: Hex digest that changes whenever the content changes
+    """
+    
+    digest = hashlib.blake2b(digest_size=16)
+    _update_digest(digest, obj)
+    return digest.hexdigest()
+
+def _update_digest(digest, obj):
+    """Feed one object into a running digest"""
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        digest.update(repr((type(obj).__name__, getattr(obj, 'columns', getattr(obj, 'name', None)))).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=not isinstance(obj, pd.Index)).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(f"{obj.dtype}{obj.shape}".encode())
+        if obj.dtype == object:
+            digest.update(pd.util.hash_pandas_object(pd.Series(obj.ravel()), index=False).to_numpy().tobytes())
+        else:
+            digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        digest.update(b'{')
+        for key in sorted(obj, key=repr):
+            digest.update(repr(key).encode())
+            _update_digest(digest, obj[key])
+        digest.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        digest.update(b'[')
+        for item in obj:
+            _update_digest(digest, item)
+        digest.update(b']')
+    else:
+        digest.update(repr(obj).encode())
+
+def cached_figure(name, build, traces=None, data=None, style=None):
+    """
+    Plotly figure served from a template cache instead of being rebuilt on every rerun
+    
+    The figure is built once per name and style; while the inputs are unchanged
+    its serialized template is reused. When only trace values change, the arrays
+    listed in traces are patched into the template instead of rebuilding.
+    
+    Args:
+        name (str): Chart identifier, unique per page element
+        build (callable): Returns a fresh go.Figure for the current inputs
+        traces (list): Per-trace dicts of attribute -> values (e.g. x, y, value), in
+            figure trace order; these are the only parts patched on change
+        data: Any other inputs the figure depends on; a change rebuilds the figure
+        style (dict): Styling parameters; each distinct style gets its own template
+    
+    Returns:
+        go.Figure: Figure for the current inputs, safe for the caller to modify
+    """
+    
+    key = (name, fingerprint(style))
+    traces_key = fingerprint(traces)
+    data_key = fingerprint(data)
+    
+    with _FIGURE_CACHE_LOCK:
+        entry = _FIGURE_CACHE.get(key)
+        if entry is not None:
+            _FIGURE_CACHE.move_to_end(key)
+    
+    if entry is not None and entry['data'] == data_key:
+        template = copy.deepcopy(entry['template'])
+        if entry['traces'] == traces_key:
+            _STATS['hits'] += 1
+        elif traces is not None and len(traces) == len(template['data']):
+            # Same chart, new values: only the trace arrays are replaced
+            for trace, values in zip(template['data'], traces):
+                trace.update({attribute: _plain(value) for attribute, value in values.items()})
+            _store(key, template, traces_key, data_key)
+            template = copy.deepcopy(template)
+            _STATS['patches'] += 1
+        else:
+            template = None
+        
+        if template is not None:
+            # The template came out of a validated figure, so validation is skipped
+            return go.Figure(template, _validate=False)
+    
+    figure = build()
+    _store(key, figure.to_dict(), traces_key, data_key)
+    _STATS['builds'] += 1
+    return figure
+
+def _plain(value):
+    """Trace values as stored by Figure.to_dict: arrays for sequences, scalars as is"""
+    if isinstance(value, (pd.Series, pd.Index)):
+        return value.to_numpy()
+    if isinstance(value, (list, tuple)):
+        return np.asarray(value)
+    return value
+
+def _store(key, template, traces_key, data_key):
+    """Insert or replace a template, evicting the least recently used ones"""
+    with _FIGURE_CACHE_LOCK:
+        _FIGURE_CACHE[key] = {'template': template, 'traces': traces_key, 'data': data_key}
+        _FIGURE_CACHE.move_to_end(key)
+        while len(_FIGURE_CACHE) > MAX_CACHED_FIGURES:
+            _FIGURE_CACHE.popitem(last=False)
+
+def figure_cache_stats():
+    """
+    Counters of the figure cache since start-up or the last clear
+    
+    Returns:
+        dict: hits, patches, builds and the number of cached templates
+    """
+    
+    with _FIGURE_CACHE_LOCK:
+        return {**_STATS, 'cached': len(_FIGURE_CACHE)}
+
+def clear_figure_cache():
+    """Drop every cached template and reset the counters"""
+    with _FIGURE_CACHE_LOCK:
+        _FIGURE_CACHE.clear()
+        for counter in _STATS:
+            _STATS[counter] = 0
@@ -0,0 +1,72 @@
+import functools
+import time
+from datetime import datetime
+import pandas as pd
+import streamlit as st
+
+# Session state key holding the per-fragment run statistics
+TIMINGS_KEY = 'fragment_timings'
+
+def timed_fragment(name, run_every=None):
+    """
+    Decorator turning a function into a Streamlit fragment that records its run time
+    
+    Args:
+        name (str): Label the timings are reported under
+        run_every (float): Optional automatic refresh interval in seconds
+    
+    Returns:
+        function: Decorator for the fragment body
+    """
+    
+    def decorator(func):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_fragment_timing(name, time.perf_counter() - started)
+        
+        return st.fragment(run, run_every=run_every)
+    
+    return decorator
+
+def record_fragment_timing(name, seconds):
+    """
+    Add one run of a fragment to this session's timings
+    
+    Args:
+        name (str): Fragment label
+        seconds (float): Wall time of the run
+    """
+    
+    timings = st.session_state.setdefault(TIMINGS_KEY, {})
+    entry = timings.setdefault(name, {'runs': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0, 'last_run': None})
+    
+    entry['runs'] += 1
+    entry['total'] += seconds
+    entry['max'] = max(entry['max'], seconds)
+    entry['last'] = seconds
+    entry['last_run'] = datetime.now()
+
+def fragment_timings():
+    """
+    Run statistics of every timed fragment in this session
+    
+    Returns:
+        pd.DataFrame: Runs, last/mean/max milliseconds and last run time per fragment
+    """
+    
+    timings = st.session_state.get(TIMINGS_KEY, {})
+    return pd.DataFrame([
+        {
+            'Fragment': name,
+            'Runs': entry['runs'],
+            'Last (ms)': round(entry['last'] * 1000, 1),
+            'Mean (ms)': round(entry['total'] / entry['runs'] * 1000, 1),
+            'Max (ms)': round(entry['max'] * 1000, 1),
+            'Last Run': entry['last_run'].strftime('%H:%M:%S')
+        }
+        for name, entry in timings.items()
+    ], columns=['Fragment', 'Runs', 'Last (ms)', 'Mean (ms)', 'Max (ms)', 'Last Run'])
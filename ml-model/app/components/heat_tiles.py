@@ -0,0 +1,417 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import streamlit as st
+from PIL import Image
+
+from .heatmap_grid import HeatmapGrid
+
+# Tiles live under app/static, which Streamlit serves at /app/static when
+# server.enableStaticServing is on (see .streamlit/config.toml)
+TILE_ROOT = Path(__file__).parent.parent / "static" / "tiles"
+TILE_URL_PREFIX = "/app/static/tiles"
+
+TILE_SIZE = 256
+
+# Density is binned at 4 px and smoothed before upsampling to the tile size
+TILE_CELLS = 64
+
+# Cells of neighbouring tiles blended in, so the blur has no seams at tile edges
+TILE_MARGIN = 4
+BLUR_RADIUS = 2
+
+DEFAULT_MIN_ZOOM = 6
+DEFAULT_MAX_ZOOM = 12
+
+# Minimum time between background refreshes of a layer from the app; the
+# offline renderer (scripts/render_heat_tiles.py) can run at any time
+REFRESH_INTERVAL_SECONDS = 3600
+
+# Same gradient as the live heatmap layer, fading in from transparent
+HEAT_GRADIENT = [
+    (0.0, (0, 0, 255, 0)),
+    (0.4, (0, 0, 255, 160)),
+    (0.65, (0, 255, 0, 200)),
+    (1.0, (255, 0, 0, 220))
+]
+
+def _gradient_lut():
+    """256-entry RGBA lookup table for HEAT_GRADIENT"""
+    stops = np.array([stop for stop, _ in HEAT_GRADIENT])
+    colors = np.array([color for _, color in HEAT_GRADIENT], dtype=np.float64)
+    levels = np.linspace(0, 1, 256)
+    return np.stack([np.interp(levels, stops, colors[:, c]) for c in range(4)], axis=1).astype(np.uint8)
+
+# Tiles are palette images: the density level indexes straight into the gradient
+HEAT_PALETTE = _gradient_lut().flatten().tolist()
+
+def _box_blur(values, radius):
+    """Separable box blur, applied twice to approximate a Gaussian"""
+    size = 2 * radius + 1
+    for _ in range(2):
+        for axis in (0, 1):
+            pad = [(radius, radius) if a == axis else (0, 0) for a in (0, 1)]
+            windows = np.lib.stride_tricks.sliding_window_view(np.pad(values, pad), size, axis=axis)
+            values = windows.mean(axis=-1)
+    return values
+
+class HeatTileStore:
+    """Pre-rendered heat tiles of movement history, one z/x/y pyramid per date partition"""
+    
+    def __init__(self, layer='traffic', root=TILE_ROOT, min_zoom=DEFAULT_MIN_ZOOM, max_zoom=DEFAULT_MAX_ZOOM,
+                 image_format='png', url_prefix=TILE_URL_PREFIX):
+        if image_format not in ('png', 'webp'):
+            raise ValueError(f"Unsupported tile format: {image_format}")
+        
+        self.layer = layer
+        self.path = Path(root) / layer
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.image_format = image_format
+        self.url_prefix = url_prefix
+        self.manifest = self._load_manifest()
+        self._manifest_mtime = self._manifest_file_mtime()
+        # Sessions share a store; manifest reads, writes and tile swaps take turns
+        self._lock = threading.RLock()
+    
+    @property
+    def settings(self):
+        """Render settings; tiles made with other settings are re-rendered"""
+        return {
+            'min_zoom': self.min_zoom,
+            'max_zoom': self.max_zoom,
+            'format': self.image_format,
+            'cells': TILE_CELLS,
+            'margin': TILE_MARGIN,
+            'blur': BLUR_RADIUS
+        }
+    
+    def partitions(self):
+        """Date partitions with rendered tiles, oldest first"""
+        with self._lock:
+            # Pick up partitions rendered by another process, e.g. the offline renderer
+            mtime = self._manifest_file_mtime()
+            if mtime != self._manifest_mtime:
+                self.manifest = self._load_manifest()
+                self._manifest_mtime = mtime
+            return sorted(self.manifest['partitions'])
+    
+    def tile_url(self, partition):
+        """Leaflet URL template for a partition's tiles"""
+        return f"{self.url_prefix}/{self.layer}/{partition}/{{z}}/{{x}}/{{y}}.{self.image_format}"
+    
+    def tile_path(self, partition, z, x, y):
+        """File path of a single tile"""
+        return self.path / str(partition) / str(z) / str(x) / f"{y}.{self.image_format}"
+    
+    def update(self, movement_data, date_column='timestamp', weight_column=None):
+        """
+        Render tiles for new or changed date partitions
+        
+        Partitions whose rows are unchanged since their last render are skipped,
+        so appending a day of data only renders that day.
+        
+        Args:
+            movement_data (pd.DataFrame): Movement log with lat, lon and a date column
+            date_column (str): Column the partitions are derived from
+            weight_column (str): Optional weight per movement; each movement counts 1 if None
+        
+        Returns:
+            list: Partitions that were (re)rendered
+        """
+        
+        data = movement_data.dropna(subset=['lat', 'lon', date_column])
+        dates = pd.to_datetime(data[date_column]).dt.strftime('%Y-%m-%d')
+        weights = (
+            pd.to_numeric(data[weight_column], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+            if weight_column is not None else np.ones(len(data))
+        )
+        frame = pd.DataFrame({
+            'lat': data['lat'].to_numpy(dtype=np.float64),
+            'lon': data['lon'].to_numpy(dtype=np.float64),
+            'weight': weights,
+            'date': dates.to_numpy()
+        })
+        
+        rendered = []
+        for partition, rows in frame.groupby('date', sort=True):
+            fingerprint = self._fingerprint(rows)
+            with self._lock:
+                known = self.manifest['partitions'].get(partition)
+            if known is not None and known['fingerprint'] == fingerprint:
+                continue
+            
+            # Rendering runs outside the lock so readers are never held up by it
+            n_tiles = self.render_partition(partition, rows['lat'], rows['lon'], rows['weight'])
+            with self._lock:
+                self.manifest['partitions'][partition] = {
+                    'fingerprint': fingerprint,
+                    'points': int(len(rows)),
+                    'tiles': n_tiles,
+                    'rendered_at': datetime.now().isoformat(timespec='seconds')
+                }
+                self._save_manifest()
+            rendered.append(partition)
+        
+        return rendered
+    
+    def invalidate(self, partition=None):
+        """
+        Delete the tiles of one partition, or of all partitions
+        
+        Args:
+            partition (str): Date partition ('YYYY-MM-DD'); None clears the layer
+        """
+        
+        with self._lock:
+            targets = self.partitions() if partition is None else [partition]
+            for target in targets:
+                shutil.rmtree(self.path / target, ignore_errors=True)
+                self.manifest['partitions'].pop(target, None)
+            self._save_manifest()
+    
+    def render_partition(self, partition, lat, lon, weights=None):
+        """
+        Render the full tile pyramid of one partition
+        
+        The partition is written to its own temporary directory and swapped in
+        at the end, so readers never see a half-rendered pyramid and concurrent
+        renders never share a staging directory.
+        
+        Args:
+            partition (str): Date partition the tiles belong to
+            lat (array-like): Latitudes of the movements
+            lon (array-like): Longitudes of the movements
+            weights (array-like): Optional weight per movement
+        
+        Returns:
+            int: Number of tiles written
+        """
+        
+        grid = HeatmapGrid(lat, lon, weights, min_zoom=self.min_zoom, max_zoom=self.max_zoom,
+                           cells_per_tile=TILE_CELLS)
+        
+        self.path.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{partition}.tmp-", dir=self.path))
+        
+        n_tiles = 0
+        for zoom in range(self.min_zoom, self.max_zoom + 1):
+            for (x, y), image in self._render_level(grid.levels[zoom], zoom):
+                tile = staging / str(zoom) / str(x) / f"{y}.{self.image_format}"
+                tile.parent.mkdir(parents=True, exist_ok=True)
+                if self.image_format == 'webp':
+                    image = image.convert('RGBA')
+                image.save(tile, format=self.image_format.upper())
+                n_tiles += 1
+        
+        target = self.path / partition
+        with self._lock:
+            shutil.rmtree(target, ignore_errors=True)
+            try:
+                if n_tiles:
+                    staging.rename(target)
+            except OSError:
+                # Another process swapped in its render of the same partition first
+                pass
+            shutil.rmtree(staging, ignore_errors=True)
+        
+        return n_tiles
+    
+    def _render_level(self, level, zoom):
+        """Yield ((x, y), image) for every tile of one zoom level with any heat"""
+        if not len(level['ix']):
+            return
+        
+        padded = TILE_CELLS + 2 * TILE_MARGIN
+        n_side = 2 ** zoom
+        ix, iy, weight = level['ix'], level['iy'], level['weight']
+        
+        # Cells near a tile edge also belong to the neighbouring tile's margin
+        tx_lo, tx_hi = (ix - TILE_MARGIN) // TILE_CELLS, (ix + TILE_MARGIN) // TILE_CELLS
+        ty_lo, ty_hi = (iy - TILE_MARGIN) // TILE_CELLS, (iy + TILE_MARGIN) // TILE_CELLS
+        copies = [
+            np.ones(len(ix), dtype=bool),
+            tx_hi != tx_lo,
+            ty_hi != ty_lo,
+            (tx_hi != tx_lo) & (ty_hi != ty_lo)
+        ]
+        tx = np.concatenate([tx_lo[copies[0]], tx_hi[copies[1]], tx_lo[copies[2]], tx_hi[copies[3]]])
+        ty = np.concatenate([ty_lo[copies[0]], ty_lo[copies[1]], ty_hi[copies[2]], ty_hi[copies[3]]])
+        cx = np.concatenate([ix[mask] for mask in copies])
+        cy = np.concatenate([iy[mask] for mask in copies])
+        w = np.concatenate([weight[mask] for mask in copies])
+        
+        inside = (tx >= 0) & (tx < n_side) & (ty >= 0) & (ty < n_side)
+        tx, ty, cx, cy, w = tx[inside], ty[inside], cx[inside], cy[inside], w[inside]
+        
+        local = (cy - ty * TILE_CELLS + TILE_MARGIN) * padded + (cx - tx * TILE_CELLS + TILE_MARGIN)
+        codes, tiles = pd.factorize(tx * n_side + ty)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(tiles) + 1))
+        
+        # First pass: smoothed density per tile, to scale the whole level alike
+        densities = []
+        for t in range(len(tiles)):
+            rows = order[bounds[t]:bounds[t + 1]]
+            density = np.bincount(local[rows], weights=w[rows], minlength=padded * padded)
+            density = _box_blur(density.reshape(padded, padded), BLUR_RADIUS)
+            densities.append(density[TILE_MARGIN:-TILE_MARGIN, TILE_MARGIN:-TILE_MARGIN])
+        
+        peak = max(float(d.max()) for d in densities)
+        if peak <= 0:
+            return
+        
+        # Second pass: colour and upsample
+        for tile_key, density in zip(tiles, densities):
+            values = np.sqrt(np.clip(density / peak, 0, 1)).astype(np.float32)
+            if values.max() < 1 / 255:
+                continue
+            
+            smooth = np.asarray(Image.fromarray(values).resize((TILE_SIZE, TILE_SIZE), Image.BILINEAR))
+            image = Image.fromarray(np.clip(smooth * 255, 0, 255).astype(np.uint8))
+            image.putpalette(HEAT_PALETTE, rawmode='RGBA')
+            yield (int(tile_key // n_side), int(tile_key % n_side)), image
+    
+    @staticmethod
+    def _fingerprint(rows):
+        """Order-independent hash of a partition's points"""
+        hashed = pd.util.hash_pandas_object(rows[['lat', 'lon', 'weight']], index=False).to_numpy()
+        return f"{len(rows)}-{int(hashed.sum(dtype=np.uint64)):016x}"
+    
+    def _load_manifest(self):
+        manifest_file = self.path / "manifest.json"
+        try:
+            with open(manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        
+        # Tiles rendered with other settings cannot be reused; forgetting their
+        # partitions makes the next update render them again over the old files
+        if manifest is None or manifest.get('settings') != self.settings:
+            manifest = {'settings': self.settings, 'partitions': {}}
+        
+        return manifest
+    
+    def _save_manifest(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=self.path, prefix="manifest.", suffix=".tmp", delete=False) as f:
+            json.dump(self.manifest, f, indent=2)
+        Path(f.name).replace(self.path / "manifest.json")
+        self._manifest_mtime = self._manifest_file_mtime()
+    
+    def _manifest_file_mtime(self):
+        try:
+            return (self.path / "manifest.json").stat().st_mtime_ns
+        except OSError:
+            return None
+
+class HeatTileRefresher:
+    """Brings a tile store up to date in a background thread, at most once per interval"""
+    
+    def __init__(self, store, interval_seconds=REFRESH_INTERVAL_SECONDS):
+        self.store = store
+        self.interval = interval_seconds
+        self.last_error = None
+        self._thread = None
+        self._started_at = None
+        self._lock = threading.Lock()
+    
+    @property
+    def running(self):
+        """Whether a refresh is in progress"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def request(self, load_data, weight_column=None):
+        """
+        Start a background refresh unless one is running or the last one is recent
+        
+        Args:
+            load_data (callable): Returns the movement log; called in the background thread
+            weight_column (str): Optional weight per movement
+        
+        Returns:
+            bool: Whether a refresh was started
+        """
+        
+        with self._lock:
+            if self.running:
+                return False
+            if self._started_at is not None and time.monotonic() - self._started_at < self.interval:
+                return False
+            
+            self._started_at = time.monotonic()
+            self._thread = threading.Thread(
+                target=self._run, args=(load_data, weight_column),
+                name=f"heat-tiles-{self.store.layer}", daemon=True
+            )
+            self._thread.start()
+            return True
+    
+    def _run(self, load_data, weight_column):
+        try:
+            self.store.update(load_data(), weight_column=weight_column)
+            self.last_error = None
+        except Exception as e:
+            # Kept for display; the next request after the interval tries again
+            self.last_error = str(e)
+
+@st.cache_resource(show_spinner=False)
+def get_heat_tile_store(layer='traffic', min_zoom=DEFAULT_MIN_ZOOM, max_zoom=DEFAULT_MAX_ZOOM, image_format='png'):
+    """
+    Process-wide tile store for one heat layer
+    
+    Args:
+        layer (str): Layer name, also the directory under TILE_ROOT
+        min_zoom (int): Coarsest zoom level rendered
+        max_zoom (int): Finest zoom level rendered
+        image_format (str): 'png' or 'webp'
+    
+    Returns:
+        HeatTileStore: Shared tile store
+    """
+    
+    return HeatTileStore(layer, min_zoom=min_zoom, max_zoom=max_zoom, image_format=image_format)
+
+@st.cache_resource(show_spinner=False)
+def get_heat_tile_refresher(layer='traffic', interval_seconds=REFRESH_INTERVAL_SECONDS):
+    """
+    Process-wide background refresher for one heat layer
+    
+    Args:
+        layer (str): Layer name
+        interval_seconds (float): Minimum time between refreshes
+    
+    Returns:
+        HeatTileRefresher: Shared refresher of get_heat_tile_store(layer)
+    """
+    
+    return HeatTileRefresher(get_heat_tile_store(layer), interval_seconds)
+
+def refresh_heat_tiles(load_data, layer='traffic', weight_column=None):
+    """
+    Rendered partitions of a layer, with tiles brought up to date in the background
+    
+    Cheap enough for a fragment that reruns every few seconds: it only reads
+    the manifest. At most once per REFRESH_INTERVAL_SECONDS a background
+    thread loads the movement log and renders new or changed days; they show
+    up on a later call. Large histories are best rendered offline with
+    scripts/render_heat_tiles.py.
+    
+    Args:
+        load_data (callable): Returns the movement log with timestamp, lat and lon
+        layer (str): Layer name
+        weight_column (str): Optional weight per movement (e.g. 'delay_minutes')
+    
+    Returns:
+        list: Date partitions available for the layer
+    """
+    
+    get_heat_tile_refresher(layer).request(load_data, weight_column=weight_column)
+    return get_heat_tile_store(layer).partitions()
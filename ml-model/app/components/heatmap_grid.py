@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Grid cells along one side of a 256 px map tile, i.e. 16 px cells on screen
+CELLS_PER_TILE = 16
+
+# Zoom levels aggregated up front
+DEFAULT_MIN_ZOOM = 3
+DEFAULT_MAX_ZOOM = 14
+
+# Web Mercator is undefined at the poles
+MAX_LATITUDE = 85.05112878
+
+def project(lat, lon):
+    """
+    Project coordinates to normalised Web Mercator
+    
+    Args:
+        lat (array-like): Latitudes in degrees
+        lon (array-like): Longitudes in degrees
+    
+    Returns:
+        tuple: (x, y) arrays in [0, 1), y growing southwards like map tiles
+    """
+    
+    lat = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(lat) + 1.0 / np.cos(lat)) / np.pi) / 2.0
+    return x, y
+
+def unproject(x, y):
+    """
+    Inverse of project
+    
+    Args:
+        x (array-like): Normalised Web Mercator x
+        y (array-like): Normalised Web Mercator y
+    
+    Returns:
+        tuple: (lat, lon) arrays in degrees
+    """
+    
+    lon = np.asarray(x, dtype=np.float64) * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1.0 - 2.0 * np.asarray(y, dtype=np.float64)))))
+    return lat, lon
+
+class HeatmapGrid:
+    """Square-grid aggregation of weighted points, precomputed for every zoom level"""
+    
+    def __init__(self, lat, lon, weights=None, min_zoom=DEFAULT_MIN_ZOOM, max_zoom=DEFAULT_MAX_ZOOM,
+                 cells_per_tile=CELLS_PER_TILE):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.cells_per_tile = cells_per_tile
+        self.n_points = len(lat)
+        
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        weights = np.ones(len(lat)) if weights is None else np.asarray(weights, dtype=np.float64)
+        
+        # Points without a usable position or weight are left out
+        valid = np.isfinite(lat) & np.isfinite(lon) & np.isfinite(weights)
+        x, y = project(lat[valid], lon[valid])
+        
+        # Finest level straight from the points
+        side = self.side(max_zoom)
+        ix = np.clip((x * side).astype(np.int64), 0, side - 1)
+        iy = np.clip((y * side).astype(np.int64), 0, side - 1)
+        self.levels = {max_zoom: self._aggregate(ix, iy, side, weights[valid], np.ones(len(ix)))}
+        
+        # Each coarser level merges 2x2 cells of the level below
+        for zoom in range(max_zoom - 1, min_zoom - 1, -1):
+            finer = self.levels[zoom + 1]
+            self.levels[zoom] = self._aggregate(
+                finer['ix'] // 2, finer['iy'] // 2, self.side(zoom), finer['weight'], finer['count']
+            )
+    
+    def side(self, zoom):
+        """Number of grid cells across the whole world at a zoom level"""
+        return (2 ** zoom) * self.cells_per_tile
+    
+    @staticmethod
+    def _aggregate(ix, iy, side, weight, count):
+        """Sum weights and counts per (ix, iy) cell"""
+        codes, keys = pd.factorize(ix * side + iy)
+        return {
+            'ix': keys // side,
+            'iy': keys % side,
+            'weight': np.bincount(codes, weights=weight, minlength=len(keys)),
+            'count': np.bincount(codes, weights=count, minlength=len(keys)).astype(np.int64)
+        }
+    
+    def cells(self, zoom, bounds=None, max_cells=None):
+        """
+        Aggregated cells to draw at a zoom level
+        
+        Args:
+            zoom (int): Map zoom level; clipped to the precomputed range
+            bounds (list or dict): Optional viewport, either [[south, west], [north, east]]
+                or the st_folium dict with '_southWest' and '_northEast'
+            max_cells (int): Optional cap; coarser levels are used until it is met
+        
+        Returns:
+            pd.DataFrame: Cell centre lat/lon, summed weight, point count and the zoom used
+        """
+        
+        zoom = int(np.clip(round(zoom), self.min_zoom, self.max_zoom))
+        
+        while True:
+            level = self.levels[zoom]
+            side = self.side(zoom)
+            keep = self._in_bounds(level, side, bounds)
+            
+            if max_cells is None or keep.sum() <= max_cells or zoom == self.min_zoom:
+                break
+            zoom -= 1
+        
+        lat, lon = unproject((level['ix'][keep] + 0.5) / side, (level['iy'][keep] + 0.5) / side)
+        return pd.DataFrame({
+            'lat': lat,
+            'lon': lon,
+            'weight': level['weight'][keep],
+            'count': level['count'][keep],
+            'zoom': zoom
+        })
+    
+    def _in_bounds(self, level, side, bounds):
+        """Mask of the cells of a level that fall inside the viewport"""
+        if bounds is None:
+            return np.ones(len(level['ix']), dtype=bool)
+        
+        if isinstance(bounds, dict):
+            south_west, north_east = bounds['_southWest'], bounds['_northEast']
+            bounds = [[south_west['lat'], south_west['lng']], [north_east['lat'], north_east['lng']]]
+        
+        (south, west), (north, east) = bounds
+        if None in (south, west, north, east):
+            return np.ones(len(level['ix']), dtype=bool)
+        
+        x_min, y_max = project(south, west)
+        x_max, y_min = project(north, east)
+        
+        # One cell of margin so the heat does not stop at the viewport edge
+        return (
+            (level['ix'] >= np.floor(x_min * side) - 1) & (level['ix'] <= np.floor(x_max * side) + 1)
+            & (level['iy'] >= np.floor(y_min * side) - 1) & (level['iy'] <= np.floor(y_max * side) + 1)
+        )
+
+@st.cache_resource(show_spinner=False)
+def build_heatmap_grid(data_points, intensity_column='intensity', min_zoom=DEFAULT_MIN_ZOOM,
+                       max_zoom=DEFAULT_MAX_ZOOM):
+    """
+    Aggregate points into a cached multi-resolution heatmap grid
+    
+    Args:
+        data_points (pd.DataFrame): DataFrame with lat, lon and optionally an intensity column
+        intensity_column (str): Column name for intensity values; 1 per point if missing
+        min_zoom (int): Coarsest zoom level to precompute
+        max_zoom (int): Finest zoom level to precompute
+    
+    Returns:
+        HeatmapGrid: Grid shared by all sessions
+    """
+    
+    weights = (
+        pd.to_numeric(data_points[intensity_column], errors='coerce').to_numpy(dtype=np.float64)
+        if intensity_column in data_points.columns else None
+    )
+    return HeatmapGrid(
+        data_points['lat'].to_numpy(dtype=np.float64),
+        data_points['lon'].to_numpy(dtype=np.float64),
+        weights,
+        min_zoom=min_zoom,
+        max_zoom=max_zoom
+    )
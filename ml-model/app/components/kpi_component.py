@@ -5,6 +5,40 @@ from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 
+from .figure_cache import cached_figure
+from .downsampling import DEFAULT_CHART_WIDTH_PX, downsample_frame
+from .chart_rendering import WEBGL_POINT_THRESHOLD
+from .alert_store import AlertStore, normalize_severity
+
+# Change (%) between the start and end of a series beyond which it is trending
+TREND_THRESHOLD_PERCENT = 5
+
+# Points averaged at each end of a series when computing its change
+TREND_WINDOW = 5
+
+# Points further than this many RMS residuals from the fitted line are
+# dropped before the slope is refitted
+SLOPE_OUTLIER_SCALE = 3.0
+
+# Gauges of the performance dashboard: metric key, title, subplot row and column
+PERFORMANCE_DASHBOARD_METRICS = (
+    ("on_time_performance", "On-Time %", 1, 1),
+    ("capacity_utilization", "Capacity %", 1, 2),
+    ("fuel_efficiency", "Efficiency %", 2, 1),
+    ("asset_health", "Health Score", 2, 2)
+)
+
+# Alerts rendered per page of the alert summary
+ALERTS_PER_PAGE = 20
+
+# Summary label and card colours per alert severity, most urgent first
+ALERT_STYLES = {
+    'critical': {'label': "🚨 Critical", 'color': "#fecaca", 'border': "#991b1b"},
+    'high': {'label': "🔴 High Priority", 'color': "#fee2e2", 'border': "#dc2626"},
+    'medium': {'label': "🟡 Medium Priority", 'color': "#fef3c7", 'border': "#f59e0b"},
+    'low': {'label': "🟢 Low Priority", 'color': "#dcfce7", 'border': "#16a34a"}
+}
+
 def display_kpis(metrics_data):
     """
     Display key performance indicators in a formatted layout
@@ -92,53 +126,163 @@ def create_metric_card(title, value, subtitle=None, color="primary", icon=None):
     
     return card_html
 
-def format_performance_metrics(data, time_column='timestamp', value_column='value'):
+def format_performance_metrics(data, time_column='timestamp', value_column='value', by=None):
     """
     Format performance metrics data for visualization
     
+    Points are taken in time_column order when that column is present. With by,
+    every series of a long-format frame is analysed in one pass.
+    
     Args:
         data (pd.DataFrame): Performance data
         time_column (str): Name of the time column
         value_column (str): Name of the value column
+        by (str or list): Optional columns identifying each series, e.g. metric and station
     
     Returns:
-        dict: Formatted metrics with statistics
+        dict: Formatted metrics with statistics, or a pd.DataFrame with one
+            row per series when by is given
     """
     
-    if data.empty:
+    if by is not None:
+        return analyze_trends(data, by, time_column, value_column)
+    
+    trends = analyze_trends(data, None, time_column, value_column) if not data.empty else None
+    if trends is None or trends.empty:
         return {
             'current_value': 0,
             'average': 0,
             'trend': 'stable',
-            'change_percent': 0
+            'change_percent': 0,
+            'slope': 0
         }
     
-    # Calculate metrics
-    current_value = data[value_column].iloc[-1] if len(data) > 0 else 0
-    average = data[value_column].mean()
+    series = trends.iloc[0]
+    return {
+        'current_value': series['current_value'],
+        'average': series['average'],
+        'trend': series['trend'],
+        'change_percent': series['change_percent'],
+        'slope': series['slope']
+    }
+
+def analyze_trends(data, by=None, time_column='timestamp', value_column='value',
+                   window=TREND_WINDOW, threshold=TREND_THRESHOLD_PERCENT):
+    """
+    Trend statistics for many series of a long-format frame at once
+    
+    The change percentage compares the mean of the last window points with
+    the first window points; the slope is a least-squares fit refitted
+    without points beyond SLOPE_OUTLIER_SCALE RMS residuals.
+    
+    Args:
+        data (pd.DataFrame): Long-format data, one row per point
+        by (str or list): Columns identifying each series, or None for a single series
+        time_column (str): Name of the time column; row order is used if missing
+        value_column (str): Name of the value column
+        window (int): Points averaged at each end of a series
+        threshold (float): Change percentage beyond which a series is improving or declining
     
-    # Calculate trend
-    if len(data) >= 2:
-        recent_avg = data[value_column].tail(5).mean()
-        older_avg = data[value_column].head(5).mean()
-        change_percent = ((recent_avg - older_avg) / older_avg * 100) if older_avg != 0 else 0
+    Returns:
+        pd.DataFrame: current_value, average, slope (per hour for datetime times),
+            change_percent, trend and points per series
+    """
+    
+    by = [] if by is None else [by] if isinstance(by, str) else list(by)
+    values = pd.to_numeric(data[value_column], errors='coerce').to_numpy(dtype=np.float64)
+    
+    if by:
+        # Series codes from the per-column codes; rows with a missing key stay -1
+        factorized = [pd.factorize(data[column], sort=True) for column in by]
+        sizes = [len(uniques) for _, uniques in factorized]
+        valid = np.logical_and.reduce([column_codes >= 0 for column_codes, _ in factorized])
+        combined = np.ravel_multi_index([column_codes[valid] for column_codes, _ in factorized], sizes)
         
-        if change_percent > 5:
-            trend = 'improving'
-        elif change_percent < -5:
-            trend = 'declining'
+        series_codes, series_keys = pd.factorize(combined, sort=True)
+        codes = np.full(len(data), -1, dtype=np.int64)
+        codes[valid] = series_codes
+        parts = np.unravel_index(series_keys, sizes)
+        index = pd.MultiIndex.from_arrays(
+            [uniques[part] for (_, uniques), part in zip(factorized, parts)], names=by
+        ) if len(by) > 1 else pd.Index(factorized[0][1][parts[0]], name=by[0])
+    else:
+        codes = np.zeros(len(data), dtype=np.int64)
+        index = pd.RangeIndex(1)
+    n_series = len(index)
+    
+    # Positions along each series: hours for datetimes, row order without a time column
+    if time_column in data.columns:
+        times = data[time_column]
+        if pd.api.types.is_datetime64_any_dtype(times):
+            x = times.to_numpy(dtype='datetime64[ns]').astype(np.int64) / 3.6e12
         else:
-            trend = 'stable'
+            x = pd.to_numeric(times, errors='coerce').to_numpy(dtype=np.float64)
     else:
-        trend = 'stable'
-        change_percent = 0
+        x = np.arange(len(data), dtype=np.float64)
+    
+    keep = (codes >= 0) & ~np.isnan(values) & ~np.isnan(x)
+    codes, x, values = codes[keep], x[keep], values[keep]
+    
+    # Sort by time, then stably by series; series codes that fit in 16 bits
+    # get NumPy's radix sort
+    order = np.argsort(x)
+    series_codes = codes[order].astype(np.uint16) if n_series <= np.iinfo(np.uint16).max else codes[order]
+    order = order[np.argsort(series_codes, kind='stable')]
+    codes, x, values = codes[order], x[order], values[order]
+    
+    points = np.bincount(codes, minlength=n_series)
+    has_points = points > 0
+    counts = np.where(has_points, points, 1)
+    starts = np.cumsum(points) - points
+    rank = np.arange(len(codes)) - starts[codes]
+    
+    current_value = values[np.maximum(starts + points - 1, 0)] if len(values) else np.zeros(n_series)
+    average = np.bincount(codes, values, n_series) / counts
+    
+    # Mean of the first and last window points of every series
+    head = rank < window
+    tail = rank >= points[codes] - window
+    head_mean = np.bincount(codes[head], values[head], n_series) / np.minimum(counts, window)
+    tail_mean = np.bincount(codes[tail], values[tail], n_series) / np.minimum(counts, window)
+    comparable = (points >= 2) & (head_mean != 0)
+    change_percent = np.where(comparable, (tail_mean - head_mean) / np.where(comparable, head_mean, 1) * 100, 0.0)
+    
+    slope = _batched_slope(codes, x, values, n_series, np.ones(len(codes), dtype=bool))
+    
+    # Refit without outliers so a single spike cannot flip the trend
+    mean_x = np.bincount(codes, x, n_series) / counts
+    intercept = average - slope * mean_x
+    residuals = values - (intercept[codes] + slope[codes] * x)
+    rms = np.sqrt(np.bincount(codes, residuals ** 2, n_series) / counts)
+    inliers = np.abs(residuals) <= SLOPE_OUTLIER_SCALE * rms[codes]
+    refit = np.bincount(codes[inliers], minlength=n_series) >= 2
+    slope = np.where(refit, _batched_slope(codes, x, values, n_series, inliers), slope)
+    
+    trend = np.where(
+        change_percent > threshold, 'improving',
+        np.where(change_percent < -threshold, 'declining', 'stable')
+    )
     
-    return {
-        'current_value': round(current_value, 2),
-        'average': round(average, 2),
+    trends = pd.DataFrame({
+        'current_value': np.round(current_value, 2),
+        'average': np.round(average, 2),
+        'slope': np.round(slope, 4),
+        'change_percent': np.round(change_percent, 2),
         'trend': trend,
-        'change_percent': round(change_percent, 2)
-    }
+        'points': points
+    }, index=index)
+    return trends[has_points]
+
+def _batched_slope(codes, x, values, n_series, mask):
+    """Least-squares slope per series over the masked points, 0 where undefined"""
+    codes, x, values = codes[mask], x[mask], values[mask]
+    counts = np.maximum(np.bincount(codes, minlength=n_series), 1)
+    
+    # Centering on each series' mean keeps the sums well conditioned for epoch times
+    centered = x - (np.bincount(codes, x, n_series) / counts)[codes]
+    sxx = np.bincount(codes, centered * centered, n_series)
+    sxy = np.bincount(codes, centered * values, n_series)
+    return np.where(sxx > 0, sxy / np.where(sxx > 0, sxx, 1), 0.0)
 
 def create_gauge_chart(value, title, min_val=0, max_val=100, thresholds=None):
     """
@@ -155,6 +299,16 @@ def create_gauge_chart(value, title, min_val=0, max_val=100, thresholds=None):
         plotly.graph_objects.Figure: Gauge chart figure
     """
     
+    return cached_figure(
+        'gauge_chart',
+        lambda: _build_gauge_chart(value, title, min_val, max_val, thresholds),
+        traces=[{'value': value}],
+        style={'title': title, 'min_val': min_val, 'max_val': max_val, 'thresholds': thresholds}
+    )
+
+def _build_gauge_chart(value, title, min_val=0, max_val=100, thresholds=None):
+    """Gauge chart figure built from scratch"""
+    
     # Default thresholds
     if thresholds is None:
         thresholds = {
@@ -199,6 +353,15 @@ def create_performance_dashboard(performance_data):
         plotly.graph_objects.Figure: Combined dashboard figure
     """
     
+    return cached_figure(
+        'performance_dashboard',
+        lambda: _build_performance_dashboard(performance_data),
+        traces=[{'value': performance_data.get(metric[0], 0)} for metric in PERFORMANCE_DASHBOARD_METRICS]
+    )
+
+def _build_performance_dashboard(performance_data):
+    """Performance dashboard figure built from scratch"""
+    
     # Create subplots
     fig = make_subplots(
         rows=2, cols=2,
@@ -209,14 +372,7 @@ def create_performance_dashboard(performance_data):
     )
     
     # Add gauge charts
-    metrics = [
-        ("on_time_performance", "On-Time %", 1, 1),
-        ("capacity_utilization", "Capacity %", 1, 2), 
-        ("fuel_efficiency", "Efficiency %", 2, 1),
-        ("asset_health", "Health Score", 2, 2)
-    ]
-    
-    for metric_key, title, row, col in metrics:
+    for metric_key, title, row, col in PERFORMANCE_DASHBOARD_METRICS:
         value = performance_data.get(metric_key, 0)
         
         fig.add_trace(
@@ -240,27 +396,44 @@ def create_performance_dashboard(performance_data):
     fig.update_layout(height=600, title_text="Performance Dashboard")
     return fig
 
-def create_trend_chart(data, x_col, y_col, title, color='blue'):
+def create_trend_chart(data, x_col, y_col, title, color='blue', width_px=DEFAULT_CHART_WIDTH_PX, x_range=None):
     """
     Create a trend line chart
     
+    Long series are decimated to what the plot width can show, so the
+    browser never receives more than a few points per pixel.
+    
     Args:
         data (pd.DataFrame): Data for the chart
         x_col (str): Column name for x-axis
         y_col (str): Column name for y-axis
         title (str): Chart title
         color (str): Line color
+        width_px (int): Plot width in pixels
+        x_range (tuple): Optional (start, end) zoom window, decimated on its own
     
     Returns:
         plotly.express.line: Line chart figure
     """
     
+    data = downsample_frame(data, x_col, y_col, width_px, x_range)
+    return cached_figure(
+        'trend_chart',
+        lambda: _build_trend_chart(data, x_col, y_col, title, color),
+        traces=[{'x': data[x_col], 'y': data[y_col]}],
+        style={'x_col': x_col, 'y_col': y_col, 'title': title, 'color': color, 'webgl': len(data) > WEBGL_POINT_THRESHOLD}
+    )
+
+def _build_trend_chart(data, x_col, y_col, title, color='blue'):
+    """Trend line chart figure built from scratch"""
+    
     fig = px.line(
         data, 
         x=x_col, 
         y=y_col,
         title=title,
-        markers=True
+        markers=True,
+        render_mode='webgl' if len(data) > WEBGL_POINT_THRESHOLD else 'svg'
     )
     
     fig.update_traces(line_color=color)
@@ -272,72 +445,80 @@ def create_trend_chart(data, x_col, y_col, title, color='blue'):
     
     return fig
 
-def display_alert_summary(alerts_data):
+def display_alert_summary(alerts_data, page_size=ALERTS_PER_PAGE, key="alert_summary"):
     """
     Display a summary of system alerts
     
+    Counts come from the store's severity indexes and only the visible page of
+    alerts is rendered, so the cost does not grow with the number of alerts.
+    
     Args:
-        alerts_data (list): List of alert dictionaries
+        alerts_data (list or AlertStore): Alert dictionaries or a store holding them
+        page_size (int): Alerts rendered per page
+        key (str): Prefix of the widget keys, unique per summary on a page
     
     Returns:
         None: Displays alerts directly in Streamlit
     """
     
-    if not alerts_data:
+    store = alerts_data if isinstance(alerts_data, AlertStore) else AlertStore(alerts_data)
+    if not len(store):
         st.info("🟢 No active alerts")
         return
     
-    # Count alerts by severity
-    severity_counts = {}
-    for alert in alerts_data:
-        severity = alert.get('severity', 'low')
-        severity_counts[severity] = severity_counts.get(severity, 0) + 1
+    # Display summary; critical alerts get their own column only when present
+    severity_counts = store.counts()
+    levels = [level for level in ALERT_STYLES if level != 'critical' or severity_counts[level]]
+    for column, level in zip(st.columns(len(levels)), levels):
+        with column:
+            st.metric(ALERT_STYLES[level]['label'], severity_counts[level])
+    
+    # Display the visible page of alerts
+    st.subheader("Active Alerts")
+    filter_col, page_col = st.columns([2, 1])
     
-    # Display summary
-    col1, col2, col3 = st.columns(3)
+    with filter_col:
+        options = ["All"] + [level.title() for level in levels if severity_counts[level]]
+        selected = st.selectbox("Severity", options, key=f"{key}_severity")
+    severity = None if selected == "All" else selected
     
-    with col1:
-        high_count = severity_counts.get('high', 0)
-        st.metric("🔴 High Priority", high_count)
+    total = store.count(severity)
+    n_pages = store.page_count(page_size, severity)
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
     
-    with col2:
-        medium_count = severity_counts.get('medium', 0)
-        st.metric("🟡 Medium Priority", medium_count)
+    with page_col:
+        page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, step=1, key=page_key)
     
-    with col3:
-        low_count = severity_counts.get('low', 0)
-        st.metric("🟢 Low Priority", low_count)
+    start = (page - 1) * page_size
+    st.caption(f"Showing {start + 1}–{min(start + page_size, total)} of {total} alerts, newest first")
     
-    # Display individual alerts
-    st.subheader("Active Alerts")
-    for alert in alerts_data:
-        severity = alert.get('severity', 'low')
+    cards = []
+    for alert in store.page(page - 1, page_size, severity):
+        severity_name = normalize_severity(alert.get('severity'))
+        style = ALERT_STYLES.get(severity_name, ALERT_STYLES['low'])
         message = alert.get('message', 'No message')
         timestamp = alert.get('timestamp', 'Unknown time')
+        if alert.get('occurrences', 1) > 1:
+            # Repeats folded together by the alert pipeline
+            message = f"{message} (×{alert['occurrences']})"
         
-        # Color coding
-        if severity == 'high':
-            color = "#fee2e2"
-            border_color = "#dc2626"
-        elif severity == 'medium':
-            color = "#fef3c7"
-            border_color = "#f59e0b"
-        else:
-            color = "#dcfce7"
-            border_color = "#16a34a"
-        
-        st.markdown(f"""
+        cards.append(f"""
         <div style="
-            background: {color};
-            border: 1px solid {border_color};
+            background: {style['color']};
+            border: 1px solid {style['border']};
             border-radius: 8px;
             padding: 1rem;
             margin: 0.5rem 0;
         ">
-            <strong>{severity.upper()}</strong> - {timestamp}<br>
+            <strong>{severity_name.upper()}</strong> - {timestamp}<br>
             {message}
         </div>
-        """, unsafe_allow_html=True)
+        """)
+    
+    # One markdown block for the whole page instead of one per alert
+    st.markdown("".join(cards), unsafe_allow_html=True)
 
 def calculate_operational_score(metrics):
     """
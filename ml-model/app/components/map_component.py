@@ -1,10 +1,617 @@
+import json
+import threading
 import folium
 import streamlit as st
 from folium import plugins
+from streamlit_folium import st_folium, generate_leaflet_string
 import pandas as pd
 import numpy as np
+from jinja2 import Template
 
-def create_railway_map(center_lat=19.0760, center_lon=72.8777, zoom_start=9):
+from .heatmap_grid import CELLS_PER_TILE, build_heatmap_grid
+from .heat_tiles import get_heat_tile_store
+from .track_geometry import LOD_MAX_ZOOM, LOD_MIN_ZOOM, LOD_ZOOM_WINDOW, lod_levels, lod_window, simplify_polyline
+
+# Trains above this count are drawn by the client from column arrays
+BULK_MARKER_THRESHOLD = 500
+
+# Delay bands: up to 5 min on time, up to 15 min slight delay, beyond that delayed
+DELAY_BAND_LIMITS = [5, 15]
+DELAY_BAND_COLORS = ['green', 'orange', 'red']
+DELAY_BAND_LABELS = ['On Time', 'Slight Delay', 'Delayed']
+DELAY_BAND_STYLES = [
+    {'color': '#15803d', 'fillColor': '#16a34a'},
+    {'color': '#b45309', 'fillColor': '#f59e0b'},
+    {'color': '#b91c1c', 'fillColor': '#dc2626'}
+]
+
+# Decimal places kept for GeoJSON coordinates (5 is roughly 1 m)
+GEOJSON_PRECISION = 5
+
+# Heatmaps with more points than this are aggregated on a server-side grid
+HEATMAP_RAW_POINT_LIMIT = 5000
+
+# Most grid cells sent for one heatmap view
+HEATMAP_MAX_CELLS = 5000
+
+# Serialises st_folium calls that temporarily attach overlays to a shared base map
+_BASE_MAP_LOCK = threading.Lock()
+
+# Popup fields shown for live train updates: label -> train_data column
+DEFAULT_LIVE_FIELDS = {
+    'From': 'from_station',
+    'To': 'to_station',
+    'Current': 'current_station',
+    'Delay (min)': 'delay_minutes',
+    'Platform': 'platform'
+}
+
+# Refreshes between full keyframes, so a client that missed an update resyncs
+LIVE_KEYFRAME_INTERVAL = 30
+
+class TrainMarkerLayer(folium.map.Layer):
+    """Train markers built in the browser from column arrays, with popups rendered on open"""
+    
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var data = {{ this.data|tojson }};
+                var colors = {{ this.colors|tojson }};
+                var labels = {{ this.labels|tojson }};
+                var icons = colors.map(function(color) {
+                    return L.AwesomeMarkers.icon({icon: 'train', prefix: 'fa', markerColor: color});
+                });
+                var escape = function(value) {
+                    return String(value).replace(/[&<>"']/g, function(c) {
+                        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                    });
+                };
+                var popup = function(i) {
+                    return '<div style="width: 200px;">' +
+                        '<h4>🚂 Train ' + escape(data.train[i]) + '</h4>' +
+                        '<p><b>Route:</b> ' + escape(data.origin[i]) + ' → ' + escape(data.destination[i]) + '</p>' +
+                        '<p><b>Current:</b> ' + escape(data.current[i]) + '</p>' +
+                        '<p><b>Status:</b> ' + labels[data.band[i]] + '</p>' +
+                        '<p><b>Delay:</b> ' + escape(data.delay[i]) + ' minutes</p>' +
+                        '<p><b>Platform:</b> ' + escape(data.platform[i]) + '</p>' +
+                        '</div>';
+                };
+                var group = L.featureGroup();
+                for (var i = 0; i < data.lat.length; i++) {
+                    var marker = L.marker([data.lat[i], data.lon[i]], {icon: icons[data.band[i]]});
+                    marker.bindPopup(popup.bind(null, i), {maxWidth: 300});
+                    group.addLayer(marker);
+                }
+                group.addTo({{ this._parent.get_name() }});
+                return group;
+            })();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, columns, name=None, overlay=True, control=True, show=True):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'TrainMarkerLayer'
+        self.data = columns
+        self.colors = DELAY_BAND_COLORS
+        self.labels = DELAY_BAND_LABELS
+
+class TrainGeoJsonLayer(folium.map.Layer):
+    """Whole fleet as one compact GeoJSON FeatureCollection styled by delay band"""
+    
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var data = {{ this.payload }};
+                var styles = {{ this.styles|tojson }};
+                var labels = {{ this.labels|tojson }};
+                var stations = data.stations;
+                var escape = function(value) {
+                    return String(value).replace(/[&<>"']/g, function(c) {
+                        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                    });
+                };
+                var popup = function(p) {
+                    return '<div style="width: 200px;">' +
+                        '<h4>🚂 Train ' + escape(p.t) + '</h4>' +
+                        '<p><b>Route:</b> ' + escape(stations[p.o]) + ' → ' + escape(stations[p.x]) + '</p>' +
+                        '<p><b>Current:</b> ' + escape(stations[p.c]) + '</p>' +
+                        '<p><b>Status:</b> ' + labels[p.b] + '</p>' +
+                        '<p><b>Delay:</b> ' + escape(p.d) + ' minutes</p>' +
+                        '<p><b>Platform:</b> ' + escape(p.p) + '</p>' +
+                        '</div>';
+                };
+                var layer = L.geoJSON(data, {
+                    pointToLayer: function(feature, latlng) {
+                        return L.circleMarker(latlng, Object.assign(
+                            {radius: {{ this.radius }}, weight: 1, fillOpacity: 0.85},
+                            styles[feature.properties.b]
+                        ));
+                    },
+                    onEachFeature: function(feature, marker) {
+                        marker.bindPopup(function() { return popup(feature.properties); }, {maxWidth: 300});
+                        marker.bindTooltip(escape(feature.properties.t));
+                    }
+                });
+                layer.addTo({{ this._parent.get_name() }});
+                return layer;
+            })();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, feature_collection, radius=6, name=None, overlay=True, control=True, show=True):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'TrainGeoJsonLayer'
+        # Compact separators; '</' is escaped so the payload cannot close the script tag
+        self.payload = json.dumps(feature_collection, separators=(',', ':')).replace('</', '<\\/')
+        self.styles = DELAY_BAND_STYLES
+        self.labels = DELAY_BAND_LABELS
+        self.radius = radius
+
+class TrainDeltaLayer(folium.map.Layer):
+    """Applies one position delta to train markers kept alive in the browser between refreshes"""
+    
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(){
+                var map = {{ this.map_name() }};
+                var delta = {{ this.payload }};
+                var colors = {{ this.colors|tojson }};
+                var labels = {{ this.labels|tojson }};
+                var icons = colors.map(function(color) {
+                    return L.AwesomeMarkers.icon({icon: 'train', prefix: 'fa', markerColor: color});
+                });
+                var feeds = map._liveTrainFeeds = map._liveTrainFeeds || {};
+                var feed = feeds[delta.id];
+                if (!feed) {
+                    feed = feeds[delta.id] = {version: null, fields: [], markers: {}, layer: L.layerGroup().addTo(map)};
+                }
+                var escape = function(value) {
+                    return String(value).replace(/[&<>"']/g, function(c) {
+                        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                    });
+                };
+                var popup = function(marker) {
+                    var html = '<div style="width: 200px;"><h4>🚂 Train ' + escape(marker.trainId) + '</h4>' +
+                        '<p><b>Status:</b> ' + labels[marker.band] + '</p>';
+                    for (var k = 0; k < feed.fields.length; k++) {
+                        html += '<p><b>' + escape(feed.fields[k]) + ':</b> ' + escape(marker.values[k]) + '</p>';
+                    }
+                    return html + '</div>';
+                };
+                var place = function(rows) {
+                    for (var i = 0; i < rows.t.length; i++) {
+                        var marker = feed.markers[rows.t[i]];
+                        if (!marker) {
+                            marker = L.marker([rows.lat[i], rows.lon[i]], {icon: icons[rows.b[i]]});
+                            marker.trainId = rows.t[i];
+                            marker.bindPopup(popup, {maxWidth: 300});
+                            marker.bindTooltip(escape(rows.t[i]));
+                            feed.layer.addLayer(marker);
+                            feed.markers[rows.t[i]] = marker;
+                        } else {
+                            marker.setLatLng([rows.lat[i], rows.lon[i]]);
+                            if (marker.band !== rows.b[i]) {
+                                marker.setIcon(icons[rows.b[i]]);
+                            }
+                        }
+                        marker.band = rows.b[i];
+                        marker.values = rows.p[i];
+                        if (marker.isPopupOpen()) {
+                            marker.setPopupContent(popup(marker));
+                        }
+                    }
+                };
+                // Apply each delta once, and only on top of the state it was computed against
+                if (feed.version !== delta.v && (delta.r || feed.version === delta.b)) {
+                    if (delta.r) {
+                        feed.layer.clearLayers();
+                        feed.markers = {};
+                    }
+                    feed.fields = delta.f;
+                    delta.x.forEach(function(id) {
+                        if (feed.markers[id]) {
+                            feed.layer.removeLayer(feed.markers[id]);
+                            delete feed.markers[id];
+                        }
+                    });
+                    place(delta.a);
+                    place(delta.m);
+                    feed.version = delta.v;
+                } else if (feed.version !== delta.v && feed.requested !== delta.v) {
+                    // A delta was missed (e.g. a superseded rerun): ask the server for a
+                    // keyframe through the component value st_folium returns
+                    feed.requested = delta.v;
+                    var value = Object.assign({}, (window.__GLOBAL_DATA__ || {}).previous_data);
+                    value.live_resync = {id: delta.id, v: feed.version, at: delta.v};
+                    window.parent.postMessage({
+                        isStreamlitMessage: true, type: 'streamlit:setComponentValue', value: value, dataType: 'json'
+                    }, '*');
+                }
+                return L.layerGroup();
+            })();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, payload, name=None, overlay=True, control=False, show=True):
+        super().__init__(name=name, overlay=overlay, control=control, show=show)
+        self._name = 'TrainDeltaLayer'
+        self.payload = json.dumps(payload, separators=(',', ':')).replace('</', '<\\/')
+        self.colors = DELAY_BAND_COLORS
+        self.labels = DELAY_BAND_LABELS
+    
+    def map_name(self):
+        """Variable name of the map the markers live on, past any feature groups"""
+        element = self._parent
+        while element is not None and not isinstance(element, folium.Map):
+            element = element._parent
+        return (element or self._parent).get_name()
+
+class ZoomDetailFilter(folium.MacroElement):
+    """Draws only the polyline vertices tagged at or below the current zoom, updating on zoomend"""
+    
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            (function(){
+                var map = {{ this.map_name() }};
+                var container = {{ this._parent.get_name() }};
+                var lines = [
+                    {% for layer, levels in this.lines %}
+                    [{{ layer.get_name() }}, {{ levels }}],
+                    {% endfor %}
+                ];
+                lines.forEach(function(line) { line.push(line[0].getLatLngs()); });
+                var update = function() {
+                    var zoom = map.getZoom();
+                    lines.forEach(function(line) {
+                        var levels = line[1];
+                        line[0].setLatLngs(line[2].filter(function(point, i) { return levels[i] <= zoom; }));
+                    });
+                };
+                map.on('zoomend', update);
+                // Overlays are replaced on refresh; their handlers go with them
+                if (container !== map) {
+                    container.on('remove', function() { map.off('zoomend', update); });
+                }
+                update();
+            })();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, lines):
+        super().__init__()
+        self._name = 'ZoomDetailFilter'
+        self.lines = [(layer, json.dumps(levels, separators=(',', ':'))) for layer, levels in lines]
+    
+    def map_name(self):
+        """Variable name of the map, past any feature groups"""
+        element = self._parent
+        while element is not None and not isinstance(element, folium.Map):
+            element = element._parent
+        return (element or self._parent).get_name()
+
+class LiveTrainFeed:
+    """Per-session record of the train state last sent to the map, turned into deltas"""
+    
+    def __init__(self, feed_id='trains', fields=None, keyframe_interval=LIVE_KEYFRAME_INTERVAL,
+                 precision=GEOJSON_PRECISION):
+        self.feed_id = feed_id
+        self.fields = dict(fields or DEFAULT_LIVE_FIELDS)
+        self.keyframe_interval = keyframe_interval
+        self.precision = precision
+        self.snapshot = None
+        self.version = 0
+        self.ticks_since_keyframe = 0
+        # Resync requests for versions up to this one were answered by a keyframe
+        self.resynced_version = 0
+    
+    def needs_resync(self, request):
+        """
+        Whether the browser reported a delta it could not apply that no keyframe answered yet
+        
+        Args:
+            request (dict): 'live_resync' value from display_live_map, or None
+        
+        Returns:
+            bool: True when the next update should be a keyframe
+        """
+        
+        return (
+            isinstance(request, dict) and request.get('id') == self.feed_id
+            and int(request.get('at') or 0) > self.resynced_version
+        )
+    
+    def update(self, train_data, reset=False):
+        """
+        Diff the new train positions against the last state sent
+        
+        Args:
+            train_data (pd.DataFrame): Current train positions
+            reset (bool): Send the full fleet, e.g. after the map was remounted
+        
+        Returns:
+            dict: Delta payload for TrainDeltaLayer
+        """
+        
+        snapshot = train_snapshot(train_data, self.fields, self.precision)
+        
+        self.ticks_since_keyframe += 1
+        keyframe = (
+            reset or self.snapshot is None
+            or self.ticks_since_keyframe >= self.keyframe_interval
+            or not snapshot.columns.equals(self.snapshot.columns)
+        )
+        
+        changes = diff_train_positions(None if keyframe else self.snapshot, snapshot)
+        if keyframe:
+            self.ticks_since_keyframe = 0
+            self.resynced_version = self.version + 1
+        
+        payload = {
+            'id': self.feed_id,
+            'b': self.version,
+            'v': self.version + 1,
+            'r': keyframe,
+            'f': list(self.fields),
+            'a': _delta_rows(changes['added']),
+            'm': _delta_rows(changes['moved']),
+            'x': changes['removed']
+        }
+        
+        self.snapshot = snapshot
+        self.version += 1
+        return payload
+
+def train_feature_collection(train_data, precision=GEOJSON_PRECISION):
+    """
+    Encode trains as a compact GeoJSON FeatureCollection
+    
+    Property keys are single letters and station names are stored once in a
+    'stations' table that features reference by index.
+    
+    Args:
+        train_data (pd.DataFrame): DataFrame containing train information
+        precision (int): Decimal places kept for coordinates
+    
+    Returns:
+        dict: GeoJSON FeatureCollection with a shared 'stations' table
+    """
+    
+    columns = train_marker_columns(train_data)
+    
+    station_codes, stations = pd.factorize(pd.Series(
+        columns['origin'] + columns['destination'] + columns['current']
+    ))
+    n_trains = len(columns['lat'])
+    origin = station_codes[:n_trains].tolist()
+    destination = station_codes[n_trains:2 * n_trains].tolist()
+    current = station_codes[2 * n_trains:].tolist()
+    
+    lons = np.round(columns['lon'], precision).tolist()
+    lats = np.round(columns['lat'], precision).tolist()
+    
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': {'t': train, 'b': band, 'd': delay, 'p': platform, 'o': o, 'x': x, 'c': c}
+        }
+        for lon, lat, train, band, delay, platform, o, x, c in zip(
+            lons, lats, columns['train'], columns['band'], columns['delay'],
+            columns['platform'], origin, destination, current
+        )
+    ]
+    
+    return {'type': 'FeatureCollection', 'stations': stations.tolist(), 'features': features}
+
+def delay_bands(delays):
+    """
+    Classify delays into bands (0 on time, 1 slight delay, 2 delayed)
+    
+    Args:
+        delays (array-like): Delay in minutes per train
+    
+    Returns:
+        np.ndarray: Band index per train
+    """
+    
+    delays = np.asarray(delays, dtype=np.float64)
+    return np.select(
+        [delays <= DELAY_BAND_LIMITS[0], delays <= DELAY_BAND_LIMITS[1]],
+        [0, 1],
+        default=2
+    )
+
+def train_marker_columns(train_data):
+    """
+    Extract the per-train marker fields as plain column lists
+    
+    Args:
+        train_data (pd.DataFrame): DataFrame containing train information
+    
+    Returns:
+        dict: Column name to list of values, ready for JSON serialisation
+    """
+    
+    def text_column(name):
+        if name not in train_data.columns:
+            return ['N/A'] * len(train_data)
+        return train_data[name].astype(object).where(train_data[name].notna(), 'N/A').astype(str).tolist()
+    
+    def numeric_column(name, default):
+        if name not in train_data.columns:
+            return np.full(len(train_data), default, dtype=np.float64)
+        return pd.to_numeric(train_data[name], errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+    
+    delays = numeric_column('delay_minutes', 0)
+    
+    return {
+        'lat': numeric_column('lat', 19.0760).tolist(),
+        'lon': numeric_column('lon', 72.8777).tolist(),
+        'band': delay_bands(delays).tolist(),
+        'train': text_column('train_number'),
+        'origin': text_column('from_station'),
+        'destination': text_column('to_station'),
+        'current': text_column('current_station'),
+        'delay': text_column('delay_minutes') if 'delay_minutes' in train_data.columns else ['0'] * len(train_data),
+        'platform': text_column('platform')
+    }
+
+def train_snapshot(train_data, fields=None, precision=GEOJSON_PRECISION):
+    """
+    Per-train state as last shown on the map, indexed by train number
+    
+    Args:
+        train_data (pd.DataFrame): DataFrame containing train information
+        fields (dict): Popup label -> column; defaults to DEFAULT_LIVE_FIELDS
+        precision (int): Decimal places kept for coordinates
+    
+    Returns:
+        pd.DataFrame: Rounded lat/lon, delay band and popup values per train
+    """
+    
+    fields = DEFAULT_LIVE_FIELDS if fields is None else fields
+    
+    def numeric_column(name, default):
+        if name not in train_data.columns:
+            return np.full(len(train_data), default, dtype=np.float64)
+        return pd.to_numeric(train_data[name], errors='coerce').fillna(default).to_numpy(dtype=np.float64)
+    
+    def text_column(name):
+        if name not in train_data.columns:
+            return np.full(len(train_data), 'N/A', dtype=object)
+        values = train_data[name]
+        if values.hasnans:
+            values = values.astype(object).where(values.notna(), 'N/A')
+        return values.astype(str).to_numpy(dtype=object)
+    
+    if 'delay_band' in train_data.columns:
+        bands = numeric_column('delay_band', 0).astype(np.int64)
+    else:
+        bands = delay_bands(numeric_column('delay_minutes', 0))
+    
+    snapshot = pd.DataFrame({
+        'lat': np.round(numeric_column('lat', 19.0760), precision),
+        'lon': np.round(numeric_column('lon', 72.8777), precision),
+        'band': bands
+    }, index=pd.Index(text_column('train_number'), name='train_number'))
+    
+    for i, column in enumerate(fields.values()):
+        snapshot[f'field_{i}'] = text_column(column)
+    
+    # One marker per train; the latest row wins
+    return snapshot[~snapshot.index.duplicated(keep='last')]
+
+def diff_train_positions(previous, current):
+    """
+    Trains added, moved (position or details changed) and removed between snapshots
+    
+    Args:
+        previous (pd.DataFrame): Snapshot last sent, or None to send everything
+        current (pd.DataFrame): New snapshot from train_snapshot
+    
+    Returns:
+        dict: 'added' and 'moved' snapshot rows, 'removed' list of train numbers
+    """
+    
+    if previous is None:
+        return {'added': current, 'moved': current.iloc[:0], 'removed': []}
+    
+    # Row of each current train in the previous snapshot, -1 if new
+    position = previous.index.get_indexer(current.index)
+    known = position >= 0
+    
+    still_present = np.zeros(len(previous), dtype=bool)
+    still_present[position[known]] = True
+    
+    changed = np.zeros(len(current), dtype=bool)
+    for column in current.columns:
+        changed[known] |= current[column].to_numpy()[known] != previous[column].to_numpy()[position[known]]
+    
+    return {
+        'added': current[~known],
+        'moved': current[changed],
+        'removed': previous.index[~still_present].tolist()
+    }
+
+def _delta_rows(rows):
+    """Snapshot rows as the column arrays TrainDeltaLayer reads"""
+    field_columns = [c for c in rows.columns if c.startswith('field_')]
+    return {
+        't': rows.index.tolist(),
+        'lat': rows['lat'].tolist(),
+        'lon': rows['lon'].tolist(),
+        'b': rows['band'].tolist(),
+        'p': rows[field_columns].to_numpy().tolist()
+    }
+
+def static_map_layers(static_data):
+    """
+    Station markers and route polylines described by a static rail map
+    
+    Args:
+        static_data (dict): Static infrastructure data (see load_static_data)
+    
+    Returns:
+        tuple: (stations, railway_lines, line_names) ready for create_railway_map;
+            a route's own 'geometry' list of [lat, lon] is used over its station chain
+    """
+    
+    stations = [
+        {'name': s['name'], 'lat': s['lat'], 'lon': s['lon'], 'type': s.get('type', 'station')}
+        for s in static_data.get('stations', [])
+        if 'lat' in s and 'lon' in s
+    ]
+    coords = {s['id']: [s['lat'], s['lon']] for s in static_data.get('stations', []) if 'lat' in s and 'lon' in s}
+    
+    railway_lines = []
+    line_names = []
+    for route in static_data.get('routes', []):
+        line = route.get('geometry') or [
+            coords[station_id] for station_id in route.get('stations', []) if station_id in coords
+        ]
+        if len(line) >= 2:
+            railway_lines.append(line)
+            line_names.append(route.get('name', route.get('id', 'Route')))
+    
+    return stations, railway_lines, line_names
+
+def add_lod_polylines(parent, lines, zoom, window=LOD_ZOOM_WINDOW, min_zoom=LOD_MIN_ZOOM, max_zoom=LOD_MAX_ZOOM):
+    """
+    Add polylines whose level of detail follows the zoom, around the current zoom
+    
+    Each line is sent once, cut down to the detail of window zoom levels past
+    zoom, with every vertex tagged by the zoom it appears at; the browser
+    draws the vertices for its zoom. Zooming in past the window keeps the
+    finest level sent; rebuild the lines with the zoom st_folium returns to
+    send more detail.
+    
+    Args:
+        parent (folium.Map or folium.FeatureGroup): Map or overlay to add the lines to
+        lines (list): (coords, options) pairs; options are folium.PolyLine keyword arguments
+        zoom (int): Current map zoom, e.g. zoom_start or the zoom st_folium returned
+        window (int): Zoom levels either side of zoom given their own level of detail
+        min_zoom (int): Coarsest zoom ever given its own level of detail
+        max_zoom (int): Finest zoom ever given its own level of detail
+    
+    Returns:
+        folium.Map or folium.FeatureGroup: The parent
+    """
+    
+    min_zoom, max_zoom = lod_window(zoom, window, min_zoom, max_zoom)
+    
+    filtered = []
+    for coords, options in lines:
+        locations, levels = lod_levels(coords, min_zoom, max_zoom)
+        layer = folium.PolyLine(locations, **options).add_to(parent)
+        # Lines drawn in full at every zoom need no filtering
+        if any(levels):
+            filtered.append((layer, levels))
+    
+    if filtered:
+        ZoomDetailFilter(filtered).add_to(parent)
+    return parent
+
+def create_railway_map(center_lat=19.0760, center_lon=72.8777, zoom_start=9, static_data=None, detail_zoom=None):
     """
     Create a base railway map for Mumbai Division
     
@@ -12,6 +619,9 @@ def create_railway_map(center_lat=19.0760, center_lon=72.8777, zoom_start=9):
         center_lat (float): Center latitude for the map
         center_lon (float): Center longitude for the map
         zoom_start (int): Initial zoom level
+        static_data (dict): Optional static rail map to draw stations and routes from
+        detail_zoom (int): Single zoom level to simplify the route geometry for;
+            by default the levels of detail around zoom_start are emitted
     
     Returns:
         folium.Map: Base map object
@@ -24,18 +634,32 @@ def create_railway_map(center_lat=19.0760, center_lon=72.8777, zoom_start=9):
         tiles='OpenStreetMap'
     )
     
-    # Add railway stations
-    stations = [
-        {"name": "Mumbai Central", "lat": 19.0760, "lon": 72.8777, "type": "major"},
-        {"name": "Dadar", "lat": 19.0176, "lon": 72.8450, "type": "major"},
-        {"name": "Thane", "lat": 19.2183, "lon": 72.9781, "type": "major"},
-        {"name": "Kalyan", "lat": 19.2437, "lon": 73.1355, "type": "major"},
-        {"name": "Lonavala", "lat": 18.7484, "lon": 73.4066, "type": "junction"},
-        {"name": "Karjat", "lat": 18.9107, "lon": 73.3206, "type": "junction"},
-        {"name": "Igatpuri", "lat": 19.6961, "lon": 73.5613, "type": "junction"},
-        {"name": "Pune", "lat": 18.5204, "lon": 73.8567, "type": "terminal"},
-        {"name": "Nashik", "lat": 19.9975, "lon": 73.7898, "type": "terminal"}
-    ]
+    if static_data is not None:
+        stations, railway_lines, line_names = static_map_layers(static_data)
+    else:
+        # Add railway stations
+        stations = [
+            {"name": "Mumbai Central", "lat": 19.0760, "lon": 72.8777, "type": "major"},
+            {"name": "Dadar", "lat": 19.0176, "lon": 72.8450, "type": "major"},
+            {"name": "Thane", "lat": 19.2183, "lon": 72.9781, "type": "major"},
+            {"name": "Kalyan", "lat": 19.2437, "lon": 73.1355, "type": "major"},
+            {"name": "Lonavala", "lat": 18.7484, "lon": 73.4066, "type": "junction"},
+            {"name": "Karjat", "lat": 18.9107, "lon": 73.3206, "type": "junction"},
+            {"name": "Igatpuri", "lat": 19.6961, "lon": 73.5613, "type": "junction"},
+            {"name": "Pune", "lat": 18.5204, "lon": 73.8567, "type": "terminal"},
+            {"name": "Nashik", "lat": 19.9975, "lon": 73.7898, "type": "terminal"}
+        ]
+        
+        # Add railway lines (simplified representation)
+        railway_lines = [
+            # Mumbai-Pune line
+            [[19.0760, 72.8777], [18.7484, 73.4066], [18.5204, 73.8567]],
+            # Mumbai-Nashik line
+            [[19.0760, 72.8777], [19.6961, 73.5613], [19.9975, 73.7898]],
+            # Central line
+            [[19.0176, 72.8450], [19.2183, 72.9781], [19.2437, 73.1355]]
+        ]
+        line_names = ['Mumbai-Pune Route', 'Mumbai-Nashik Route', 'Central Line']
     
     # Add station markers
     for station in stations:
@@ -52,42 +676,238 @@ def create_railway_map(center_lat=19.0760, center_lon=72.8777, zoom_start=9):
             weight=2
         ).add_to(m)
     
-    # Add railway lines (simplified representation)
-    railway_lines = [
-        # Mumbai-Pune line
-        [[19.0760, 72.8777], [18.7484, 73.4066], [18.5204, 73.8567]],
-        # Mumbai-Nashik line
-        [[19.0760, 72.8777], [19.6961, 73.5613], [19.9975, 73.7898]],
-        # Central line
-        [[19.0176, 72.8450], [19.2183, 72.9781], [19.2437, 73.1355]]
+    colors = ['#2563eb', '#dc2626', '#16a34a']
+    
+    # Detailed track geometry is cut down to what is visible at the current zoom
+    route_styles = [
+        {'color': colors[i % len(colors)], 'weight': 4, 'opacity': 0.8, 'popup': line_names[i]}
+        for i in range(len(railway_lines))
     ]
+    if detail_zoom is None:
+        add_lod_polylines(m, list(zip(railway_lines, route_styles)), zoom_start)
+    else:
+        for line, style in zip(railway_lines, route_styles):
+            folium.PolyLine(locations=simplify_polyline(line, detail_zoom), **style).add_to(m)
     
-    colors = ['#2563eb', '#dc2626', '#16a34a']
-    line_names = ['Mumbai-Pune Route', 'Mumbai-Nashik Route', 'Central Line']
+    return m
+
+@st.cache_resource(show_spinner=False)
+def get_base_railway_map(static_data=None, center_lat=19.0760, center_lon=72.8777, zoom_start=9):
+    """
+    Static railway base map, built once per process and shared by all sessions
+    
+    The returned map must not be modified; draw trains and other live data on
+    an overlay from create_live_overlay and show both with display_live_map.
+    
+    Args:
+        static_data (dict): Optional static rail map to draw stations and routes from
+        center_lat (float): Center latitude for the map
+        center_lon (float): Center longitude for the map
+        zoom_start (int): Initial zoom level
+    
+    Returns:
+        folium.Map: Shared base map
+    """
+    
+    return prepare_base_map(create_railway_map(center_lat, center_lon, zoom_start, static_data=static_data))
+
+def prepare_base_map(base_map):
+    """
+    Settle a map that will be cached and shown with display_live_map
     
-    for i, line in enumerate(railway_lines):
+    Rendering attaches folium's layer hooks and generating the leaflet script
+    renames them; doing both once up front keeps the script identical for
+    every later st_folium call, so clients never remount the base map.
+    
+    Args:
+        base_map (folium.Map): Fully built static map
+    
+    Returns:
+        folium.Map: The same map, ready to be shared
+    """
+    
+    base_map.get_root().render()
+    generate_leaflet_string(base_map)
+    return base_map
+
+def create_live_overlay(train_data=None, track_sections=None, mode=None, name='Live Operations', detail_zoom=None):
+    """
+    Build the dynamic overlay of train positions and track section occupancy
+    
+    Args:
+        train_data (pd.DataFrame): Train positions (see add_train_markers)
+        track_sections (list): Optional dicts with 'name', 'coords' and 'status'
+        mode (str): Train marker mode passed to add_train_markers
+        name (str): Layer name
+        detail_zoom (int): Optional zoom level to simplify the section geometry for
+    
+    Returns:
+        folium.FeatureGroup: Overlay to pass to display_live_map
+    """
+    
+    overlay = folium.FeatureGroup(name=name)
+    
+    for section in track_sections or []:
+        color = 'red' if section.get('status') == 'occupied' else 'green'
+        coords = section['coords'] if detail_zoom is None else simplify_polyline(section['coords'], detail_zoom)
         folium.PolyLine(
-            locations=line,
-            color=colors[i],
-            weight=4,
+            coords,
+            color=color,
+            weight=3,
             opacity=0.8,
-            popup=line_names[i]
-        ).add_to(m)
+            popup=f"{section.get('name', 'Section')} - {section.get('status', 'unknown')}"
+        ).add_to(overlay)
     
-    return m
+    if train_data is not None and len(train_data):
+        add_train_markers(overlay, train_data, mode=mode)
+    
+    return overlay
+
+def display_live_map(base_map, overlay, key='live_map', **kwargs):
+    """
+    Show a cached base map with a live overlay
+    
+    The base map keeps the same key and script across reruns, so the browser
+    keeps it mounted and only the overlay is re-serialised and swapped in.
+    
+    Args:
+        base_map (folium.Map): Shared base map from get_base_railway_map
+        overlay (folium.FeatureGroup or list): Overlay(s) from create_live_overlay
+        key (str): Streamlit component key; must be stable across reruns
+        **kwargs: Extra arguments for st_folium (width, height, returned_objects, ...)
+    
+    Returns:
+        dict: Map interaction data returned by st_folium
+    """
+    
+    overlays = overlay if isinstance(overlay, list) else [overlay]
+    
+    # st_folium attaches overlays to the map it renders, so the shared base
+    # map is used by one session at a time and restored afterwards
+    with _BASE_MAP_LOCK:
+        try:
+            map_data = st_folium(base_map, key=key, feature_group_to_add=overlays, **kwargs)
+        finally:
+            for layer in overlays:
+                base_map._children.pop(layer.get_name(), None)
+    
+    # The browser now holds this base map under the key; a different base map
+    # is a different component, which mounts with no client state. st_folium
+    # renames every map it renders, so base maps are told apart by identity
+    st.session_state[f'{key}_mount'] = id(base_map)
+    
+    # Zoom the browser reported, for the levels of detail of the next overlay
+    if map_data and map_data.get('zoom') is not None:
+        st.session_state[f'{key}_zoom'] = map_data['zoom']
+    
+    # Delta the browser could not apply; the next add_live_train_updates sends a keyframe
+    if map_data and map_data.get('live_resync') is not None:
+        st.session_state[f'{key}_resync'] = map_data['live_resync']
+    
+    return map_data
 
-def add_train_markers(map_obj, train_data):
+def live_map_zoom(key='live_map', default=None):
+    """
+    Zoom the map shown under this key last reported
+    
+    Args:
+        key (str): Key passed to display_live_map
+        default (int): Zoom to use before the map has reported one, e.g. its zoom_start
+    
+    Returns:
+        int: Current zoom of the map
+    """
+    
+    return st.session_state.get(f'{key}_zoom', default)
+
+def release_live_map(key='live_map'):
+    """
+    Forget that the map shown under this key is mounted
+    
+    Call from the page body, which only runs on full reruns (first load,
+    returning from another page); fragment reruns keep the map mounted.
+    
+    Args:
+        key (str): Key passed to display_live_map
+    """
+    
+    st.session_state.pop(f'{key}_mount', None)
+
+def live_map_mounted(key='live_map', base_map=None):
+    """
+    Whether the map shown under this key is still mounted with its client state
+    
+    Args:
+        key (str): Key passed to display_live_map
+        base_map (folium.Map): Base map about to be shown; a different one remounts the map
+    
+    Returns:
+        bool: False on the first render, after release_live_map and when the base map changes
+    """
+    
+    mounted = st.session_state.get(f'{key}_mount')
+    return mounted is not None and (base_map is None or mounted == id(base_map))
+
+def add_live_train_updates(overlay, train_data, key='live_map', fields=None, base_map=None):
+    """
+    Add only the train changes since this session's last refresh to an overlay
+    
+    The full fleet is sent on the first render, after the map was remounted,
+    when the browser reported a delta it could not apply and every
+    LIVE_KEYFRAME_INTERVAL refreshes; otherwise the payload holds just the
+    added, moved and removed trains.
+    
+    Args:
+        overlay (folium.FeatureGroup): Overlay from create_live_overlay
+        train_data (pd.DataFrame): Current train positions
+        key (str): Key of the display_live_map call that shows the overlay
+        fields (dict): Popup label -> column; defaults to DEFAULT_LIVE_FIELDS
+        base_map (folium.Map): Base map the overlay will be shown on
+    
+    Returns:
+        dict: The delta payload that was added
+    """
+    
+    feed_key = f'{key}_train_feed'
+    feed = st.session_state.get(feed_key)
+    if feed is None or (fields is not None and feed.fields != dict(fields)):
+        feed = st.session_state[feed_key] = LiveTrainFeed(feed_id=key, fields=fields)
+    
+    reset = not live_map_mounted(key, base_map) or feed.needs_resync(st.session_state.get(f'{key}_resync'))
+    payload = feed.update(train_data, reset=reset)
+    TrainDeltaLayer(payload).add_to(overlay)
+    return payload
+
+def add_train_markers(map_obj, train_data, mode=None):
     """
     Add train position markers to the map
     
     Args:
         map_obj (folium.Map): Map object to add markers to
         train_data (pd.DataFrame): DataFrame containing train information
+        mode (str): 'markers' for one folium.Marker per train, 'bulk' to build the
+            markers in the browser from column arrays, or 'geojson' for a single
+            FeatureCollection of circle markers. Defaults to 'bulk' above
+            BULK_MARKER_THRESHOLD trains and 'markers' otherwise.
     
     Returns:
         folium.Map: Updated map with train markers
     """
     
+    if mode is None:
+        mode = 'bulk' if len(train_data) > BULK_MARKER_THRESHOLD else 'markers'
+    
+    if mode == 'bulk':
+        TrainMarkerLayer(train_marker_columns(train_data)).add_to(map_obj)
+        return map_obj
+    
+    if mode == 'geojson':
+        TrainGeoJsonLayer(train_feature_collection(train_data)).add_to(map_obj)
+        return map_obj
+    
+    if mode != 'markers':
+        raise ValueError(f"Unsupported marker mode: {mode}")
+    
     for _, train in train_data.iterrows():
         # Determine marker color based on delay
         if train.get('delay_minutes', 0) <= 5:
@@ -125,7 +945,7 @@ def add_train_markers(map_obj, train_data):
     
     return map_obj
 
-def create_route_visualization(start_coords, end_coords, waypoints=None):
+def create_route_visualization(start_coords, end_coords, waypoints=None, geometry=None, zoom_start=8):
     """
     Create a route visualization between two points
     
@@ -133,6 +953,9 @@ def create_route_visualization(start_coords, end_coords, waypoints=None):
         start_coords (tuple): Starting coordinates (lat, lon)
         end_coords (tuple): Ending coordinates (lat, lon)
         waypoints (list): Optional list of waypoint coordinates
+        geometry (list): Optional detailed track geometry to draw instead of
+            straight legs between the waypoints
+        zoom_start (int): Initial zoom level
     
     Returns:
         folium.Map: Map with route visualization
@@ -145,7 +968,7 @@ def create_route_visualization(start_coords, end_coords, waypoints=None):
     # Create map
     m = folium.Map(
         location=[center_lat, center_lon],
-        zoom_start=8
+        zoom_start=zoom_start
     )
     
     # Add start and end markers
@@ -162,18 +985,17 @@ def create_route_visualization(start_coords, end_coords, waypoints=None):
     ).add_to(m)
     
     # Create route line
-    route_coords = [start_coords]
-    if waypoints:
-        route_coords.extend(waypoints)
-    route_coords.append(end_coords)
-    
-    folium.PolyLine(
-        locations=route_coords,
-        color='blue',
-        weight=6,
-        opacity=0.8,
-        popup="Recommended Route"
-    ).add_to(m)
+    if geometry is not None:
+        route_coords = list(geometry)
+    else:
+        route_coords = [start_coords]
+        if waypoints:
+            route_coords.extend(waypoints)
+        route_coords.append(end_coords)
+    
+    add_lod_polylines(
+        m, [(route_coords, {'color': 'blue', 'weight': 6, 'opacity': 0.8, 'popup': "Recommended Route"})], zoom_start
+    )
     
     # Add waypoint markers if provided
     if waypoints:
@@ -189,35 +1011,65 @@ def create_route_visualization(start_coords, end_coords, waypoints=None):
     
     return m
 
-def add_heatmap_layer(map_obj, data_points, intensity_column='intensity'):
+def add_heatmap_layer(map_obj, data_points, intensity_column='intensity', zoom=None, bounds=None,
+                      max_cells=HEATMAP_MAX_CELLS):
     """
     Add a heatmap layer to show traffic density or other metrics
     
+    Up to HEATMAP_RAW_POINT_LIMIT points are sent as they are. Larger datasets,
+    or any call with a zoom level, are binned server-side into a cached grid
+    and only the cells for that zoom (and viewport) are sent.
+    
     Args:
         map_obj (folium.Map): Map object to add heatmap to
         data_points (pd.DataFrame): DataFrame with lat, lon, and intensity columns
         intensity_column (str): Column name for intensity values
+        zoom (int): Zoom level to aggregate for; defaults to the map's zoom
+        bounds (list or dict): Optional viewport to clip cells to (see HeatmapGrid.cells)
+        max_cells (int): Upper bound on the cells sent
     
     Returns:
         folium.Map: Updated map with heatmap layer
     """
     
-    # Prepare heatmap data
-    heat_data = []
-    for _, point in data_points.iterrows():
-        heat_data.append([
-            point.get('lat', 0),
-            point.get('lon', 0), 
-            point.get(intensity_column, 1)
-        ])
+    n_points = len(data_points)
+    
+    if zoom is None and n_points <= HEATMAP_RAW_POINT_LIMIT:
+        # Prepare heatmap data straight from the columns
+        heat_data = np.column_stack([
+            data_points['lat'].to_numpy(dtype=np.float64) if 'lat' in data_points.columns else np.zeros(n_points),
+            data_points['lon'].to_numpy(dtype=np.float64) if 'lon' in data_points.columns else np.zeros(n_points),
+            data_points[intensity_column].to_numpy(dtype=np.float64) if intensity_column in data_points.columns else np.ones(n_points)
+        ]).tolist()
+        max_zoom = 18
+        radius = 25
+        blur = 15
+    else:
+        if zoom is None:
+            zoom = getattr(map_obj, 'options', {}).get('zoom', 9)
+        
+        cells = build_heatmap_grid(data_points, intensity_column).cells(zoom, bounds, max_cells)
+        weight = cells['weight'].to_numpy()
+        peak = weight.max() if len(weight) else 1.0
+        
+        heat_data = np.column_stack([
+            cells['lat'].to_numpy(),
+            cells['lon'].to_numpy(),
+            weight / (peak if peak > 0 else 1.0)
+        ]).tolist()
+        
+        # Cells are CELLS_PER_TILE to a tile, so about 16 px wide at their zoom
+        max_zoom = int(cells['zoom'].iloc[0]) if len(cells) else zoom
+        radius = 256 // CELLS_PER_TILE
+        blur = radius * 3 // 4
     
     # Add heatmap layer
     plugins.HeatMap(
         heat_data,
         min_opacity=0.2,
-        max_zoom=18,
-        radius=25,
-        blur=15,
+        max_zoom=max_zoom,
+        radius=radius,
+        blur=blur,
         gradient={
             0.4: 'blue',
             0.65: 'lime', 
@@ -227,10 +1079,49 @@ def add_heatmap_layer(map_obj, data_points, intensity_column='intensity'):
     
     return map_obj
 
+def add_heat_tile_layer(map_obj, partition, layer='traffic', opacity=0.8, name=None):
+    """
+    Add pre-rendered historical heat tiles as a tile layer
+    
+    Tiles come from the local tile store (see components.heat_tiles) and are
+    served by Streamlit itself, so no points and no external tile service are
+    involved.
+    
+    Args:
+        map_obj (folium.Map): Map object to add the layer to
+        partition (str): Date partition to show ('YYYY-MM-DD')
+        layer (str): Heat layer name
+        opacity (float): Layer opacity
+        name (str): Optional layer name for layer controls
+    
+    Returns:
+        folium.Map: Updated map with the heat tile layer
+    """
+    
+    store = get_heat_tile_store(layer)
+    
+    folium.TileLayer(
+        tiles=store.tile_url(partition),
+        attr='PRAGATI AI traffic history',
+        name=name or f"Traffic density {partition}",
+        overlay=True,
+        control=True,
+        opacity=opacity,
+        min_zoom=store.min_zoom,
+        max_native_zoom=store.max_zoom,
+        max_zoom=18
+    ).add_to(map_obj)
+    
+    return map_obj
+
 def create_network_topology_map(stations_df, connections_df):
     """
     Create a network topology visualization of railway connections
     
+    Stations are drawn as one GeoJSON layer of circle markers and connections
+    as one GeoJSON layer of lines, with endpoints joined through a name index,
+    so zonal networks with thousands of stations and links render in seconds.
+    
     Args:
         stations_df (pd.DataFrame): DataFrame with station information
         connections_df (pd.DataFrame): DataFrame with connection information
@@ -249,32 +1140,77 @@ def create_network_topology_map(stations_df, connections_df):
         zoom_start=8
     )
     
+    # Name -> coordinate index; the first station wins for duplicate names
+    station_index = stations_df.drop_duplicates('name').set_index('name')[['lat', 'lon']]
+    
+    # Join both ends of every connection in one lookup each
+    start = station_index.reindex(connections_df['from_station'].to_numpy()).to_numpy(dtype=np.float64)
+    end = station_index.reindex(connections_df['to_station'].to_numpy()).to_numpy(dtype=np.float64)
+    
+    # Connections to unknown stations cannot be drawn
+    valid = np.isfinite(start).all(axis=1) & np.isfinite(end).all(axis=1)
+    
+    # Add connection lines as a single GeoJSON layer; each line keeps its own
+    # popup and tooltip naming the stations it joins
+    if valid.any():
+        links = {
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {'type': 'LineString', 'coordinates': [[lon0, lat0], [lon1, lat1]]},
+                    'properties': {'connection': f"{origin} - {destination}"}
+                }
+                for origin, destination, (lat0, lon0), (lat1, lon1) in zip(
+                    connections_df['from_station'].to_numpy()[valid].tolist(),
+                    connections_df['to_station'].to_numpy()[valid].tolist(),
+                    start[valid].tolist(),
+                    end[valid].tolist()
+                )
+            ]
+        }
+        
+        folium.GeoJson(
+            links,
+            name='Connections',
+            style_function=lambda feature: {'color': 'red', 'weight': 3, 'opacity': 0.6},
+            popup=folium.GeoJsonPopup(fields=['connection'], labels=False),
+            tooltip=folium.GeoJsonTooltip(fields=['connection'], labels=False)
+        ).add_to(m)
+    
     # Add station nodes
-    for _, station in stations_df.iterrows():
-        folium.CircleMarker(
-            location=[station['lat'], station['lon']],
+    connections = (
+        pd.to_numeric(stations_df['connections'], errors='coerce').fillna(0).astype(int).tolist()
+        if 'connections' in stations_df.columns else [0] * len(stations_df)
+    )
+    nodes = {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': {'name': name, 'connections': count}
+            }
+            for name, lat, lon, count in zip(
+                stations_df['name'].astype(str).tolist(),
+                stations_df['lat'].astype(float).tolist(),
+                stations_df['lon'].astype(float).tolist(),
+                connections
+            )
+        ]
+    }
+    
+    folium.GeoJson(
+        nodes,
+        name='Stations',
+        marker=folium.CircleMarker(
             radius=10,
-            popup=f"<b>{station['name']}</b><br>Connections: {station.get('connections', 0)}",
             color='darkblue',
-            fillColor='lightblue',
-            fillOpacity=0.7,
+            fill_color='lightblue',
+            fill_opacity=0.7,
             weight=2
-        ).add_to(m)
-    
-    # Add connection lines
-    for _, connection in connections_df.iterrows():
-        start_station = stations_df[stations_df['name'] == connection['from_station']].iloc[0]
-        end_station = stations_df[stations_df['name'] == connection['to_station']].iloc[0]
-        
-        folium.PolyLine(
-            locations=[
-                [start_station['lat'], start_station['lon']],
-                [end_station['lat'], end_station['lon']]
-            ],
-            color='red',
-            weight=3,
-            opacity=0.6,
-            popup=f"{connection['from_station']} - {connection['to_station']}"
-        ).add_to(m)
+        ),
+        popup=folium.GeoJsonPopup(fields=['name', 'connections'], aliases=['Station', 'Connections'])
+    ).add_to(m)
     
     return m
\ No newline at end of file
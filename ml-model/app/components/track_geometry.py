@@ -0,0 +1,211 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from .heatmap_grid import project
+
+TILE_SIZE = 256
+
+# Simplified lines may deviate from the real track by up to this many
+# screen pixels at the zoom they were simplified for
+TOLERANCE_PIXELS = 1.0
+
+# Zoom range covered by levels of detail; zooming out further keeps the
+# coarsest level, zooming in further the finest
+LOD_MIN_ZOOM = 5
+LOD_MAX_ZOOM = 18
+
+# Zoom levels either side of the current zoom sent with a map; finer levels
+# follow once the map reports a new zoom
+LOD_ZOOM_WINDOW = 2
+
+# Simplified lines kept in memory, keyed by their coordinates
+MAX_CACHED_LINES = 512
+
+_LINE_CACHE = OrderedDict()
+_LINE_CACHE_LOCK = threading.Lock()
+
+def douglas_peucker_importance(x, y):
+    """
+    Douglas-Peucker split distance of every vertex, computed for all open segments at once
+
+    A vertex is kept by Douglas-Peucker at tolerance t exactly when its
+    importance is at least t, so one pass serves every zoom level.
+
+    Args:
+        x (np.ndarray): Vertex x coordinates
+        y (np.ndarray): Vertex y coordinates
+
+    Returns:
+        np.ndarray: Importance per vertex; the end points are always infinite
+    """
+
+    n = len(x)
+    importance = np.zeros(n)
+    if n == 0:
+        return importance
+    importance[[0, -1]] = np.inf
+
+    start = np.array([0])
+    end = np.array([n - 1])
+    cap = np.array([np.inf])
+
+    while len(start):
+        lengths = end - start - 1
+        open_segments = lengths > 0
+        start, end, cap, lengths = start[open_segments], end[open_segments], cap[open_segments], lengths[open_segments]
+        if not len(start):
+            break
+
+        # Interior vertices of every open segment, laid out segment by segment
+        offsets = np.cumsum(lengths) - lengths
+        segment = np.repeat(np.arange(len(start)), lengths)
+        index = np.repeat(start + 1, lengths) + np.arange(lengths.sum()) - np.repeat(offsets, lengths)
+
+        ax, ay = x[start][segment], y[start][segment]
+        dx, dy = x[end][segment] - ax, y[end][segment] - ay
+        chord = np.hypot(dx, dy)
+        px, py = x[index] - ax, y[index] - ay
+        distance = np.where(
+            chord > 0,
+            np.abs(px * dy - py * dx) / np.where(chord > 0, chord, 1.0),
+            np.hypot(px, py)
+        )
+
+        # Farthest vertex of each segment splits it in two
+        farthest = np.maximum.reduceat(distance, offsets)
+        candidates = np.flatnonzero(distance == farthest[segment])
+        _, first = np.unique(segment[candidates], return_index=True)
+        split = index[candidates[first]]
+
+        # A vertex is never more important than the one that opened its segment
+        value = np.minimum(farthest, cap)
+        importance[split] = value
+
+        start, end, cap = np.concatenate([start, split]), np.concatenate([split, end]), np.concatenate([value, value])
+
+    return importance
+
+def zoom_tolerance(zoom, tolerance_pixels=TOLERANCE_PIXELS):
+    """Tolerance in normalised Web Mercator units for a pixel tolerance at a zoom level"""
+    return tolerance_pixels / (TILE_SIZE * 2.0 ** zoom)
+
+class SimplifiedLine:
+    """Polyline that can be emitted at the level of detail of any zoom"""
+
+    def __init__(self, coords):
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.coords = coords[np.isfinite(coords).all(axis=1)]
+        x, y = project(self.coords[:, 0], self.coords[:, 1])
+        self.importance = douglas_peucker_importance(x, y)
+
+    def at_zoom(self, zoom, tolerance_pixels=TOLERANCE_PIXELS):
+        """
+        Vertices to draw at a zoom level
+
+        Args:
+            zoom (float): Map zoom level
+            tolerance_pixels (float): Allowed deviation from the full line on screen
+
+        Returns:
+            list: [lat, lon] pairs
+        """
+
+        keep = self.importance >= zoom_tolerance(zoom, tolerance_pixels)
+        return self.coords[keep].tolist()
+
+def get_simplified_line(coords):
+    """
+    Simplification index for a polyline, cached by its coordinates
+
+    Args:
+        coords (list or np.ndarray): [lat, lon] pairs
+
+    Returns:
+        SimplifiedLine: Line ready for at_zoom
+    """
+
+    coords = np.ascontiguousarray(coords, dtype=np.float64)
+    key = hashlib.blake2b(coords.tobytes(), digest_size=16).hexdigest()
+
+    with _LINE_CACHE_LOCK:
+        line = _LINE_CACHE.get(key)
+        if line is not None:
+            _LINE_CACHE.move_to_end(key)
+            return line
+
+    line = SimplifiedLine(coords)
+
+    with _LINE_CACHE_LOCK:
+        _LINE_CACHE[key] = line
+        while len(_LINE_CACHE) > MAX_CACHED_LINES:
+            _LINE_CACHE.popitem(last=False)
+
+    return line
+
+def simplify_polyline(coords, zoom, tolerance_pixels=TOLERANCE_PIXELS):
+    """
+    Level-of-detail version of a polyline for a zoom level
+
+    Args:
+        coords (list): [lat, lon] pairs of the full line
+        zoom (float): Map zoom level the line is drawn for
+        tolerance_pixels (float): Allowed deviation from the full line on screen
+
+    Returns:
+        list: [lat, lon] pairs; short lines are returned unchanged
+    """
+
+    if len(coords) <= 2:
+        return [list(point) for point in coords]
+    return get_simplified_line(coords).at_zoom(zoom, tolerance_pixels)
+
+def lod_window(zoom, window=LOD_ZOOM_WINDOW, min_zoom=LOD_MIN_ZOOM, max_zoom=LOD_MAX_ZOOM):
+    """
+    Zoom range given its own level of detail around the current zoom
+
+    Args:
+        zoom (int): Current map zoom
+        window (int): Zoom levels either side of it
+        min_zoom (int): Coarsest zoom ever given its own level of detail
+        max_zoom (int): Finest zoom ever given its own level of detail
+
+    Returns:
+        tuple: (min_zoom, max_zoom) for lod_levels
+    """
+
+    zoom = min(max(int(round(zoom)), min_zoom), max_zoom)
+    return max(zoom - window, min_zoom), min(zoom + window, max_zoom)
+
+def lod_levels(coords, min_zoom=LOD_MIN_ZOOM, max_zoom=LOD_MAX_ZOOM, tolerance_pixels=TOLERANCE_PIXELS):
+    """
+    Vertices of a polyline at max_zoom's level of detail, tagged with the zoom each appears at
+
+    Drawing the vertices tagged at or below the current zoom gives that
+    zoom's level of detail, so one copy of the line serves every zoom in the
+    range. Zooming out past min_zoom keeps its level, zooming in past
+    max_zoom keeps max_zoom's.
+
+    Args:
+        coords (list): [lat, lon] pairs of the full line
+        min_zoom (int): Coarsest zoom given its own level of detail
+        max_zoom (int): Finest zoom given its own level of detail
+        tolerance_pixels (float): Allowed deviation from the full line on screen
+
+    Returns:
+        tuple: ([lat, lon] pairs, zoom per vertex); vertices drawn at every zoom are tagged 0
+    """
+
+    if len(coords) <= 2:
+        return [list(point) for point in coords], [0] * len(coords)
+
+    line = get_simplified_line(coords)
+    levels = np.full(len(line.coords), -1, dtype=np.int64)
+    # Coarser zooms keep a subset of the vertices, so the last tag written is the first zoom showing them
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        levels[line.importance >= zoom_tolerance(zoom, tolerance_pixels)] = zoom
+    levels[levels == min_zoom] = 0
+
+    keep = levels >= 0
+    return line.coords[keep].tolist(), levels[keep].tolist()
@@ -7,6 +7,16 @@ from .prediction_engine import (
     run_simulation,
     optimize_route
 )
+from .delay_propagation import build_dependency_graph, simulate_delay_propagation
+from .simulation_jobs import get_job_manager
+from .trajectory_playback import build_trajectory_playback
+from .kpi_engine import KPIEngine, compute_kpis
+from .kpi_aggregates import get_kpi_aggregator
+from .quantile_sketch import TDigest, merge_sketches
+from .movement_cube import get_movement_cube
+from .alert_pipeline import AlertPipeline, get_alert_pipeline
+from .rul_forecaster import RULForecaster
+from .maintenance_scheduler import schedule_maintenance
 
 __all__ = [
     'load_movement_data',
@@ -16,5 +26,19 @@ __all__ = [
     'predict_maintenance',
     'detect_anomalies',
     'run_simulation',
-    'optimize_route'
+    'optimize_route',
+    'build_dependency_graph',
+    'simulate_delay_propagation',
+    'get_job_manager',
+    'build_trajectory_playback',
+    'KPIEngine',
+    'compute_kpis',
+    'get_kpi_aggregator',
+    'TDigest',
+    'merge_sketches',
+    'get_movement_cube',
+    'AlertPipeline',
+    'get_alert_pipeline',
+    'RULForecaster',
+    'schedule_maintenance'
 ]
\ No newline at end of file
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import OrderedDict, deque
+import numpy as np
+import streamlit as st
+
+# Repeats of the same (asset, sensor, type) alert within this window are
+# folded into the alert already raised instead of raising a new one
+DEFAULT_DEDUP_WINDOW_SECONDS = 300
+
+# Alerts raised per asset within the rate window; further ones are suppressed
+DEFAULT_RATE_LIMIT = 5
+DEFAULT_RATE_WINDOW_SECONDS = 60
+
+# Raised alerts kept for display, newest last
+DEFAULT_HISTORY_SIZE = 500
+
+# Dedup keys and assets tracked; the least recently seen are forgotten first
+MAX_TRACKED_KEYS = 4096
+MAX_TRACKED_ASSETS = 1024
+
+# Severity ranks; a repeat with a more urgent severity is raised again
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2, 'critical': 3}
+
+# Alerts at or above this rank are never rate-limited and do not use up
+# their asset's rate limit
+URGENT_RANK = SEVERITY_RANK['high']
+
+# Alert fields tried in order for each part of the dedup key; anomalies carry
+# asset/sensor/type, conflict predictions location/conflict_type
+KEY_FIELDS = {
+    'asset': ('asset', 'asset_id', 'location'),
+    'sensor': ('sensor',),
+    'type': ('type', 'conflict_type')
+}
+
+
+def alert_key(alert):
+    """
+    Dedup key of an alert
+
+    Args:
+        alert (dict): Alert from detect_anomalies or predict_conflicts
+
+    Returns:
+        tuple: (asset, sensor, type), with None for parts the alert lacks
+    """
+
+    return tuple(
+        next((alert[field] for field in fields if alert.get(field) is not None), None)
+        for fields in KEY_FIELDS.values()
+    )
+
+
+def _rank(severity):
+    return SEVERITY_RANK.get(str(severity).lower(), 0)
+
+
+class AlertPipeline:
+    """Deduplicating, rate-limiting stage between alert sources and the alert panels"""
+
+    def __init__(self, dedup_window_seconds=DEFAULT_DEDUP_WINDOW_SECONDS, rate_limit=DEFAULT_RATE_LIMIT,
+                 rate_window_seconds=DEFAULT_RATE_WINDOW_SECONDS, history_size=DEFAULT_HISTORY_SIZE):
+        self.dedup_window = dedup_window_seconds
+        self.rate_limit = max(int(rate_limit), 1)
+        self.rate_window = rate_window_seconds
+
+        # key -> alert raised for it, which later repeats update in place
+        self._open = OrderedDict()
+
+        # asset -> [ring of the last rate_limit raise times, next slot, suppressed count]
+        self._raise_times = OrderedDict()
+
+        self.history = deque(maxlen=history_size)
+        self.stats = {'received': 0, 'raised': 0, 'coalesced': 0, 'suppressed': 0}
+        self._lock = threading.Lock()
+
+    def process(self, alerts, now=None):
+        """
+        Pass a batch of alerts through deduplication and rate limiting
+
+        A repeat of an open alert (same key, within the dedup window, not more
+        severe) increments its 'occurrences' and refreshes its values. New alerts
+        are raised unless their asset already raised rate_limit alerts within
+        the rate window, in which case they are counted as suppressed for the
+        asset. High and critical alerts are always raised.
+
+        Args:
+            alerts (list): Alert dicts
+            now (float): Processing time in seconds; defaults to time.time()
+
+        Returns:
+            list: Alerts raised by this batch, each with occurrences, first_seen and last_seen
+        """
+
+        now = time.time() if now is None else float(now)
+        raised = []
+
+        with self._lock:
+            for alert in alerts:
+                self.stats['received'] += 1
+                key = alert_key(alert)
+
+                current = self._open.get(key)
+                if current is not None and now - current['first_seen'] <= self.dedup_window \
+                        and _rank(alert.get('severity')) <= _rank(current.get('severity')):
+                    # Coalesce: the open alert shows the latest reading and a counter
+                    severity = current.get('severity')
+                    current.update(alert)
+                    current['severity'] = severity
+                    current['occurrences'] += 1
+                    current['last_seen'] = now
+                    self._open.move_to_end(key)
+                    self.stats['coalesced'] += 1
+                    continue
+
+                if _rank(alert.get('severity')) < URGENT_RANK and not self._take_slot(key[0], now):
+                    self.stats['suppressed'] += 1
+                    continue
+
+                entry = {**alert, 'occurrences': 1, 'first_seen': now, 'last_seen': now}
+                self._open[key] = entry
+                self._open.move_to_end(key)
+                while len(self._open) > MAX_TRACKED_KEYS:
+                    self._open.popitem(last=False)
+
+                self.history.append(entry)
+                raised.append(entry)
+                self.stats['raised'] += 1
+
+        return raised
+
+    def _take_slot(self, asset, now):
+        """Record a raise for the asset if it is under its rate limit"""
+        state = self._raise_times.get(asset)
+        if state is None:
+            state = [np.full(self.rate_limit, -np.inf), 0, 0]
+            self._raise_times[asset] = state
+            while len(self._raise_times) > MAX_TRACKED_ASSETS:
+                self._raise_times.popitem(last=False)
+        self._raise_times.move_to_end(asset)
+
+        # The slot about to be overwritten holds the oldest of the last
+        # rate_limit raises; if it is still inside the window, the limit is reached
+        ring, slot = state[0], state[1]
+        if now - ring[slot] < self.rate_window:
+            state[2] += 1
+            return False
+        ring[slot] = now
+        state[1] = (slot + 1) % self.rate_limit
+        return True
+
+    def recent(self, asset=None, limit=None):
+        """
+        Raised alerts still in the history, oldest first
+
+        Args:
+            asset (str): Optional asset to filter on (matched against the key's asset)
+            limit (int): Optional number of most recent alerts to return
+
+        Returns:
+            list: Alert dicts, coalesced counters included
+        """
+
+        with self._lock:
+            alerts = [alert for alert in self.history if asset is None or alert_key(alert)[0] == asset]
+        return alerts if limit is None else alerts[-limit:]
+
+    def suppressed(self, asset=None):
+        """
+        Alerts suppressed by the rate limit
+
+        Args:
+            asset (str): Optional asset; all tracked assets are summed when None
+
+        Returns:
+            int: Number of suppressed alerts
+        """
+
+        with self._lock:
+            if asset is None:
+                return sum(state[2] for state in self._raise_times.values())
+            state = self._raise_times.get(asset)
+            return 0 if state is None else state[2]
+
+    def get_stats(self):
+        """
+        Counters since the pipeline was created
+
+        Returns:
+            dict: received, raised, coalesced and suppressed alerts, plus open keys
+        """
+
+        with self._lock:
+            return {**self.stats, 'open': len(self._open)}
+
+
+@st.cache_resource(show_spinner=False)
+def get_alert_pipeline():
+    """
+    Process-wide alert pipeline shared by all sessions
+
+    Returns:
+        AlertPipeline: Pipeline with the default window and rate settings
+    """
+
+    return AlertPipeline()
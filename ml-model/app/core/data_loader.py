@@ -122,6 +122,36 @@ def generate_sample_movement_data():
     
     return pd.DataFrame(movement_data)
 
+def generate_sample_asset_data(n_assets=30, seed=None):
+    """
+    Generate sample asset condition data
+    
+    Args:
+        n_assets (int): Number of assets to generate
+        seed (int or np.random.Generator): Optional seed for reproducible data
+    
+    Returns:
+        pd.DataFrame: Sample asset data
+    """
+    
+    rng = np.random.default_rng(seed)
+    
+    asset_types = np.array(["Locomotive", "Track", "Signal", "Switch", "Bridge"], dtype=object)
+    prefixes = np.array(["LOC", "TRA", "SIG", "SWI", "BRI"], dtype=object)
+    type_codes = rng.integers(0, len(asset_types), n_assets)
+    
+    serials = pd.Series(np.arange(1, n_assets + 1)).astype(str).str.zfill(3)
+    kilometres = pd.Series(rng.integers(10, 201, n_assets)).astype(str)
+    
+    return pd.DataFrame({
+        'asset_id': prefixes[type_codes] + '-' + serials.to_numpy(dtype=object),
+        'asset_type': asset_types[type_codes],
+        'health_score': np.round(rng.uniform(60, 98, n_assets), 1),
+        'age_years': np.round(rng.uniform(0, 40, n_assets), 1),
+        'usage_intensity': np.round(rng.uniform(0.3, 1.2, n_assets), 2),
+        'location': 'KM ' + kilometres.to_numpy(dtype=object)
+    })
+
 def generate_sample_static_data():
     """
     Generate sample static infrastructure data
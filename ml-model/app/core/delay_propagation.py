@@ -0,0 +1,355 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Minimum separation (minutes) between two trains using the same resource.
+# Any scheduled gap above this is slack that absorbs an incoming delay.
+DEFAULT_HEADWAYS = {
+    'block': 5,
+    'crossing': 3,
+    'platform': 4,
+    'rake': 15
+}
+
+# Share of a train's own scheduled running time it can win back as recovery
+DEFAULT_RECOVERY_FRACTION = 0.1
+
+
+class PropagationResult:
+    """Per-movement delays after propagating one or more injected delays"""
+
+    def __init__(self, graph, delays, injections):
+        self.graph = graph
+        self.delays = delays
+        self.injections = injections
+
+    @property
+    def impact(self):
+        """Additional delay (minutes) per movement compared to the baseline"""
+        return np.maximum(self.delays - self.graph.baseline_delays, 0)
+
+    def affected_trains(self, min_impact=0.5):
+        """
+        Summarise the propagated delay per train
+
+        Args:
+            min_impact (float): Minimum additional delay (minutes) to report a train
+
+        Returns:
+            pd.DataFrame: One row per affected train, worst impact first
+        """
+
+        graph = self.graph
+        n_trains = len(graph.train_labels)
+
+        original = np.full(n_trains, -np.inf)
+        new = np.full(n_trains, -np.inf)
+        np.maximum.at(original, graph.train_codes, graph.baseline_delays)
+        np.maximum.at(new, graph.train_codes, self.delays)
+
+        impact = new - original
+        mask = impact >= min_impact
+
+        summary = pd.DataFrame({
+            'train_number': graph.train_labels[mask],
+            'original_delay': np.round(original[mask], 1),
+            'new_delay': np.round(new[mask], 1),
+            'impact': np.round(impact[mask], 1)
+        })
+
+        return summary.sort_values('impact', ascending=False, kind='stable').reset_index(drop=True)
+
+    def network_delay_timeline(self, freq_minutes=15):
+        """
+        Aggregate network delay into fixed time bins
+
+        Args:
+            freq_minutes (int): Width of each time bin in minutes
+
+        Returns:
+            pd.DataFrame: Baseline vs simulated network delay and cumulative affected trains
+        """
+
+        graph = self.graph
+        bins = (graph.sched_minutes // freq_minutes).astype(np.int64)
+        n_bins = bins.max() + 1 if len(bins) else 0
+
+        baseline = np.bincount(bins, weights=np.maximum(graph.baseline_delays, 0), minlength=n_bins)
+        simulated = np.bincount(bins, weights=np.maximum(self.delays, 0), minlength=n_bins)
+
+        # A train counts as affected from the first bin in which it picks up delay
+        affected = self.impact > 0
+        first_bin = np.full(len(graph.train_labels), n_bins)
+        np.minimum.at(first_bin, graph.train_codes[affected], bins[affected])
+        newly_affected = np.bincount(first_bin[first_bin < n_bins], minlength=n_bins)
+
+        return pd.DataFrame({
+            'time': graph.origin + pd.to_timedelta(np.arange(n_bins) * freq_minutes, unit='m'),
+            'baseline_network_delay': np.round(baseline, 1),
+            'simulated_network_delay': np.round(simulated, 1),
+            'trains_affected': np.cumsum(newly_affected)
+        })
+
+    def total_network_delay(self):
+        """Total positive delay (minutes) across all movements"""
+        return float(np.maximum(self.delays, 0).sum())
+
+
+class DelayPropagationGraph:
+    """Dependency DAG between train movements linked by shared infrastructure"""
+
+    def __init__(self, movement_data, headways=None, recovery_fraction=DEFAULT_RECOVERY_FRACTION):
+        self.headways = {**DEFAULT_HEADWAYS, **(headways or {})}
+        self.recovery_fraction = recovery_fraction
+
+        self._load_nodes(movement_data)
+        self._build_edges(movement_data)
+        self._assign_levels()
+
+        # Knock-on delays already implied by the recorded delays
+        self.baseline_delays = self._relax(self.base_delays.copy(), 0)
+
+    @property
+    def n_nodes(self):
+        return len(self.sched_minutes)
+
+    @property
+    def n_edges(self):
+        return len(self._edge_src)
+
+    def _load_nodes(self, df):
+        """Extract the per-movement arrays the propagation works on"""
+        time_column = 'scheduled_departure' if 'scheduled_departure' in df.columns else 'timestamp'
+        sched = pd.to_datetime(df[time_column]).to_numpy()
+
+        self.origin = pd.Timestamp(sched.min()) if len(sched) else pd.Timestamp.now()
+        self.sched_minutes = (sched - np.datetime64(self.origin)) / np.timedelta64(1, 'm')
+
+        if 'delay_minutes' in df.columns:
+            self.base_delays = df['delay_minutes'].fillna(0).to_numpy(dtype=np.float64)
+        else:
+            self.base_delays = np.zeros(len(df))
+
+        self.train_codes, self.train_labels = pd.factorize(df['train_number'].astype(str))
+        self.train_labels = np.asarray(self.train_labels)
+        self.stations = df['current_station'].astype(str).to_numpy()
+
+        # Strict scheduled order (ties broken by row order) keeps the graph acyclic
+        self._rank = np.empty(self.n_nodes, dtype=np.int64)
+        self._rank[np.argsort(self.sched_minutes, kind='stable')] = np.arange(self.n_nodes)
+
+    def _chain(self, keys, valid):
+        """Link consecutive movements (in scheduled order) sharing the same key"""
+        idx = np.flatnonzero(valid)
+        order = idx[np.lexsort((self._rank[idx], keys[idx]))]
+        same = keys[order[1:]] == keys[order[:-1]]
+        return order[:-1][same], order[1:][same]
+
+    def _build_edges(self, df):
+        """Build resource-sharing edges and their recovery slack"""
+        n = self.n_nodes
+        all_rows = np.ones(n, dtype=bool)
+        current = df['current_station'].astype(str).to_numpy()
+
+        edges = []
+
+        if 'next_station' in df.columns:
+            nxt = df['next_station'].astype(str).to_numpy()
+
+            # Block: same directed section
+            block_codes, _ = pd.factorize(pd.Series(current) + '→' + nxt)
+            src, dst = self._chain(block_codes, all_rows)
+            edges.append((src, dst, self.headways['block'], False))
+
+            # Crossing: same section worked in opposite directions
+            low = np.where(current < nxt, current, nxt)
+            high = np.where(current < nxt, nxt, current)
+            crossing_codes, _ = pd.factorize(pd.Series(low) + '↔' + high)
+            src, dst = self._chain(crossing_codes, all_rows)
+            opposite = (current[src] < nxt[src]) != (current[dst] < nxt[dst])
+            edges.append((src[opposite], dst[opposite], self.headways['crossing'], False))
+
+        if 'platform' in df.columns:
+            has_platform = df['platform'].notna().to_numpy()
+            platform_codes, _ = pd.factorize(pd.Series(current) + '#' + df['platform'].astype(str).to_numpy())
+            src, dst = self._chain(platform_codes, has_platform)
+            edges.append((src, dst, self.headways['platform'], False))
+
+        # Rake links: successive duties of the same rake (or the same train number)
+        src, dst = self._chain(self.train_codes, all_rows)
+        edges.append((src, dst, 0, True))
+
+        if 'rake_id' in df.columns:
+            has_rake = df['rake_id'].notna().to_numpy()
+            rake_codes, _ = pd.factorize(df['rake_id'])
+            src, dst = self._chain(rake_codes, has_rake)
+            cross_train = self.train_codes[src] != self.train_codes[dst]
+            edges.append((src[cross_train], dst[cross_train], self.headways['rake'], False))
+
+        srcs, dsts, slacks = [], [], []
+        for src, dst, headway, same_train in edges:
+            gap = self.sched_minutes[dst] - self.sched_minutes[src]
+            if same_train:
+                slack = gap * self.recovery_fraction
+            else:
+                slack = np.maximum(gap - headway, 0)
+            srcs.append(src)
+            dsts.append(dst)
+            slacks.append(slack)
+
+        self._edge_src = np.concatenate(srcs).astype(np.int64)
+        self._edge_dst = np.concatenate(dsts).astype(np.int64)
+        self._edge_slack = np.concatenate(slacks).astype(np.float64)
+
+    def _assign_levels(self):
+        """Longest-path level of every node via a vectorized Kahn traversal"""
+        n = self.n_nodes
+        src, dst = self._edge_src, self._edge_dst
+
+        by_src = np.argsort(src, kind='stable')
+        out_ptr = np.searchsorted(src[by_src], np.arange(n + 1))
+        out_dst = dst[by_src]
+
+        indegree = np.bincount(dst, minlength=n)
+        level = np.zeros(n, dtype=np.int64)
+        frontier = np.flatnonzero(indegree == 0)
+        depth = 0
+
+        while frontier.size:
+            level[frontier] = depth
+            starts = out_ptr[frontier]
+            counts = out_ptr[frontier + 1] - starts
+            total = counts.sum()
+            if total == 0:
+                break
+
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            targets = out_dst[np.repeat(starts, counts) + offsets]
+            indegree -= np.bincount(targets, minlength=n)
+
+            candidates = np.unique(targets)
+            frontier = candidates[indegree[candidates] == 0]
+            depth += 1
+
+        self.levels = level
+        self.n_levels = int(level.max()) + 1 if n else 0
+
+        # Group edges by the level of their target so each level relaxes in one pass
+        by_level = np.argsort(level[dst], kind='stable')
+        self._edge_src = src[by_level]
+        self._edge_dst = dst[by_level]
+        self._edge_slack = self._edge_slack[by_level]
+        self._level_ptr = np.searchsorted(level[self._edge_dst], np.arange(self.n_levels + 1))
+
+    def _relax(self, delays, start_level):
+        """Propagate delays level by level: d[j] = max(d[j], d[i] - slack[i, j])"""
+        for lvl in range(max(start_level, 1), self.n_levels):
+            lo, hi = self._level_ptr[lvl], self._level_ptr[lvl + 1]
+            if lo == hi:
+                continue
+
+            src = self._edge_src[lo:hi]
+            incoming = delays[src]
+            active = np.isfinite(incoming)
+            if not active.any():
+                continue
+
+            np.maximum.at(
+                delays,
+                self._edge_dst[lo:hi][active],
+                incoming[active] - self._edge_slack[lo:hi][active]
+            )
+
+        return delays
+
+    def find_movement(self, train_number, station=None):
+        """
+        Find the movement a delay should be injected at
+
+        Args:
+            train_number (str): Train to delay
+            station (str): Optional station name; defaults to the train's first movement
+
+        Returns:
+            int or None: Node index of the movement, None if not found
+        """
+
+        matches = np.flatnonzero(self.train_labels == str(train_number))
+        if not len(matches):
+            return None
+
+        candidates = np.flatnonzero(self.train_codes == matches[0])
+        if station is not None:
+            at_station = candidates[self.stations[candidates] == station]
+            if len(at_station):
+                candidates = at_station
+
+        return int(candidates[np.argmin(self.sched_minutes[candidates])])
+
+    def propagate(self, train_number, delay_minutes, station=None, previous=None):
+        """
+        Inject a delay and propagate it through the dependency graph
+
+        Delay propagation is max-plus linear, so stacking a second delay on a
+        previous result only needs the descendants of the new injection.
+
+        Args:
+            train_number (str): Train receiving the delay
+            delay_minutes (float): Injected delay in minutes
+            station (str): Optional station where the delay occurs
+            previous (PropagationResult): Earlier result to build on
+
+        Returns:
+            PropagationResult: Propagated delays for every movement
+        """
+
+        node = self.find_movement(train_number, station)
+        current = previous.delays if previous is not None else self.baseline_delays
+        injections = list(previous.injections) if previous is not None else []
+
+        if node is None:
+            return PropagationResult(self, current.copy(), injections)
+
+        # Only descendants of the injected movement can change
+        seeded = np.full(self.n_nodes, -np.inf)
+        seeded[node] = current[node] + delay_minutes
+        seeded = self._relax(seeded, int(self.levels[node]) + 1)
+
+        injections.append((str(train_number), station, delay_minutes))
+        return PropagationResult(self, np.maximum(current, seeded), injections)
+
+
+@st.cache_resource(show_spinner=False)
+def build_dependency_graph(movement_data, headways=None, recovery_fraction=DEFAULT_RECOVERY_FRACTION):
+    """
+    Build (and cache per process) the train dependency graph for movement data
+
+    Args:
+        movement_data (pd.DataFrame): Train movement log
+        headways (dict): Optional overrides for DEFAULT_HEADWAYS
+        recovery_fraction (float): Recoverable share of a train's own running time
+
+    Returns:
+        DelayPropagationGraph: Graph ready for delay propagation
+    """
+
+    return DelayPropagationGraph(movement_data, headways, recovery_fraction)
+
+
+def simulate_delay_propagation(movement_data, train_number, delay_minutes, station=None, previous=None):
+    """
+    Simulate the cascading effect of a delay injected into one train
+
+    Args:
+        movement_data (pd.DataFrame): Train movement log
+        train_number (str): Train receiving the delay
+        delay_minutes (float): Injected delay in minutes
+        station (str): Optional station where the delay occurs
+        previous (PropagationResult): Earlier result to stack this delay on
+
+    Returns:
+        PropagationResult: Propagated delays with per-train and timeline summaries
+    """
+
+    graph = previous.graph if previous is not None else build_dependency_graph(movement_data)
+    return graph.propagate(train_number, delay_minutes, station, previous)
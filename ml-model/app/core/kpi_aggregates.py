@@ -0,0 +1,385 @@
+import heapq
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .kpi_engine import ON_TIME_THRESHOLD, TRAIN_CAPACITY
+from .quantile_sketch import TDigest, merge_sketches
+
+# Width of one aggregation bucket
+DEFAULT_BUCKET_MINUTES = 15
+
+# Rolling window the live KPIs cover, counted back from the newest movement
+DEFAULT_WINDOW_HOURS = 24
+
+# Running statistics kept per bucket, per station and for the whole window
+STAT_FIELDS = [
+    'movements', 'on_time', 'delay_count', 'delay_sum',
+    'passenger_count', 'passenger_sum', 'fuel_count', 'fuel_sum'
+]
+(_MOVEMENTS, _ON_TIME, _DELAY_COUNT, _DELAY_SUM,
+ _PASSENGER_COUNT, _PASSENGER_SUM, _FUEL_COUNT, _FUEL_SUM) = range(len(STAT_FIELDS))
+
+# Delay columns with a quantile sketch per bucket and station -> snapshot key prefix
+SKETCH_MEASURES = {
+    'delay_minutes': 'delay',
+    'actual_delay': 'actual_delay'
+}
+
+# Delay percentiles reported from the sketches
+DELAY_QUANTILES = (50, 90, 99)
+
+
+class RollingKPIAggregator:
+    """Running KPI sums and counts over a rolling window of movement buckets"""
+
+    def __init__(self, bucket_minutes=DEFAULT_BUCKET_MINUTES, window_hours=DEFAULT_WINDOW_HOURS,
+                 on_time_threshold=ON_TIME_THRESHOLD, train_capacity=TRAIN_CAPACITY):
+        self.bucket_ns = int(bucket_minutes * 60 * 1e9)
+        self.bucket_minutes = bucket_minutes
+        self.window_buckets = max(int(window_hours * 60 // bucket_minutes), 1)
+        self.on_time_threshold = on_time_threshold
+        self.train_capacity = train_capacity
+
+        # bucket -> {'total': stats, 'stations': {station: stats},
+        #            'sketches': {measure: TDigest}, 'station_sketches': {station: {measure: TDigest}}}
+        self.buckets = {}
+        self._bucket_heap = []
+        self.totals = np.zeros(len(STAT_FIELDS))
+        self.station_totals = {}
+
+        # Latest movement of every train in the window, for trains-on-time
+        self.train_state = {}
+        self.bucket_trains = {}
+        self.trains_on_time = 0
+
+        # Window sketches merged from the buckets, dropped whenever a bucket changes
+        self._sketch_cache = {}
+
+        self.latest_bucket = None
+        self.watermark = None
+        # Rows ingested at exactly the watermark time; many movements share a
+        # timestamp, so later rows at that time must still be picked up
+        self.watermark_rows = 0
+        self._lock = threading.Lock()
+
+    def ingest(self, batch):
+        """
+        Add a batch of movement rows to the running aggregates
+
+        Work is proportional to the batch, plus any buckets that expire.
+
+        Args:
+            batch (pd.DataFrame): New movement rows with timestamp and optionally
+                current_station, train_number, delay_minutes, passenger_count, fuel_level_percent
+
+        Returns:
+            int: Number of rows added
+        """
+
+        batch = batch[batch['timestamp'].notna()] if len(batch) else batch
+        if not len(batch):
+            return 0
+
+        times = pd.to_datetime(batch['timestamp']).to_numpy(dtype='datetime64[ns]')
+        bucket = times.astype(np.int64) // self.bucket_ns
+        stats = self._row_stats(batch)
+
+        stations = (
+            batch['current_station'].fillna('Unknown').astype(str).to_numpy()
+            if 'current_station' in batch.columns else np.full(len(batch), 'Unknown', dtype=object)
+        )
+        station_codes, station_labels = pd.factorize(stations)
+
+        # Collapse the batch to one stats row per (bucket, station)
+        groups, group_keys = pd.factorize(bucket * len(station_labels) + station_codes)
+        grouped = np.column_stack([
+            np.bincount(groups, weights=stats[:, field], minlength=len(group_keys))
+            for field in range(len(STAT_FIELDS))
+        ])
+
+        # Delay values of each group, for the sketches
+        by_group = np.argsort(groups, kind='stable')
+        boundaries = np.cumsum(np.bincount(groups, minlength=len(group_keys)))[:-1]
+        group_values = {
+            measure: np.split(values[by_group], boundaries)
+            for measure, values in self._sketch_values(batch).items()
+        }
+
+        with self._lock:
+            newest = int(bucket.max())
+            if self.latest_bucket is None or newest > self.latest_bucket:
+                self.latest_bucket = newest
+            cutoff = self.latest_bucket - self.window_buckets + 1
+
+            for group, (key, row) in enumerate(zip(group_keys, grouped)):
+                group_bucket, station = divmod(int(key), len(station_labels))
+                if group_bucket < cutoff:
+                    continue
+
+                entry = self.buckets.get(group_bucket)
+                if entry is None:
+                    entry = self.buckets[group_bucket] = {
+                        'total': np.zeros(len(STAT_FIELDS)),
+                        'stations': {},
+                        'sketches': {measure: TDigest() for measure in SKETCH_MEASURES},
+                        'station_sketches': {}
+                    }
+                    heapq.heappush(self._bucket_heap, group_bucket)
+                    self.bucket_trains[group_bucket] = set()
+
+                label = station_labels[station]
+                entry['total'] += row
+                entry['stations'][label] = entry['stations'].get(label, 0) + row
+                self.station_totals[label] = self.station_totals.get(label, 0) + row
+                self.totals += row
+
+                station_sketches = entry['station_sketches'].setdefault(
+                    label, {measure: TDigest() for measure in SKETCH_MEASURES}
+                )
+                for measure, values in group_values.items():
+                    entry['sketches'][measure].update(values[group])
+                    station_sketches[measure].update(values[group])
+
+            if 'train_number' in batch.columns:
+                self._update_trains(batch, times, bucket, cutoff)
+
+            batch_latest = times.max()
+            if self.watermark is None or batch_latest > self.watermark:
+                self.watermark = batch_latest
+                self.watermark_rows = int((times == batch_latest).sum())
+            elif batch_latest == self.watermark:
+                self.watermark_rows += int((times == batch_latest).sum())
+
+            self._expire(cutoff)
+            self._sketch_cache.clear()
+
+        return len(batch)
+
+    def ingest_new(self, movement_log):
+        """
+        Add only the rows of a movement log not ingested so far
+
+        Rows after the watermark are new. Rows at the watermark time are new
+        beyond the watermark_rows already ingested at that time, counted in log
+        order, so the log is assumed to be append-only.
+
+        Args:
+            movement_log (pd.DataFrame): Full movement log, ideally ordered by timestamp
+
+        Returns:
+            int: Number of rows added
+        """
+
+        if self.watermark is None:
+            return self.ingest(movement_log)
+
+        times = pd.to_datetime(movement_log['timestamp'])
+        if times.is_monotonic_increasing:
+            start = times.searchsorted(pd.Timestamp(self.watermark), side='left') + self.watermark_rows
+            return self.ingest(movement_log.iloc[start:])
+
+        times = times.to_numpy(dtype='datetime64[ns]')
+        at_watermark = times == self.watermark
+        new = (times > self.watermark) | (at_watermark & (np.cumsum(at_watermark) > self.watermark_rows))
+        return self.ingest(movement_log[new])
+
+    def _row_stats(self, batch):
+        """Per-row contributions to each running statistic"""
+        delay = self._measure(batch, 'delay_minutes')
+        passengers = self._measure(batch, 'passenger_count')
+        fuel = self._measure(batch, 'fuel_level_percent')
+
+        stats = np.zeros((len(batch), len(STAT_FIELDS)))
+        stats[:, _MOVEMENTS] = 1
+        stats[:, _ON_TIME] = delay <= self.on_time_threshold
+        stats[:, _DELAY_COUNT] = ~np.isnan(delay)
+        stats[:, _DELAY_SUM] = np.nan_to_num(delay)
+        stats[:, _PASSENGER_COUNT] = ~np.isnan(passengers)
+        stats[:, _PASSENGER_SUM] = np.nan_to_num(passengers)
+        stats[:, _FUEL_COUNT] = ~np.isnan(fuel)
+        stats[:, _FUEL_SUM] = np.nan_to_num(fuel)
+        return stats
+
+    def _sketch_values(self, batch):
+        """Per-row values of each sketched delay measure"""
+        values = {measure: self._measure(batch, measure) for measure in SKETCH_MEASURES}
+
+        # Departure delay is derived as in preprocess_movement_data when the
+        # batch has not been preprocessed
+        if 'actual_delay' not in batch.columns and {'scheduled_departure', 'actual_departure'} <= set(batch.columns):
+            values['actual_delay'] = (
+                pd.to_datetime(batch['actual_departure']) - pd.to_datetime(batch['scheduled_departure'])
+            ).dt.total_seconds().to_numpy(dtype=np.float64) / 60
+        return values
+
+    @staticmethod
+    def _measure(batch, column):
+        """Numeric column as floats, NaN where missing"""
+        if column not in batch.columns:
+            return np.full(len(batch), np.nan)
+        return pd.to_numeric(batch[column], errors='coerce').to_numpy(dtype=np.float64)
+
+    def _update_trains(self, batch, times, bucket, cutoff):
+        """Record each train's latest movement from the batch"""
+        trains = batch['train_number'].astype(str).to_numpy()
+        delay = self._measure(batch, 'delay_minutes')
+
+        # Last row of every train in the batch
+        order = np.argsort(times, kind='stable')
+        last = pd.Series(order).groupby(trains[order], sort=False).last().to_numpy()
+
+        for row in last:
+            if bucket[row] < cutoff:
+                continue
+            train = trains[row]
+            previous = self.train_state.get(train)
+            if previous is not None and previous[0] > times[row]:
+                continue
+
+            on_time = bool(delay[row] <= self.on_time_threshold)
+            if previous is not None:
+                self.bucket_trains[previous[1]].discard(train)
+                self.trains_on_time -= previous[2]
+
+            self.train_state[train] = (times[row], int(bucket[row]), on_time)
+            self.bucket_trains[int(bucket[row])].add(train)
+            self.trains_on_time += on_time
+
+    def _expire(self, cutoff):
+        """Drop buckets that slid out of the window and subtract them from the totals"""
+        while self._bucket_heap and self._bucket_heap[0] < cutoff:
+            expired = heapq.heappop(self._bucket_heap)
+            entry = self.buckets.pop(expired)
+
+            self.totals -= entry['total']
+            for station, stats in entry['stations'].items():
+                remaining = self.station_totals[station] - stats
+                if remaining[_MOVEMENTS] <= 0:
+                    del self.station_totals[station]
+                else:
+                    self.station_totals[station] = remaining
+
+            for train in self.bucket_trains.pop(expired):
+                self.trains_on_time -= self.train_state.pop(train)[2]
+
+    def _window(self, recent_minutes):
+        """Buckets making up the last recent_minutes, or None for the whole window"""
+        if recent_minutes is None:
+            return None
+        n_buckets = max(int(recent_minutes // self.bucket_minutes), 1)
+        if self.latest_bucket is None:
+            return []
+        return [b for b in range(self.latest_bucket - n_buckets + 1, self.latest_bucket + 1) if b in self.buckets]
+
+    def window_sketch(self, measure='delay_minutes', station=None, recent_minutes=None):
+        """
+        Quantile sketch of a delay measure over the window, merged from its buckets
+
+        The merged sketch is cached until the next ingest, and can itself be
+        merged with sketches from other processes (see merge_sketches).
+
+        Args:
+            measure (str): 'delay_minutes' or 'actual_delay'
+            station (str): Optional station to restrict to
+            recent_minutes (int): Optional shorter window ending at the newest bucket
+
+        Returns:
+            TDigest: Sketch covering the requested window
+        """
+
+        with self._lock:
+            return self._window_sketch(measure, station, recent_minutes)
+
+    def _window_sketch(self, measure, station, recent_minutes):
+        key = (measure, station, recent_minutes)
+        sketch = self._sketch_cache.get(key)
+        if sketch is None:
+            buckets = self._window(recent_minutes)
+            entries = self.buckets.values() if buckets is None else [self.buckets[b] for b in buckets]
+            if station is None:
+                parts = [entry['sketches'][measure] for entry in entries]
+            else:
+                parts = [entry['station_sketches'][station][measure]
+                         for entry in entries if station in entry['station_sketches']]
+            sketch = self._sketch_cache[key] = merge_sketches(parts)
+        return sketch
+
+    def snapshot(self, station=None, recent_minutes=None):
+        """
+        Current KPIs for the rolling window, without touching the movement history
+
+        Args:
+            station (str): Optional station to report instead of the whole network
+            recent_minutes (int): Optional shorter window ending at the newest bucket
+
+        Returns:
+            dict: movements, on_time_performance, average_delay, delay and actual_delay
+                percentiles (e.g. delay_p90), capacity_utilization, fuel_efficiency,
+                trains_active, trains_on_time and the window bounds
+        """
+
+        with self._lock:
+            buckets = self._window(recent_minutes)
+            if buckets is not None:
+                stats = np.zeros(len(STAT_FIELDS))
+                for recent in buckets:
+                    entry = self.buckets[recent]
+                    stats = stats + (entry['total'] if station is None else entry['stations'].get(station, 0))
+            elif station is not None:
+                stats = np.asarray(self.station_totals.get(station, np.zeros(len(STAT_FIELDS))), dtype=np.float64)
+            else:
+                stats = self.totals.copy()
+
+            percentiles = {
+                f'{prefix}_p{q}': value
+                for measure, prefix in SKETCH_MEASURES.items()
+                for q, value in zip(
+                    DELAY_QUANTILES,
+                    self._window_sketch(measure, station, recent_minutes).quantiles(np.array(DELAY_QUANTILES) / 100)
+                )
+            }
+
+            trains_active = len(self.train_state)
+            trains_on_time = self.trains_on_time
+            window_end = self.latest_bucket
+
+        def ratio(numerator, denominator, scale=1.0):
+            return float(numerator / denominator * scale) if denominator > 0 else 0.0
+
+        snapshot = {
+            'movements': int(round(stats[_MOVEMENTS])),
+            'on_time_performance': ratio(stats[_ON_TIME], stats[_MOVEMENTS], 100),
+            'average_delay': ratio(stats[_DELAY_SUM], stats[_DELAY_COUNT]),
+            'capacity_utilization': ratio(stats[_PASSENGER_SUM], stats[_PASSENGER_COUNT], 100 / self.train_capacity),
+            'fuel_efficiency': ratio(stats[_FUEL_SUM], stats[_FUEL_COUNT]),
+            **{name: float(value) for name, value in percentiles.items()},
+            'window_start': None,
+            'window_end': None
+        }
+        if station is None:
+            snapshot['trains_active'] = trains_active
+            snapshot['trains_on_time'] = trains_on_time
+        if window_end is not None:
+            span = self.window_buckets if recent_minutes is None else max(int(recent_minutes // self.bucket_minutes), 1)
+            snapshot['window_start'] = pd.Timestamp((window_end - span + 1) * self.bucket_ns)
+            snapshot['window_end'] = pd.Timestamp((window_end + 1) * self.bucket_ns)
+
+        return snapshot
+
+
+@st.cache_resource(show_spinner=False)
+def get_kpi_aggregator(bucket_minutes=DEFAULT_BUCKET_MINUTES, window_hours=DEFAULT_WINDOW_HOURS):
+    """
+    Process-wide rolling KPI aggregator shared by all sessions
+
+    Args:
+        bucket_minutes (int): Width of one aggregation bucket
+        window_hours (float): Length of the rolling window
+
+    Returns:
+        RollingKPIAggregator: Shared aggregator
+    """
+
+    return RollingKPIAggregator(bucket_minutes=bucket_minutes, window_hours=window_hours)
@@ -0,0 +1,231 @@
+import numpy as np
+import pandas as pd
+
+# A movement counts as on time up to this delay (minutes)
+ON_TIME_THRESHOLD = 5
+
+# Assumed maximum passengers per train for capacity utilization
+TRAIN_CAPACITY = 1200
+
+# Delay percentiles reported alongside the average
+DELAY_PERCENTILES = (50, 90, 95)
+
+# Named group-by dimensions; any other column name is used as is
+DIMENSIONS = {
+    'station': 'current_station',
+    'train': 'train_number',
+    'hour': 'timestamp',
+    'day': 'timestamp'
+}
+
+# Time dimensions are bucketed by truncating the timestamp to this unit
+TIME_BUCKETS = {
+    'hour': 'datetime64[h]',
+    'day': 'datetime64[D]'
+}
+
+
+class GroupPlan:
+    """Group codes for one combination of dimensions, shared by every KPI"""
+
+    def __init__(self, keys, names):
+        self.names = names
+        codes, uniques = zip(*(pd.factorize(key, sort=True) for key in keys))
+        sizes = [len(u) for u in uniques]
+
+        # Rows with a missing key belong to no group and keep code -1
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        if len(keys) == 1:
+            combined = codes[0][valid]
+        else:
+            combined = np.ravel_multi_index([c[valid] for c in codes], sizes)
+
+        group_codes, group_keys = pd.factorize(combined, sort=True)
+        self.codes = np.full(len(valid), -1, dtype=np.int64)
+        self.codes[valid] = group_codes
+        self.n_groups = len(group_keys)
+        self.complete = bool(valid.all())
+
+        if len(keys) == 1:
+            self.index = pd.Index(uniques[0][group_keys], name=names[0])
+        else:
+            parts = np.unravel_index(group_keys, sizes)
+            self.index = pd.MultiIndex.from_arrays(
+                [u[p] for u, p in zip(uniques, parts)], names=names
+            )
+
+    def sum(self, values, mask):
+        """Per-group sum of values over the rows where mask is set"""
+        if not self.complete:
+            mask = mask & (self.codes >= 0)
+        return np.bincount(self.codes[mask], weights=values[mask], minlength=self.n_groups)
+
+    def count(self, mask=None):
+        """Per-group number of rows, restricted to rows where mask is set"""
+        codes = self.codes if mask is None else self.codes[mask]
+        if not self.complete:
+            codes = codes[codes >= 0]
+        return np.bincount(codes, minlength=self.n_groups)
+
+    def percentiles(self, values, value_order, percentiles):
+        """
+        Per-group percentiles with linear interpolation
+
+        Args:
+            values (np.ndarray): Values for every row
+            value_order (np.ndarray): Indices of the rows to include, sorted by value
+            percentiles (iterable): Percentiles in [0, 100]
+
+        Returns:
+            dict: Percentile -> array with one value per group (NaN for empty groups)
+        """
+
+        codes, rows = self.codes[value_order], value_order
+        if not self.complete:
+            keep = codes >= 0
+            codes, rows = codes[keep], rows[keep]
+
+        # A stable sort on the group codes keeps each group's values in order;
+        # 16-bit codes let NumPy use a radix sort
+        if self.n_groups <= np.iinfo(np.uint16).max:
+            by_group = np.argsort(codes.astype(np.uint16), kind='stable')
+        else:
+            by_group = np.argsort(codes, kind='stable')
+        ordered = values[rows[by_group]]
+
+        counts = np.bincount(codes, minlength=self.n_groups)
+        offsets = np.cumsum(counts) - counts
+        has_values = counts > 0
+
+        result = {}
+        for q in percentiles:
+            position = offsets + (q / 100.0) * np.maximum(counts - 1, 0)
+            low = np.where(has_values, np.floor(position).astype(np.int64), 0)
+            high = np.where(has_values, np.minimum(low + 1, offsets + counts - 1), 0)
+            fraction = position - low
+
+            if len(ordered):
+                value = ordered[low] + (ordered[high] - ordered[low]) * fraction
+            else:
+                value = np.zeros(self.n_groups)
+            result[q] = np.where(has_values, value, np.nan)
+
+        return result
+
+
+class KPIEngine:
+    """Operational KPIs over movement data, computed for any grouping in one pass"""
+
+    def __init__(self, operational_data, on_time_threshold=ON_TIME_THRESHOLD,
+                 train_capacity=TRAIN_CAPACITY, percentiles=DELAY_PERCENTILES):
+        self.data = operational_data
+        self.n_rows = len(operational_data)
+        self.on_time_threshold = on_time_threshold
+        self.train_capacity = train_capacity
+        self.delay_percentiles = tuple(percentiles)
+        self._plans = {}
+        self._delay_order = None
+
+        # Measure columns are pulled out once as float arrays; missing
+        # columns simply drop their KPIs
+        self.measures = {
+            column: pd.to_numeric(operational_data[column], errors='coerce').to_numpy(dtype=np.float64)
+            for column in ('delay_minutes', 'passenger_count', 'fuel_level_percent')
+            if column in operational_data.columns
+        }
+
+    def _dimension_key(self, dimension):
+        """Array of group keys for one dimension"""
+        column = DIMENSIONS.get(dimension, dimension)
+        if column not in self.data.columns:
+            raise KeyError(f"Cannot group KPIs by '{dimension}': column '{column}' is missing")
+
+        if dimension in TIME_BUCKETS:
+            times = pd.to_datetime(self.data[column]).to_numpy(dtype='datetime64[ns]')
+            return times.astype(TIME_BUCKETS[dimension]).astype('datetime64[ns]')
+        return self.data[column].to_numpy()
+
+    def plan(self, by=None):
+        """
+        Group plan for a combination of dimensions, built once and reused
+
+        Args:
+            by (str or list): 'station', 'train', 'hour', 'day', other column
+                names, or None for a single overall group
+
+        Returns:
+            GroupPlan: Codes shared by every KPI of this grouping
+        """
+
+        dimensions = () if by is None else (by,) if isinstance(by, str) else tuple(by)
+        if dimensions not in self._plans:
+            if dimensions:
+                keys = [self._dimension_key(dimension) for dimension in dimensions]
+                self._plans[dimensions] = GroupPlan(keys, list(dimensions))
+            else:
+                self._plans[dimensions] = GroupPlan([np.zeros(self.n_rows, dtype=np.int64)], ['all'])
+        return self._plans[dimensions]
+
+    def compute(self, by=None):
+        """
+        Compute the full KPI set per group
+
+        Args:
+            by (str or list): Grouping dimensions (see plan)
+
+        Returns:
+            pd.DataFrame: One row per group with movements, on_time_performance,
+                average_delay, delay_pXX, capacity_utilization and fuel_efficiency
+        """
+
+        plan = self.plan(by)
+        movements = plan.count()
+        rows = np.where(movements > 0, movements, 1)
+        kpis = {'movements': movements}
+
+        delay = self.measures.get('delay_minutes')
+        if delay is not None:
+            known = ~np.isnan(delay)
+
+            # Delays are sorted once per engine and reused by every grouping
+            if self._delay_order is None:
+                self._delay_order = np.flatnonzero(known)[np.argsort(delay[known], kind='stable')]
+
+            # Like the row filter it replaces, unknown delays count against on-time
+            kpis['on_time_performance'] = plan.count(delay <= self.on_time_threshold) / rows * 100
+            kpis['average_delay'] = self._mean(plan.sum(delay, known), plan.count(known))
+            for q, values in plan.percentiles(delay, self._delay_order, self.delay_percentiles).items():
+                kpis[f'delay_p{q}'] = values
+
+        passengers = self.measures.get('passenger_count')
+        if passengers is not None:
+            known = ~np.isnan(passengers)
+            average = self._mean(plan.sum(passengers, known), plan.count(known))
+            kpis['capacity_utilization'] = average / self.train_capacity * 100
+
+        fuel = self.measures.get('fuel_level_percent')
+        if fuel is not None:
+            known = ~np.isnan(fuel)
+            kpis['fuel_efficiency'] = self._mean(plan.sum(fuel, known), plan.count(known))
+
+        return pd.DataFrame(kpis, index=plan.index)
+
+    @staticmethod
+    def _mean(total, count):
+        """Per-group mean, NaN where a group has no values"""
+        return np.where(count > 0, total / np.where(count > 0, count, 1), np.nan)
+
+
+def compute_kpis(operational_data, by=None):
+    """
+    Compute operational KPIs for movement data, optionally per group
+
+    Args:
+        operational_data (pd.DataFrame): Operational data
+        by (str or list): 'station', 'train', 'hour', 'day' or other columns to group by
+
+    Returns:
+        pd.DataFrame: KPI table with one row per group
+    """
+
+    return KPIEngine(operational_data).compute(by)
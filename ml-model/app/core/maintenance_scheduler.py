@@ -0,0 +1,382 @@
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+
+# Hours of work by maintenance type, used when work orders carry no duration
+MAINTENANCE_DURATION_HOURS = {
+    "Emergency Repair": 8,
+    "Corrective Maintenance": 6,
+    "Preventive Maintenance": 4
+}
+
+# Penalty per day a work order is scheduled past its due day, by priority rank
+LATENESS_PENALTY = np.array([50.0, 20.0, 8.0, 2.0])
+
+# Columns of a schedule, in order
+SCHEDULE_COLUMNS = [
+    'asset_id', 'asset_type', 'priority', 'maintenance_type', 'depot_id', 'depot_name',
+    'block_start', 'block_end', 'due_date', 'late_days', 'disruption_cost'
+]
+
+# Depot type able to take each asset type; other assets can go to any depot
+DEPOT_TYPE_FOR_ASSET = {
+    "Locomotive": "locomotive",
+    "Coach": "carriage_wagon",
+    "Wagon": "carriage_wagon"
+}
+
+
+class MaintenanceScheduler:
+    """Assigns maintenance work orders to depot blocks with minimal traffic disruption"""
+
+    def __init__(self, static_data, movement_data=None, horizon_days=30, blocks_per_day=6, start_date=None):
+        if blocks_per_day < 1 or 24 % blocks_per_day:
+            raise ValueError(f"blocks_per_day must divide 24, got {blocks_per_day}")
+
+        self.horizon_days = horizon_days
+        self.blocks_per_day = blocks_per_day
+        self.block_hours = 24 // blocks_per_day
+        self.n_slots = horizon_days * blocks_per_day
+
+        if start_date is None:
+            start_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        self.start_date = pd.Timestamp(start_date)
+
+        self.depots = static_data.get('maintenance_depots', [])
+        if not self.depots:
+            raise ValueError("Static data has no maintenance_depots to schedule into")
+
+        station_names = {s['id']: s['name'] for s in static_data.get('stations', [])}
+        self.depot_stations = [station_names.get(d.get('location'), d.get('location')) for d in self.depots]
+        self.capacity = np.array([d.get('capacity', 1) for d in self.depots], dtype=np.int64)
+
+        self.disruption = self._disruption_matrix(movement_data)
+
+    def _disruption_matrix(self, movement_data):
+        """
+        Traffic-based disruption cost for every depot and block
+
+        Args:
+            movement_data (pd.DataFrame): Movement log used to derive hourly traffic
+
+        Returns:
+            np.ndarray: Cost per (depot, slot), 1.0 being the busiest hour in the data
+        """
+
+        hourly = np.ones((len(self.depots), 24))
+
+        if movement_data is not None and len(movement_data) and 'timestamp' in movement_data.columns:
+            hours = pd.to_datetime(movement_data['timestamp']).dt.hour.to_numpy()
+            days = max(pd.to_datetime(movement_data['timestamp']).dt.normalize().nunique(), 1)
+            network = np.bincount(hours, minlength=24) / days
+
+            stations = movement_data['current_station'].astype(str).to_numpy()
+            for i, station in enumerate(self.depot_stations):
+                local = np.bincount(hours[stations == station], minlength=24) / days
+                # Depots with no recorded local traffic follow the network profile
+                hourly[i] = local if local.any() else network / max(len(self.depot_stations), 1)
+
+            hourly = hourly / max(hourly.max(), 1e-9)
+
+        # Average traffic over the hours each block covers
+        blocks = hourly.reshape(len(self.depots), self.blocks_per_day, self.block_hours).mean(axis=2)
+        disruption = np.tile(blocks, (1, self.horizon_days))
+
+        # Depots with restricted working hours cannot host blocks outside them
+        for i, depot in enumerate(self.depots):
+            open_blocks = self._open_blocks(depot.get('working_hours', '24x7'))
+            disruption[i, ~np.tile(open_blocks, self.horizon_days)] = np.inf
+
+        return disruption
+
+    def _open_blocks(self, working_hours):
+        """
+        Blocks of the day a depot works, from '24x7' or 'HH:MM-HH:MM'
+
+        Hours ending at or before their start run past midnight, e.g.
+        '22:00-06:00'; equal start and end mean the depot never closes.
+        Only blocks entirely inside the working hours are open.
+        """
+
+        open_blocks = np.ones(self.blocks_per_day, dtype=bool)
+        try:
+            start, end = [int(part.split(':')[0]) for part in working_hours.split('-')]
+        except (ValueError, AttributeError):
+            return open_blocks
+        if start % 24 == end % 24:
+            return open_blocks
+
+        block_start = np.arange(self.blocks_per_day) * self.block_hours
+        block_end = block_start + self.block_hours
+        if start < end:
+            return (block_start >= start) & (block_end <= end)
+        return (block_start >= start) | (block_end <= end)
+
+    def _prepare_orders(self, work_orders):
+        """Normalise work orders into the arrays the optimizer works on"""
+        orders = pd.DataFrame(work_orders).reset_index(drop=True)
+
+        if 'priority_rank' in orders.columns:
+            priority = orders['priority_rank'].to_numpy(dtype=np.int64)
+        else:
+            levels = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+            priority = orders['priority'].map(levels).fillna(3).to_numpy(dtype=np.int64)
+
+        if 'duration_hours' in orders.columns:
+            duration = orders['duration_hours'].to_numpy(dtype=np.float64)
+        else:
+            duration = orders['maintenance_type'].map(MAINTENANCE_DURATION_HOURS).fillna(4).to_numpy(dtype=np.float64)
+
+        due_day = orders['days_until_maintenance'].to_numpy(dtype=np.int64) - 1
+
+        # Eligible depots per order, as a boolean (order, depot) matrix
+        depot_types = np.array([d.get('type') for d in self.depots], dtype=object)
+        wanted = orders['asset_type'].map(DEPOT_TYPE_FOR_ASSET).to_numpy(dtype=object)
+        eligible = depot_types[None, :] == wanted[:, None]
+        unmatched = ~eligible.any(axis=1)
+        eligible[unmatched] = True
+
+        return orders, priority, duration, due_day, eligible
+
+    def _order_costs(self, duration, span, due_day, priority, eligible):
+        """
+        Cost of starting each order in each (depot, slot); inf where not allowed
+
+        An order occupies span consecutive blocks of one depot, so a start is
+        only allowed when all of them are open and inside the horizon. Its
+        disruption is the duration times the mean disruption of those blocks.
+        """
+
+        slot_day = np.arange(self.n_slots) // self.blocks_per_day
+        late_days = np.maximum(slot_day[None, :] - due_day[:, None], 0)
+        lateness = late_days * LATENESS_PENALTY[np.clip(priority, 0, 3)][:, None]
+
+        costs = np.empty((len(duration), len(self.depots), self.n_slots))
+        for blocks in np.unique(span):
+            # Summed disruption of the blocks each start would occupy
+            window = np.full_like(self.disruption, np.inf)
+            window[:, :self.n_slots - blocks + 1] = 0
+            for offset in range(blocks):
+                window[:, :self.n_slots - offset] += self.disruption[:, offset:]
+            rows = span == blocks
+            costs[rows] = (duration[rows] / blocks)[:, None, None] * window[None, :, :]
+
+        costs += lateness[:, None, :]
+        costs[~eligible] = np.inf
+        return costs
+
+    def _free_starts(self, remaining, blocks):
+        """Start cells whose next blocks cells all have capacity left"""
+        free = remaining > 0
+        starts = free.copy()
+        for offset in range(1, blocks):
+            starts[:-offset] &= free[offset:]
+            starts[-offset:] = False
+        return starts
+
+    def schedule(self, work_orders, time_budget_seconds=10, seed=None):
+        """
+        Build a feasible maintenance block schedule
+
+        Orders are placed greedily (most urgent first, into their cheapest free
+        block), then improved by relocate/swap local search until the time
+        budget runs out.
+
+        Args:
+            work_orders (list or pd.DataFrame): Output like predict_maintenance
+            time_budget_seconds (float): Wall-clock budget for the whole optimisation
+            seed (int): Optional seed for the local search
+
+        Returns:
+            dict: Schedule DataFrame, unscheduled orders and optimisation summary
+        """
+
+        started = time.perf_counter()
+        deadline = started + time_budget_seconds
+        rng = np.random.default_rng(seed)
+        n_depots = len(self.depots)
+
+        if not len(work_orders):
+            return {
+                'schedule': pd.DataFrame(columns=SCHEDULE_COLUMNS),
+                'unscheduled': pd.DataFrame(work_orders),
+                'total_disruption': 0.0,
+                'greedy_disruption': 0.0,
+                'late_orders': 0,
+                'local_search_iterations': 0,
+                'local_search_improvements': 0,
+                'runtime_seconds': round(time.perf_counter() - started, 3),
+                'depots_used': 0,
+                'depot_count': n_depots
+            }
+
+        orders, priority, duration, due_day, eligible = self._prepare_orders(work_orders)
+        n_orders = len(orders)
+
+        # Consecutive blocks each order occupies
+        span = np.maximum(np.ceil(duration / self.block_hours), 1).astype(np.int64)
+
+        # Flattened (depot * n_slots + slot) cost per order and start block
+        costs = self._order_costs(duration, span, due_day, priority, eligible).reshape(n_orders, -1)
+        remaining = np.repeat(self.capacity, self.n_slots).astype(np.int64)
+        remaining[~np.isfinite(self.disruption.ravel())] = 0
+
+        assignment = np.full(n_orders, -1, dtype=np.int64)
+
+        # Greedy construction: most urgent first, cheapest start with free capacity
+        # in every block the order covers
+        for i in np.lexsort((due_day, priority)):
+            row = np.where(self._free_starts(remaining, span[i]), costs[i], np.inf)
+            best = int(np.argmin(row))
+            if np.isfinite(row[best]):
+                assignment[i] = best
+                remaining[best:best + span[i]] -= 1
+
+        scheduled = np.flatnonzero(assignment >= 0)
+        greedy_cost = float(costs[scheduled, assignment[scheduled]].sum())
+        greedy_assignment = assignment.copy()
+
+        iterations, improvements = self._local_search(costs, span, assignment, remaining, scheduled, rng, deadline)
+
+        # The greedy schedule is kept unless the search found a feasible, cheaper one
+        final_cost = float(costs[scheduled, assignment[scheduled]].sum())
+        if final_cost > greedy_cost or not self._feasible(assignment, span):
+            assignment = greedy_assignment
+            final_cost = greedy_cost
+        schedule, unscheduled = self._build_schedule(orders, assignment, span, costs, due_day)
+
+        return {
+            'schedule': schedule,
+            'unscheduled': unscheduled,
+            'total_disruption': round(final_cost, 2),
+            'greedy_disruption': round(greedy_cost, 2),
+            'late_orders': int(schedule['late_days'].gt(0).sum()),
+            'local_search_iterations': iterations,
+            'local_search_improvements': improvements,
+            'runtime_seconds': round(time.perf_counter() - started, 3),
+            'depots_used': int(len(np.unique(assignment[scheduled] // self.n_slots))) if len(scheduled) else 0,
+            'depot_count': n_depots
+        }
+
+    def _local_search(self, costs, span, assignment, remaining, scheduled, rng, deadline):
+        """Relocate and swap moves that lower total cost, until the deadline"""
+        if len(scheduled) < 1:
+            return 0, 0
+
+        n_cells = costs.shape[1]
+        occupants = {}
+        for i in scheduled:
+            occupants.setdefault(int(assignment[i]), []).append(int(i))
+
+        iterations = 0
+        improvements = 0
+        batch = 2048
+
+        # Stop early once several passes' worth of proposals found nothing
+        patience = max(20, 5 * len(scheduled) // batch)
+        stale_batches = 0
+
+        while time.perf_counter() < deadline and stale_batches < patience:
+            improvements_before = improvements
+            picks = rng.choice(scheduled, batch)
+            targets = rng.integers(0, n_cells, batch)
+
+            for i, target in zip(picks.tolist(), targets.tolist()):
+                current = int(assignment[i])
+                if target == current:
+                    continue
+
+                gain = costs[i, current] - costs[i, target]
+                if gain <= 1e-9 and target not in occupants:
+                    continue
+
+                # Relocate into free blocks; the order's own blocks are released
+                # first so it can shift into an overlapping window
+                blocks = span[i]
+                remaining[current:current + blocks] += 1
+                if gain > 1e-9 and target + blocks <= n_cells and (remaining[target:target + blocks] > 0).all():
+                    occupants[current].remove(i)
+                    occupants.setdefault(target, []).append(i)
+                    remaining[target:target + blocks] -= 1
+                    assignment[i] = target
+                    improvements += 1
+                    continue
+                remaining[current:current + blocks] -= 1
+
+                # Blocks are full: try swapping with an order of the same length
+                # starting there, which leaves every block's load unchanged
+                residents = occupants.get(target, ())
+                candidates = [j for j in residents if span[j] == blocks]
+                if not candidates:
+                    continue
+                j = candidates[int(rng.integers(len(candidates)))]
+                delta = gain + costs[j, target] - costs[j, current]
+                if delta > 1e-9:
+                    residents[residents.index(j)] = i
+                    slot = occupants[current]
+                    slot[slot.index(i)] = j
+                    assignment[i] = target
+                    assignment[j] = current
+                    improvements += 1
+
+            iterations += batch
+            stale_batches = stale_batches + 1 if improvements == improvements_before else 0
+
+        return iterations, improvements
+
+    def _feasible(self, assignment, span):
+        """Whether no block holds more orders than its depot's capacity"""
+        load = np.zeros(len(self.depots) * self.n_slots, dtype=np.int64)
+        for blocks in np.unique(span):
+            starts = assignment[(assignment >= 0) & (span == blocks)]
+            for offset in range(blocks):
+                np.add.at(load, starts + offset, 1)
+        return bool((load <= np.repeat(self.capacity, self.n_slots)).all())
+
+    def _build_schedule(self, orders, assignment, span, costs, due_day):
+        """Turn the flat assignment into schedule and unscheduled DataFrames"""
+        scheduled = assignment >= 0
+        cells = assignment[scheduled]
+        depot_idx = cells // self.n_slots
+        slot = cells % self.n_slots
+        day = slot // self.blocks_per_day
+
+        block_start = self.start_date + pd.to_timedelta(slot * self.block_hours, unit='h')
+        depot_ids = np.array([d.get('id') for d in self.depots], dtype=object)
+        depot_names = np.array([d.get('name', d.get('id')) for d in self.depots], dtype=object)
+
+        schedule = orders.loc[scheduled, [c for c in ('asset_id', 'asset_type', 'priority', 'maintenance_type')
+                                          if c in orders.columns]].copy()
+        schedule['depot_id'] = depot_ids[depot_idx]
+        schedule['depot_name'] = depot_names[depot_idx]
+        schedule['block_start'] = block_start
+        schedule['block_end'] = block_start + pd.to_timedelta(span[scheduled] * self.block_hours, unit='h')
+        schedule['due_date'] = self.start_date + pd.to_timedelta(due_day[scheduled], unit='D')
+        schedule['late_days'] = np.maximum(day - due_day[scheduled], 0)
+        schedule['disruption_cost'] = np.round(costs[np.flatnonzero(scheduled), cells], 3)
+
+        schedule = schedule.sort_values(['block_start', 'depot_id'], kind='stable').reset_index(drop=True)
+        unscheduled = orders.loc[~scheduled].reset_index(drop=True)
+        return schedule, unscheduled
+
+
+def schedule_maintenance(work_orders, static_data, movement_data=None, horizon_days=30,
+                         time_budget_seconds=10, seed=None):
+    """
+    Schedule maintenance work orders into depot blocks
+
+    Args:
+        work_orders (list or pd.DataFrame): Maintenance predictions (see predict_maintenance)
+        static_data (dict): Static rail map with 'maintenance_depots'
+        movement_data (pd.DataFrame): Movement log used to find low-traffic windows
+        horizon_days (int): Days available for scheduling
+        time_budget_seconds (float): Optimisation time budget
+        seed (int): Optional seed for the local search
+
+    Returns:
+        dict: Schedule, unscheduled orders and optimisation summary
+    """
+
+    scheduler = MaintenanceScheduler(static_data, movement_data, horizon_days=horizon_days)
+    return scheduler.schedule(work_orders, time_budget_seconds=time_budget_seconds, seed=seed)
@@ -0,0 +1,444 @@
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Measures aggregated into the cube
+CUBE_MEASURES = ('delay_minutes', 'actual_delay')
+
+# Dimensions a query can group or filter by; weekday is derived from day
+CUBE_DIMENSIONS = ('day', 'weekday', 'station', 'train', 'hour')
+
+# Delay histogram bins (minutes): 1 minute wide around the usual delays,
+# coarser further out. Values outside the range land in the end bins.
+DELAY_BIN_EDGES = np.concatenate([
+    [-120.0], np.arange(-30, 60, 1.0), np.arange(60, 180, 5.0), np.arange(180, 720, 30.0), [720.0, 1440.0]
+])
+
+# Dimensions the delay histograms are kept at; percentile queries may only use these
+HISTOGRAM_DIMENSIONS = ('day', 'weekday', 'station', 'hour')
+
+# Rollups materialized per day partition; together with the day they answer
+# most station/hour/weekday and train/day questions without touching the base cells
+MATERIALIZED_VIEWS = (('station', 'hour'), ('train',))
+
+_DAY_NS = 86400 * 10 ** 9
+
+
+class _Dictionary:
+    """Append-only label <-> integer code mapping shared by all partitions"""
+
+    def __init__(self):
+        self.codes = {}
+        self.labels = []
+
+    def encode(self, values):
+        """Integer codes for an array of labels, adding unseen labels"""
+        uniques, inverse = np.unique(values, return_inverse=True)
+        mapped = np.empty(len(uniques), dtype=np.int64)
+        for i, label in enumerate(uniques):
+            code = self.codes.get(label)
+            if code is None:
+                code = self.codes[label] = len(self.labels)
+                self.labels.append(label)
+            mapped[i] = code
+        return mapped[inverse]
+
+
+class MovementCube:
+    """Materialized delay cube over the movement log, partitioned by day"""
+
+    def __init__(self, bin_edges=DELAY_BIN_EDGES):
+        self.bin_edges = np.asarray(bin_edges, dtype=np.float64)
+        self.n_bins = len(self.bin_edges) - 1
+        self.stations = _Dictionary()
+        self.trains = _Dictionary()
+
+        # day code -> partition arrays, plus the fingerprint of its rows
+        self.partitions = {}
+        self.fingerprints = {}
+
+        self._base = None
+        self._histogram = None
+        self._cuboids = {}
+        self._lock = threading.RLock()
+
+    def update(self, movement_data):
+        """
+        Bring the cube up to date with the movement log
+
+        Only day partitions whose rows changed are rebuilt.
+
+        Args:
+            movement_data (pd.DataFrame): Movement log (raw or preprocessed)
+
+        Returns:
+            list: Days (pd.Timestamp) whose partitions were rebuilt
+        """
+
+        data = movement_data[movement_data['timestamp'].notna()]
+        times = pd.to_datetime(data['timestamp']).to_numpy(dtype='datetime64[ns]')
+        days = times.astype(np.int64) // _DAY_NS
+
+        # Day partitions are fingerprinted with an order-independent row hash
+        row_hashes = pd.util.hash_pandas_object(data, index=False).to_numpy()
+        day_codes, day_values = pd.factorize(days, sort=True)
+        order = np.argsort(day_codes, kind='stable')
+        boundaries = np.cumsum(np.bincount(day_codes, minlength=len(day_values)))[:-1]
+
+        rebuilt = []
+        with self._lock:
+            for day, rows in zip(day_values, np.split(order, boundaries)):
+                fingerprint = f"{len(rows)}-{int(row_hashes[rows].sum(dtype=np.uint64)):016x}"
+                if self.fingerprints.get(int(day)) == fingerprint:
+                    continue
+
+                self.partitions[int(day)] = self._build_partition(data.iloc[rows], times[rows], int(day))
+                self.fingerprints[int(day)] = fingerprint
+                rebuilt.append(pd.Timestamp(int(day) * _DAY_NS))
+
+            if rebuilt:
+                self._base = self._histogram = None
+                self._cuboids.clear()
+
+        return rebuilt
+
+    def _measure_values(self, data):
+        """Measure columns as a (rows, measures) float array, NaN where unknown"""
+        values = np.full((len(data), len(CUBE_MEASURES)), np.nan)
+        for i, measure in enumerate(CUBE_MEASURES):
+            if measure in data.columns:
+                values[:, i] = pd.to_numeric(data[measure], errors='coerce').to_numpy(dtype=np.float64)
+            elif measure == 'actual_delay' and {'scheduled_departure', 'actual_departure'} <= set(data.columns):
+                values[:, i] = (
+                    pd.to_datetime(data['actual_departure']) - pd.to_datetime(data['scheduled_departure'])
+                ).dt.total_seconds().to_numpy(dtype=np.float64) / 60
+        return values
+
+    def _build_partition(self, data, times, day):
+        """Aggregate one day's movements to station x train x hour cells"""
+        station = self.stations.encode(data['current_station'].fillna('Unknown').astype(str).to_numpy())
+        train = self.trains.encode(data['train_number'].astype(str).to_numpy())
+        hour = ((times.astype(np.int64) - day * _DAY_NS) // (3600 * 10 ** 9)).astype(np.int64)
+        values = self._measure_values(data)
+
+        cells, cell_keys = pd.factorize((station << 40) | (train << 8) | hour)
+        partition = {
+            'station': cell_keys >> 40,
+            'train': (cell_keys >> 8) & 0xFFFFFFFF,
+            'hour': cell_keys & 0xFF,
+            **self._measure_stats(cells, len(cell_keys), values)
+        }
+        partition['views'] = {view: self._roll_up(partition, view) for view in MATERIALIZED_VIEWS}
+
+        # Sparse delay histograms per station x hour: (cell, bin, count) triples
+        hist_cells, hist_keys = pd.factorize((station << 8) | hour)
+        entries = []
+        for i in range(len(CUBE_MEASURES)):
+            known = ~np.isnan(values[:, i])
+            bins = np.clip(
+                np.searchsorted(self.bin_edges, values[known, i], side='right') - 1, 0, self.n_bins - 1
+            )
+            keys, counts = np.unique(hist_cells[known] * self.n_bins + bins, return_counts=True)
+            entries.append((keys // self.n_bins, keys % self.n_bins, np.full(len(keys), i), counts))
+
+        partition['histogram'] = {
+            'station': hist_keys >> 8,
+            'hour': hist_keys & 0xFF,
+            'entry_cell': np.concatenate([e[0] for e in entries]),
+            'entry_bin': np.concatenate([e[1] for e in entries]),
+            'entry_measure': np.concatenate([e[2] for e in entries]),
+            'entry_count': np.concatenate([e[3] for e in entries]).astype(np.float64)
+        }
+        return partition
+
+    @staticmethod
+    def _measure_stats(groups, n_groups, values, counts=None, sums=None, mins=None, maxs=None):
+        """
+        Count, sum, min and max per group for every measure
+
+        Raw rows are passed as values; already aggregated cells pass their
+        counts/sums/mins/maxs instead, which combine the same way.
+        """
+
+        if counts is None:
+            known = ~np.isnan(values)
+            counts = known.astype(np.float64)
+            sums = np.where(known, values, 0.0)
+            mins = np.where(known, values, np.inf)
+            maxs = np.where(known, values, -np.inf)
+
+        n_measures = counts.shape[1]
+        low, high = [], []
+        for i in range(n_measures):
+            low.append(np.full(n_groups, np.inf))
+            high.append(np.full(n_groups, -np.inf))
+            np.minimum.at(low[i], groups, mins[:, i])
+            np.maximum.at(high[i], groups, maxs[:, i])
+
+        return {
+            'count': np.column_stack([np.bincount(groups, counts[:, i], n_groups) for i in range(n_measures)]),
+            'sum': np.column_stack([np.bincount(groups, sums[:, i], n_groups) for i in range(n_measures)]),
+            'min': np.column_stack(low),
+            'max': np.column_stack(high)
+        }
+
+    def _roll_up(self, cells, dimensions):
+        """Aggregate cells (base cells or a finer cuboid) to a set of dimensions"""
+        groups, keys = self._group(cells, dimensions)
+        n_groups = int(groups.max()) + 1 if len(groups) else 0
+        return {**keys, **self._measure_stats(
+            groups, n_groups, None,
+            counts=cells['count'], sums=cells['sum'], mins=cells['min'], maxs=cells['max']
+        )}
+
+    def _base_cells(self):
+        """All partitions' cells concatenated, with their day codes"""
+        if self._base is None:
+            days = sorted(self.partitions)
+            parts = [self.partitions[day] for day in days]
+            self._base = {
+                'day': np.concatenate([np.full(len(p['station']), day) for day, p in zip(days, parts)]),
+                **{
+                    key: np.concatenate([p[key] for p in parts])
+                    for key in ('station', 'train', 'hour', 'count', 'sum', 'min', 'max')
+                }
+            } if parts else None
+        return self._base
+
+    def _histogram_cells(self):
+        """All partitions' histogram cells concatenated, with entries re-indexed"""
+        if self._histogram is None:
+            days = sorted(self.partitions)
+            cells, entries, offset = [], [], 0
+            for day in days:
+                histogram = self.partitions[day]['histogram']
+                cells.append((np.full(len(histogram['station']), day), histogram['station'], histogram['hour']))
+                entries.append((
+                    histogram['entry_cell'] + offset, histogram['entry_bin'],
+                    histogram['entry_measure'], histogram['entry_count']
+                ))
+                offset += len(histogram['station'])
+
+            self._histogram = {
+                'day': np.concatenate([c[0] for c in cells]),
+                'station': np.concatenate([c[1] for c in cells]),
+                'hour': np.concatenate([c[2] for c in cells]),
+                'entry_cell': np.concatenate([e[0] for e in entries]),
+                'entry_bin': np.concatenate([e[1] for e in entries]),
+                'entry_measure': np.concatenate([e[2] for e in entries]),
+                'entry_count': np.concatenate([e[3] for e in entries])
+            } if days else None
+        return self._histogram
+
+    @staticmethod
+    def _dimension_codes(cells, dimension):
+        """Codes of one dimension for a set of cells, deriving weekday from day"""
+        if dimension == 'weekday':
+            return (cells['day'] + 3) % 7 if 'weekday' not in cells else cells['weekday']
+        return cells[dimension]
+
+    def _group(self, cells, dimensions):
+        """Group codes of cells by dimensions, and the codes of each group"""
+        if not dimensions:
+            return np.zeros(len(cells['count']), dtype=np.int64), {}
+
+        # Mixed-radix key over the dimension codes, then dense group codes
+        codes = [self._dimension_codes(cells, dimension) for dimension in dimensions]
+        key = codes[0].astype(np.int64)
+        for code in codes[1:]:
+            key = key * (int(code.max()) + 1 if len(code) else 1) + code
+        groups, uniques = pd.factorize(key)
+
+        keys = {}
+        for dimension, code in zip(dimensions, codes):
+            keys[dimension] = np.empty(len(uniques), dtype=np.int64)
+            keys[dimension][groups] = code
+        return groups, keys
+
+    def _cuboid(self, dimensions):
+        """Cells aggregated to a set of dimensions, rolled up from the closest cached cuboid"""
+        dimensions = tuple(d for d in CUBE_DIMENSIONS if d in dimensions)
+        self._load_views()
+        cuboid = self._cuboids.get(dimensions)
+        if cuboid is not None:
+            return cuboid
+
+        # Roll up from the smallest cached cuboid that has every dimension
+        # needed, falling back to the base cells
+        needed = {'day' if d == 'weekday' else d for d in dimensions}
+        sources = [
+            c for dims, c in self._cuboids.items()
+            if set(dims) >= set(dimensions) or set(dims) >= needed
+        ]
+        source = min(sources, key=lambda c: len(c['count'])) if sources else self._base_cells()
+
+        cuboid = self._cuboids[dimensions] = self._roll_up(source, dimensions)
+        return cuboid
+
+    def _load_views(self):
+        """Concatenate the partitions' materialized views into day-level cuboids"""
+        days = sorted(self.partitions)
+        for view in MATERIALIZED_VIEWS:
+            dimensions = ('day',) + view
+            if dimensions in self._cuboids:
+                continue
+            parts = [self.partitions[day]['views'][view] for day in days]
+            self._cuboids[dimensions] = {
+                'day': np.concatenate([np.full(len(p['count']), day) for day, p in zip(days, parts)]),
+                **{key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+            }
+
+    def _encode_filter(self, dimension, values):
+        """Codes matching a where-clause value for one dimension"""
+        if dimension == 'day':
+            if isinstance(values, tuple):
+                start, end = (pd.Timestamp(v).value // _DAY_NS for v in values)
+                return ('range', start, end)
+            values = [pd.Timestamp(v).value // _DAY_NS for v in np.atleast_1d(values)]
+        elif dimension in ('station', 'train'):
+            dictionary = self.stations if dimension == 'station' else self.trains
+            values = [dictionary.codes[str(v)] for v in np.atleast_1d(values) if str(v) in dictionary.codes]
+        return ('in', np.asarray(np.atleast_1d(values), dtype=np.int64))
+
+    def _filter_mask(self, cells, where):
+        """Mask of the cells matching every where clause"""
+        mask = np.ones(len(next(iter(cells.values()))), dtype=bool)
+        for dimension, values in (where or {}).items():
+            codes = self._dimension_codes(cells, dimension)
+            clause = self._encode_filter(dimension, values)
+            if clause[0] == 'range':
+                mask &= (codes >= clause[1]) & (codes <= clause[2])
+            else:
+                mask &= np.isin(codes, clause[1])
+        return mask
+
+    def _labels(self, dimension, codes):
+        """Readable labels for dimension codes"""
+        if dimension == 'day':
+            return pd.to_datetime(codes * _DAY_NS)
+        if dimension == 'station':
+            return np.asarray(self.stations.labels, dtype=object)[codes]
+        if dimension == 'train':
+            return np.asarray(self.trains.labels, dtype=object)[codes]
+        return codes
+
+    def query(self, by=None, measure='delay_minutes', where=None, percentiles=None):
+        """
+        Slice, dice, roll up or drill down the cube
+
+        Rolling up drops dimensions from by and drilling down adds them;
+        the cuboids behind each answer are cached until the next update.
+
+        Args:
+            by (str or list): Dimensions from CUBE_DIMENSIONS to group by
+            measure (str): One of CUBE_MEASURES
+            where (dict): Dimension -> label, list of labels or, for day,
+                a (start, end) tuple of dates, inclusive
+            percentiles (iterable): Optional delay percentiles in [0, 100]; only
+                available for HISTOGRAM_DIMENSIONS
+
+        Returns:
+            pd.DataFrame: count, mean, min, max (and pXX) per group
+        """
+
+        by = [] if by is None else [by] if isinstance(by, str) else list(by)
+        where = where or {}
+        unknown = (set(by) | set(where)) - set(CUBE_DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown cube dimensions: {sorted(unknown)}")
+        if percentiles and (set(by) | set(where)) - set(HISTOGRAM_DIMENSIONS):
+            raise ValueError(f"Delay percentiles can only be grouped or filtered by {HISTOGRAM_DIMENSIONS}")
+
+        m = CUBE_MEASURES.index(measure)
+        with self._lock:
+            if self._base_cells() is None:
+                return pd.DataFrame(columns=['count', 'mean', 'min', 'max'])
+
+            cuboid = self._cuboid(set(by) | set(where))
+            if where:
+                # Filter on the finer cuboid, then roll the matches up to by
+                mask = self._filter_mask({d: cuboid[d] for d in cuboid if d in CUBE_DIMENSIONS}, where)
+                selected = {key: values[mask] for key, values in cuboid.items()}
+                result = self._roll_up(selected, tuple(d for d in CUBE_DIMENSIONS if d in by))
+            else:
+                result = cuboid
+
+            dimensions = list(dict.fromkeys(by))
+            count = result['count'][:, m]
+            frame = pd.DataFrame({
+                'count': count.astype(np.int64),
+                'mean': np.where(count > 0, result['sum'][:, m] / np.where(count > 0, count, 1), np.nan),
+                'min': np.where(count > 0, result['min'][:, m], np.nan),
+                'max': np.where(count > 0, result['max'][:, m], np.nan)
+            })
+
+            if percentiles:
+                values = self._percentiles(dimensions, where, m, percentiles, result)
+                for q, column in values.items():
+                    frame[f'p{q}'] = np.clip(column, frame['min'], frame['max'])
+
+            if dimensions:
+                labels = [self._labels(d, result[d]) for d in dimensions]
+                if len(dimensions) > 1:
+                    frame.index = pd.MultiIndex.from_arrays(labels, names=dimensions)
+                else:
+                    frame.index = pd.Index(labels[0], name=dimensions[0])
+                frame = frame.sort_index()
+
+        return frame[frame['count'] > 0]
+
+    def _percentiles(self, dimensions, where, m, percentiles, result):
+        """Percentiles per result group from the merged delay histograms"""
+        histogram = self._histogram_cells()
+        cell_mask = self._filter_mask({d: histogram[d] for d in ('day', 'station', 'hour')}, where)
+
+        # Map every histogram cell to its result group through the group's codes
+        if dimensions:
+            result_keys = np.zeros(len(result[dimensions[0]]), dtype=np.int64)
+            cell_keys = np.zeros(len(histogram['day']), dtype=np.int64)
+            for d in dimensions:
+                size = int(max(result[d].max(initial=0), self._dimension_codes(histogram, d).max(initial=0))) + 1
+                result_keys = result_keys * size + result[d]
+                cell_keys = cell_keys * size + self._dimension_codes(histogram, d)
+            order = np.argsort(result_keys)
+            position = np.searchsorted(result_keys[order], cell_keys)
+            position = np.minimum(position, len(order) - 1)
+            cell_group = np.where(result_keys[order][position] == cell_keys, order[position], -1)
+        else:
+            cell_group = np.zeros(len(histogram['day']), dtype=np.int64)
+        cell_group = np.where(cell_mask, cell_group, -1)
+
+        entry_group = cell_group[histogram['entry_cell']]
+        keep = (entry_group >= 0) & (histogram['entry_measure'] == m)
+        n_groups = len(result['count'])
+        counts = np.bincount(
+            entry_group[keep] * self.n_bins + histogram['entry_bin'][keep],
+            weights=histogram['entry_count'][keep], minlength=n_groups * self.n_bins
+        ).reshape(n_groups, self.n_bins)
+
+        # Linear interpolation inside the bin holding each percentile
+        cumulative = np.cumsum(counts, axis=1)
+        totals = cumulative[:, -1]
+        values = {}
+        for q in percentiles:
+            target = q / 100.0 * totals
+            bins = np.minimum((cumulative < target[:, None]).sum(axis=1), self.n_bins - 1)
+            before = np.where(bins > 0, cumulative[np.arange(n_groups), bins - 1], 0)
+            inside = counts[np.arange(n_groups), bins]
+            fraction = np.where(inside > 0, (target - before) / np.where(inside > 0, inside, 1), 0)
+            low, high = self.bin_edges[bins], self.bin_edges[bins + 1]
+            values[q] = np.where(totals > 0, low + (high - low) * fraction, np.nan)
+        return values
+
+
+@st.cache_resource(show_spinner=False)
+def get_movement_cube():
+    """
+    Process-wide movement cube shared by all sessions
+
+    Returns:
+        MovementCube: Cube to update with the movement log and query
+    """
+
+    return MovementCube()
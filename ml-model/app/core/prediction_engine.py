@@ -6,6 +6,8 @@ import pickle
 import json
 from pathlib import Path
 import random
+from .data_loader import generate_sample_asset_data
+from .kpi_engine import KPIEngine
 
 # Get the project root directory
 PROJECT_ROOT = Path(__file__).parent.parent.parent
@@ -74,97 +76,160 @@ class ConflictPredictor:
 class MaintenancePredictor:
     """AI model for predictive maintenance scheduling"""
     
-    def __init__(self):
+    # Ordinal priority levels; lower code means more urgent
+    PRIORITY_LEVELS = np.array(["Critical", "High", "Medium", "Low"], dtype=object)
+    
+    MAINTENANCE_TYPES = np.array(
+        ["Emergency Repair", "Corrective Maintenance", "Preventive Maintenance"], dtype=object
+    )
+    
+    # Per asset type: base cost (₹), design life (years), health loss per day at rated usage
+    ASSET_PROFILES = {
+        "Locomotive": {"base_cost": 500000, "design_life": 35, "degradation": 0.15},
+        "Track": {"base_cost": 200000, "design_life": 25, "degradation": 0.10},
+        "Signal": {"base_cost": 50000, "design_life": 20, "degradation": 0.08},
+        "Switch": {"base_cost": 150000, "design_life": 20, "degradation": 0.12},
+        "Bridge": {"base_cost": 1000000, "design_life": 100, "degradation": 0.02}
+    }
+    DEFAULT_PROFILE = {"base_cost": 100000, "design_life": 30, "degradation": 0.10}
+    
+    RISK_FACTORS = {
+        "Locomotive": ["Engine wear", "Brake system", "Electrical components"],
+        "Track": ["Rail wear", "Ballast condition", "Joint integrity"],
+        "Signal": ["Lamp failure", "Cable degradation", "Weather exposure"],
+        "Switch": ["Point mechanism", "Detection circuits", "Locking system"],
+        "Bridge": ["Structural fatigue", "Foundation settlement", "Joint expansion"]
+    }
+    
+    # Health score below which an asset needs maintenance
+    MAINTENANCE_THRESHOLD = 70
+    
+    def __init__(self, seed=None):
         self.model_loaded = False
+        self.rng = np.random.default_rng(seed)
         
     def predict_maintenance_needs(self, asset_data, prediction_days=30):
         """
         Predict maintenance requirements for railway assets
         
         Args:
-            asset_data (pd.DataFrame): Asset health and usage data
+            asset_data (pd.DataFrame): Asset health and usage data (see score_assets)
             prediction_days (int): Days ahead to predict
         
         Returns:
             list: Maintenance predictions with priorities
         """
         
-        predictions = []
+        return self.score_assets(asset_data, prediction_days).to_dict('records')
+    
+    def score_assets(self, asset_data, prediction_days=30):
+        """
+        Score every asset in one vectorized pass
         
-        # Simulate maintenance prediction logic
-        asset_types = ["Locomotive", "Track", "Signal", "Switch", "Bridge"]
+        Args:
+            asset_data (pd.DataFrame): One row per asset with 'asset_id', 'asset_type',
+                'health_score' (0-100), 'age_years', 'usage_intensity' (share of rated
+                duty cycle) and optional 'location'. Sample assets are generated when None.
+                Assets without a numeric health score cannot be scored and are left out.
+            prediction_days (int): Days ahead to predict
         
-        for asset_type in asset_types:
-            for i in range(random.randint(2, 8)):
-                asset_id = f"{asset_type[:3].upper()}-{random.randint(100, 999):03d}"
-                
-                # Simulate health scoring
-                base_health = random.uniform(60, 95)
-                days_until_maintenance = random.randint(1, prediction_days)
-                
-                prediction = {
-                    "asset_id": asset_id,
-                    "asset_type": asset_type,
-                    "current_health_score": round(base_health, 1),
-                    "predicted_failure_probability": round(100 - base_health, 1),
-                    "days_until_maintenance": days_until_maintenance,
-                    "maintenance_type": self._get_maintenance_type(base_health),
-                    "estimated_cost": self._estimate_cost(asset_type, base_health),
-                    "priority": self._calculate_priority(base_health, days_until_maintenance),
-                    "risk_factors": self._identify_risk_factors(asset_type),
-                    "location": f"KM {random.randint(10, 200)}"
-                }
-                predictions.append(prediction)
+        Returns:
+            pd.DataFrame: Predictions sorted by priority, then days until maintenance
+        """
         
-        return sorted(predictions, key=lambda x: (x["priority"], x["days_until_maintenance"]))
-    
-    def _get_maintenance_type(self, health_score):
-        """Determine maintenance type based on health score"""
-        if health_score < 70:
-            return "Emergency Repair"
-        elif health_score < 80:
-            return "Corrective Maintenance"
-        else:
-            return "Preventive Maintenance"
-    
-    def _estimate_cost(self, asset_type, health_score):
-        """Estimate maintenance cost"""
-        base_costs = {
-            "Locomotive": 500000,
-            "Track": 200000,
-            "Signal": 50000,
-            "Switch": 150000,
-            "Bridge": 1000000
-        }
+        if asset_data is None:
+            asset_data = generate_sample_asset_data(seed=self.rng)
+        
+        health = pd.to_numeric(asset_data['health_score'], errors='coerce')
+        scored = np.isfinite(health.to_numpy(dtype=np.float64))
+        if not scored.all():
+            asset_data = asset_data[scored]
+        
+        n_assets = len(asset_data)
+        health = health.to_numpy(dtype=np.float64)[scored]
+        age = self._column(asset_data, 'age_years', 0.0)
+        usage = self._column(asset_data, 'usage_intensity', 1.0)
+        
+        # Assets without a type get their own code and the default profile,
+        # rather than the -1 from factorize indexing the last type
+        type_codes, type_names = pd.factorize(asset_data['asset_type'])
+        type_names = list(type_names) + [None]
+        type_codes = np.where(type_codes < 0, len(type_names) - 1, type_codes)
+        profiles = [self.ASSET_PROFILES.get(name, self.DEFAULT_PROFILE) for name in type_names]
+        base_cost = np.array([p["base_cost"] for p in profiles], dtype=np.float64)[type_codes]
+        design_life = np.array([p["design_life"] for p in profiles], dtype=np.float64)[type_codes]
+        degradation = np.array([p["degradation"] for p in profiles], dtype=np.float64)[type_codes]
+        
+        # Older and harder-worked assets lose health faster
+        daily_loss = degradation * (1 + usage) * (1 + age / design_life)
+        
+        headroom = health - self.MAINTENANCE_THRESHOLD
+        days_until = np.clip(np.floor(headroom / daily_loss), 1, prediction_days).astype(np.int64)
+        
+        projected_health = health - daily_loss * prediction_days
+        failure_probability = 100 / (1 + np.exp((projected_health - self.MAINTENANCE_THRESHOLD) / 5))
+        
+        maintenance_code = np.select([health < 70, health < 80], [0, 1], default=2)
+        priority_code = np.select(
+            [
+                (health < 70) | (days_until <= 7),
+                (health < 80) | (days_until <= 14),
+                (health < 90) | (days_until <= 21)
+            ],
+            [0, 1, 2],
+            default=3
+        )
         
-        base_cost = base_costs.get(asset_type, 100000)
-        health_multiplier = 1 + (100 - health_score) / 100
+        estimated_cost = (base_cost * (1 + (100 - health) / 100)).astype(np.int64)
         
-        return int(base_cost * health_multiplier)
-    
-    def _calculate_priority(self, health_score, days_until):
-        """Calculate maintenance priority"""
-        if health_score < 70 or days_until <= 7:
-            return "Critical"
-        elif health_score < 80 or days_until <= 14:
-            return "High"
-        elif health_score < 90 or days_until <= 21:
-            return "Medium"
+        if 'location' in asset_data.columns:
+            location = asset_data['location'].to_numpy()
         else:
-            return "Low"
-    
-    def _identify_risk_factors(self, asset_type):
-        """Identify risk factors for different asset types"""
-        risk_factors = {
-            "Locomotive": ["Engine wear", "Brake system", "Electrical components"],
-            "Track": ["Rail wear", "Ballast condition", "Joint integrity"],
-            "Signal": ["Lamp failure", "Cable degradation", "Weather exposure"],
-            "Switch": ["Point mechanism", "Detection circuits", "Locking system"],
-            "Bridge": ["Structural fatigue", "Foundation settlement", "Joint expansion"]
-        }
+            location = np.full(n_assets, "N/A", dtype=object)
+        
+        predictions = pd.DataFrame({
+            "asset_id": asset_data['asset_id'].to_numpy(),
+            "asset_type": asset_data['asset_type'].to_numpy(),
+            "current_health_score": np.round(health, 1),
+            "predicted_failure_probability": np.round(failure_probability, 1),
+            "days_until_maintenance": days_until,
+            "maintenance_type": self.MAINTENANCE_TYPES[maintenance_code],
+            "estimated_cost": estimated_cost,
+            "priority": self.PRIORITY_LEVELS[priority_code],
+            "priority_rank": priority_code,
+            "risk_factors": self._risk_factors(type_codes, type_names),
+            "location": location
+        })
         
-        return random.sample(risk_factors.get(asset_type, ["General wear"]), 
-                           min(2, len(risk_factors.get(asset_type, ["General wear"]))))
+        order = np.lexsort((days_until, priority_code))
+        return predictions.take(order).reset_index(drop=True)
+    
+    def _column(self, asset_data, column, default):
+        """Numeric column as float array, or a constant when missing"""
+        if column in asset_data.columns:
+            return asset_data[column].fillna(default).to_numpy(dtype=np.float64)
+        return np.full(len(asset_data), default, dtype=np.float64)
+    
+    def _risk_factors(self, type_codes, type_names):
+        """Pick two risk factors per asset from its type's catalogue, as lists"""
+        if not len(type_codes):
+            return []
+        
+        # Every ordered pair of factors per type, indexed by type code
+        pair_tables = []
+        for name in type_names:
+            factors = self.RISK_FACTORS.get(name, ["General wear"])
+            pairs = [(a, b) for a in factors for b in factors if a != b] or [tuple(factors)]
+            table = np.empty(len(pairs), dtype=object)
+            table[:] = pairs
+            pair_tables.append(table)
+        
+        counts = np.array([len(table) for table in pair_tables])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        all_pairs = np.concatenate(pair_tables)
+        
+        choice = self.rng.integers(0, counts[type_codes])
+        return [list(pair) for pair in all_pairs[offsets[type_codes] + choice]]
 
 class AnomalyDetector:
     """AI model for detecting operational anomalies"""
@@ -178,12 +243,13 @@ class AnomalyDetector:
             "pressure": (40, 60)
         }
     
-    def detect_anomalies(self, sensor_data):
+    def detect_anomalies(self, sensor_data, asset_id=None):
         """
         Detect anomalies in real-time sensor data
         
         Args:
             sensor_data (dict): Current sensor readings
+            asset_id (str): Asset the readings come from
         
         Returns:
             list: Detected anomalies with severity levels
@@ -200,11 +266,14 @@ class AnomalyDetector:
                     severity = self._calculate_anomaly_severity(sensor, value, min_val, max_val)
                     
                     anomaly = {
+                        "asset": asset_id,
                         "sensor": sensor,
+                        "type": "Below Range" if value < min_val else "Above Range",
                         "current_value": value,
                         "normal_range": f"{min_val}-{max_val}",
                         "severity": severity,
                         "timestamp": datetime.now(),
+                        "message": f"{sensor.title()} {value:.1f} outside normal range {min_val}-{max_val}",
                         "recommendation": self._get_anomaly_recommendation(sensor, severity)
                     }
                     anomalies.append(anomaly)
@@ -252,12 +321,14 @@ class SimulationEngine:
     def __init__(self):
         self.simulation_id = 0
     
-    def run_scenario_simulation(self, scenario_params):
+    def run_scenario_simulation(self, scenario_params, progress_callback=None):
         """
         Run a simulation based on scenario parameters
         
         Args:
             scenario_params (dict): Simulation parameters
+            progress_callback (callable): Optional callback(fraction, message) for progress
+                updates; it may raise to abort the simulation
         
         Returns:
             dict: Simulation results and metrics
@@ -269,14 +340,28 @@ class SimulationEngine:
         scenario_type = scenario_params.get("type", "general")
         duration_hours = scenario_params.get("duration_hours", 8)
         
+        self._report_progress(progress_callback, 0.0, "Preparing scenario")
+        
         if scenario_type == "delay_impact":
-            return self._simulate_delay_impact(scenario_params)
+            self._report_progress(progress_callback, 0.3, "Simulating delay impact")
+            results = self._simulate_delay_impact(scenario_params)
         elif scenario_type == "route_optimization":
-            return self._simulate_route_optimization(scenario_params)
+            self._report_progress(progress_callback, 0.3, "Optimizing routes")
+            results = self._simulate_route_optimization(scenario_params)
         elif scenario_type == "capacity_planning":
-            return self._simulate_capacity_planning(scenario_params)
+            self._report_progress(progress_callback, 0.3, "Planning capacity")
+            results = self._simulate_capacity_planning(scenario_params)
         else:
-            return self._simulate_general_scenario(scenario_params)
+            self._report_progress(progress_callback, 0.3, "Simulating scenario")
+            results = self._simulate_general_scenario(scenario_params)
+        
+        self._report_progress(progress_callback, 1.0, "Simulation complete")
+        return results
+    
+    def _report_progress(self, progress_callback, fraction, message):
+        """Forward a progress update to the caller, if it asked for one"""
+        if progress_callback is not None:
+            progress_callback(fraction, message)
     
     def _simulate_delay_impact(self, params):
         """Simulate the impact of a delay"""
@@ -377,16 +462,18 @@ class SimulationEngine:
 
 # Main prediction functions that interface with the Streamlit app
 
-def get_conflict_predictions(train_data=None, hours_ahead=2):
+def get_conflict_predictions(train_data=None, hours_ahead=2, pipeline=None):
     """
     Get conflict predictions for the next few hours
     
     Args:
         train_data (pd.DataFrame): Current train data
         hours_ahead (int): Hours to predict ahead
+        pipeline (AlertPipeline): Optional pipeline deduplicating and rate-limiting
+            conflicts by location and conflict type
     
     Returns:
-        list: Predicted conflicts
+        list: Predicted conflicts; with a pipeline, only the newly raised ones
     """
     
     predictor = ConflictPredictor()
@@ -399,32 +486,40 @@ def get_conflict_predictions(train_data=None, hours_ahead=2):
             'scheduled_time': [datetime.now() + timedelta(hours=i) for i in range(10)]
         })
     
-    return predictor.predict_conflicts(train_data, hours_ahead)
+    conflicts = predictor.predict_conflicts(train_data, hours_ahead)
+    return conflicts if pipeline is None else pipeline.process(conflicts)
 
-def predict_maintenance(asset_data=None, days_ahead=30):
+def predict_maintenance(asset_data=None, days_ahead=30, seed=None, as_frame=False):
     """
     Predict maintenance requirements
     
     Args:
         asset_data (pd.DataFrame): Asset condition data
         days_ahead (int): Days to predict ahead
+        seed (int): Optional seed for reproducible sample data and risk factors
+        as_frame (bool): Return a DataFrame instead of a list of dicts
     
     Returns:
-        list: Maintenance predictions
+        list or pd.DataFrame: Maintenance predictions
     """
     
-    predictor = MaintenancePredictor()
+    predictor = MaintenancePredictor(seed=seed)
+    if as_frame:
+        return predictor.score_assets(asset_data, days_ahead)
     return predictor.predict_maintenance_needs(asset_data, days_ahead)
 
-def detect_anomalies(sensor_data=None):
+def detect_anomalies(sensor_data=None, asset_id=None, pipeline=None):
     """
     Detect real-time anomalies
     
     Args:
         sensor_data (dict): Current sensor readings
+        asset_id (str): Asset the readings come from
+        pipeline (AlertPipeline): Optional pipeline deduplicating and rate-limiting
+            anomalies by asset, sensor and direction
     
     Returns:
-        list: Detected anomalies
+        list: Detected anomalies; with a pipeline, only the newly raised ones
     """
     
     detector = AnomalyDetector()
@@ -438,21 +533,23 @@ def detect_anomalies(sensor_data=None):
             'pressure': random.uniform(35, 65)
         }
     
-    return detector.detect_anomalies(sensor_data)
+    anomalies = detector.detect_anomalies(sensor_data, asset_id)
+    return anomalies if pipeline is None else pipeline.process(anomalies)
 
-def run_simulation(scenario_params):
+def run_simulation(scenario_params, progress_callback=None):
     """
     Run a simulation scenario
     
     Args:
         scenario_params (dict): Simulation parameters
+        progress_callback (callable): Optional callback(fraction, message) for progress updates
     
     Returns:
         dict: Simulation results
     """
     
     engine = SimulationEngine()
-    return engine.run_scenario_simulation(scenario_params)
+    return engine.run_scenario_simulation(scenario_params, progress_callback)
 
 def optimize_route(start_point, end_point, constraints=None):
     """
@@ -533,21 +630,8 @@ def calculate_performance_metrics(operational_data):
             'fuel_efficiency': 0
         }
     
-    metrics = {}
-    
-    # On-time performance (trains with delay <= 5 minutes)
-    if 'delay_minutes' in operational_data.columns:
-        on_time_trains = operational_data[operational_data['delay_minutes'] <= 5]
-        metrics['on_time_performance'] = (len(on_time_trains) / len(operational_data)) * 100
-        metrics['average_delay'] = operational_data['delay_minutes'].mean()
-    
-    # Capacity utilization
-    if 'passenger_count' in operational_data.columns:
-        max_capacity = 1200  # Assumed max capacity per train
-        metrics['capacity_utilization'] = (operational_data['passenger_count'].mean() / max_capacity) * 100
-    
-    # Fuel efficiency
-    if 'fuel_level_percent' in operational_data.columns:
-        metrics['fuel_efficiency'] = operational_data['fuel_level_percent'].mean()
+    # Whole KPI set in one vectorized pass; KPIs whose source column is
+    # missing are left out
+    kpis = KPIEngine(operational_data).compute().iloc[0].drop('movements')
     
-    return metrics
\ No newline at end of file
+    return {name: float(value) for name, value in kpis.items()}
\ No newline at end of file
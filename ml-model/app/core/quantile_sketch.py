@@ -0,0 +1,179 @@
+import numpy as np
+
+# Centroid budget of a digest; roughly compression / 2 centroids are kept
+DEFAULT_COMPRESSION = 400
+
+# Values buffered before they are folded into the centroids, per unit of compression
+BUFFER_FACTOR = 5
+
+
+class TDigest:
+    """Mergeable t-digest for streaming quantiles in constant memory"""
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        # (means, weights) pending a compress; weights is None for raw values
+        self._buffer = []
+        self._buffered = 0
+
+    @property
+    def count(self):
+        """Total weight of the values added so far"""
+        return float(self.weights.sum()) + self._buffered
+
+    def update(self, values):
+        """
+        Add values to the digest
+
+        Args:
+            values (array-like): Values to add; NaN and infinite values are ignored
+
+        Returns:
+            TDigest: self, for chaining
+        """
+
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return self
+
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._buffer.append((values, None))
+        self._buffered += len(values)
+
+        if self._buffered > BUFFER_FACTOR * self.compression:
+            self._compress()
+        return self
+
+    def merge(self, *others):
+        """
+        Fold other digests into this one
+
+        Args:
+            *others (TDigest): Digests built on other partitions or processes
+
+        Returns:
+            TDigest: self, for chaining
+        """
+
+        # Centroids and pending values of the others are folded in by a single
+        # compress, leaving the others untouched
+        for other in others:
+            self._buffer.append((other.means, other.weights))
+            self._buffer.extend(other._buffer)
+            self._buffered += other.count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+        self._compress()
+        return self
+
+    def _compress(self):
+        """Merge buffered values and centroids into at most ~compression / 2 centroids"""
+        if not self._buffer:
+            return
+
+        means = np.concatenate([self.means] + [values for values, _ in self._buffer])
+        weights = np.concatenate([self.weights] + [
+            np.ones(len(values)) if weights is None else weights for values, weights in self._buffer
+        ])
+        self._buffer = []
+        self._buffered = 0
+        if not len(means):
+            return
+
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+
+        # Merging-digest size bound: a cluster may span at most one unit of
+        # the arcsine scale function k, which keeps clusters small near the
+        # tails. k is monotone, so each cluster ends at the last centroid whose
+        # right edge is within one unit of the cluster's left edge.
+        cumulative = np.cumsum(weights)
+        k_left = self._scale(np.r_[0.0, cumulative[:-1]] / total)
+        k_right = self._scale(cumulative / total)
+
+        starts = []
+        start = 0
+        while start < len(means):
+            starts.append(start)
+            end = np.searchsorted(k_right, k_left[start] + 1, side='right')
+            start = max(int(end), start + 1)
+
+        merged_weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / merged_weights
+        self.weights = merged_weights
+
+    def _scale(self, q):
+        """Arcsine scale function k(q), spanning compression / 2 units over [0, 1]"""
+        return self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+
+    def quantiles(self, qs):
+        """
+        Estimated quantiles
+
+        Args:
+            qs (array-like): Quantiles in [0, 1]
+
+        Returns:
+            np.ndarray: One estimate per quantile, NaN if the digest is empty
+        """
+
+        qs = np.asarray(qs, dtype=np.float64)
+        self._compress()
+        if not len(self.means):
+            return np.full(qs.shape, np.nan)
+
+        # Each centroid sits at the middle of the weight it covers; the
+        # extremes anchor both ends
+        total = self.weights.sum()
+        positions = np.r_[0.0, np.cumsum(self.weights) - self.weights / 2, total]
+        values = np.r_[self.min, self.means, self.max]
+        return np.interp(np.clip(qs, 0, 1) * total, positions, values)
+
+    def quantile(self, q):
+        """Estimated value at quantile q in [0, 1]"""
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self):
+        """Plain representation for sending a digest to another process"""
+        self._compress()
+        return {
+            'compression': self.compression,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': self.min,
+            'max': self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a digest from to_dict output"""
+        digest = cls(compression=data['compression'])
+        digest.means = np.asarray(data['means'], dtype=np.float64)
+        digest.weights = np.asarray(data['weights'], dtype=np.float64)
+        digest.min = data['min']
+        digest.max = data['max']
+        return digest
+
+
+def merge_sketches(sketches, compression=DEFAULT_COMPRESSION):
+    """
+    Merge digests from several buckets, partitions or worker processes
+
+    Args:
+        sketches (iterable): TDigest objects or their to_dict output
+        compression (int): Compression of the merged digest
+
+    Returns:
+        TDigest: New digest covering every input
+    """
+
+    digests = [TDigest.from_dict(s) if isinstance(s, dict) else s for s in sketches]
+    return TDigest(compression=compression).merge(*digests)
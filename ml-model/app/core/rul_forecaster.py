@@ -0,0 +1,272 @@
+import numpy as np
+import pandas as pd
+
+# Health score at which an asset is considered failed / due for replacement
+DEFAULT_FAILURE_THRESHOLD = 70
+
+# Days of history each degradation curve is fitted on
+DEFAULT_WINDOW_DAYS = 30
+
+
+class RULForecaster:
+    """Batch remaining-useful-life forecaster over rolling health score windows
+
+    Every asset gets a linear fit of health against time and an exponential
+    fit (linear in log health) over the last ``window_days`` daily scores.
+    The least-squares sums are kept per asset, so a new day of scores updates
+    all fits in O(assets) without revisiting the history.
+    """
+
+    def __init__(self, window_days=DEFAULT_WINDOW_DAYS, failure_threshold=DEFAULT_FAILURE_THRESHOLD, model='auto'):
+        if model not in ('auto', 'linear', 'exponential'):
+            raise ValueError(f"Unsupported model: {model}")
+
+        self.window_days = window_days
+        self.failure_threshold = failure_threshold
+        self.model = model
+
+        # Start with no assets and an empty window, so update alone can build the model
+        self.fit(pd.DataFrame(dtype=np.float64))
+
+    def fit(self, health_history):
+        """
+        Fit degradation curves for all assets at once
+
+        Args:
+            health_history (pd.DataFrame): Daily health scores, either wide (DatetimeIndex
+                rows, one column per asset) or long with 'asset_id', 'date' and 'health_score'
+
+        Returns:
+            RULForecaster: The fitted forecaster
+        """
+
+        if {'asset_id', 'date', 'health_score'}.issubset(health_history.columns):
+            health_history = health_history.pivot_table(
+                index='date', columns='asset_id', values='health_score', aggfunc='last'
+            )
+
+        health_history = health_history.sort_index()
+        recent = health_history.iloc[-self.window_days:]
+
+        self.asset_ids = np.asarray(recent.columns, dtype=object)
+        self._index = pd.Index(self.asset_ids)
+        self.last_date = pd.Timestamp(recent.index[-1]) if len(recent) else None
+
+        # Ring buffer of the window, oldest row first; NaN marks a missing day
+        values = recent.to_numpy(dtype=np.float64)
+        self._buffer = np.full((self.window_days, len(self.asset_ids)), np.nan)
+        if len(values):
+            self._buffer[-len(values):] = values
+        self._head = 0
+
+        # x is measured in days relative to the newest row (newest = 0)
+        x = np.arange(-self.window_days + 1, 1, dtype=np.float64)[:, None]
+        valid = np.isfinite(self._buffer)
+        y = np.where(valid, self._buffer, 0.0)
+        log_y = np.where(valid, np.log(np.clip(self._buffer, 1e-6, None)), 0.0)
+        xv = np.where(valid, x, 0.0)
+
+        self._n = valid.sum(axis=0).astype(np.float64)
+        self._sx = xv.sum(axis=0)
+        self._sxx = (xv * xv).sum(axis=0)
+        self._sy = y.sum(axis=0)
+        self._sxy = (xv * y).sum(axis=0)
+        self._syy = (y * y).sum(axis=0)
+        self._sl = log_y.sum(axis=0)
+        self._sxl = (xv * log_y).sum(axis=0)
+        self._sll = (log_y * log_y).sum(axis=0)
+        self._current = self._latest_scores()
+
+        self._params = None
+        return self
+
+    def update(self, daily_scores, date=None):
+        """
+        Roll the window forward by one day with new health scores
+
+        Works without a prior fit: starting from an empty window, a series of
+        updates gives the same curves as fitting the same days at once.
+
+        Args:
+            daily_scores (pd.Series or dict): Health score per asset id for the new day;
+                assets without a score are treated as missing for that day
+            date (datetime): Date of the scores; defaults to the day after the last one
+
+        Returns:
+            RULForecaster: The updated forecaster
+        """
+
+        scores = pd.Series(daily_scores, dtype=np.float64)
+        new_assets = scores.index.difference(self._index)
+        if len(new_assets):
+            self._add_assets(np.asarray(new_assets, dtype=object))
+
+        new_row = np.full(len(self.asset_ids), np.nan)
+        new_row[self._index.get_indexer(scores.index)] = scores.to_numpy()
+
+        # Every existing point moves one day further into the past (x -> x - 1)
+        self._sxx = self._sxx - 2 * self._sx + self._n
+        self._sxy = self._sxy - self._sy
+        self._sxl = self._sxl - self._sl
+        self._sx = self._sx - self._n
+
+        # Drop the oldest day, which now sits at x = -window_days
+        oldest = self._buffer[self._head]
+        self._accumulate(oldest, -float(self.window_days), -1.0)
+
+        # Add the new day at x = 0
+        self._accumulate(new_row, 0.0, 1.0)
+        self._buffer[self._head] = new_row
+        self._head = (self._head + 1) % self.window_days
+
+        observed = np.isfinite(new_row)
+        self._current[observed] = new_row[observed]
+
+        if date is not None:
+            self.last_date = pd.Timestamp(date)
+        elif self.last_date is not None:
+            self.last_date = self.last_date + pd.Timedelta(days=1)
+
+        self._params = None
+        return self
+
+    @property
+    def params(self):
+        """Fitted curve parameters per asset, recomputed lazily after updates"""
+        if self._params is None:
+            self._params = self._solve()
+        return self._params
+
+    def predict_rul(self):
+        """
+        Remaining useful life for every asset
+
+        Returns:
+            pd.DataFrame: Current health, fitted trend and days until the failure threshold
+        """
+
+        params = self.params
+        rul = params['rul_days']
+
+        failure_date = pd.Series(pd.NaT, index=range(len(rul)), dtype='datetime64[ns]')
+        if self.last_date is not None:
+            # Flat or improving trends can extrapolate beyond any useful date
+            finite = rul <= 100 * 365
+            failure_date[finite] = self.last_date + pd.to_timedelta(np.ceil(rul[finite]), unit='D')
+
+        return pd.DataFrame({
+            'asset_id': self.asset_ids,
+            'current_health': np.round(self._current, 1),
+            'model': params['model'],
+            'daily_change': np.round(params['daily_change'], 3),
+            'r_squared': np.round(params['r_squared'], 3),
+            'rul_days': np.round(rul, 1),
+            'predicted_failure_date': failure_date.to_numpy()
+        })
+
+    def forecast(self, horizon_days=30):
+        """
+        Forecast health scores for the coming days
+
+        Args:
+            horizon_days (int): Number of days to forecast
+
+        Returns:
+            pd.DataFrame: Forecast health, one row per day and one column per asset
+        """
+
+        params = self.params
+        t = np.arange(1, horizon_days + 1, dtype=np.float64)[:, None]
+
+        linear = params['intercept'] + params['slope'] * t
+        exponential = np.exp(params['log_intercept'] + params['log_slope'] * t)
+        values = np.where(params['model'] == 'exponential', exponential, linear)
+
+        start = self.last_date if self.last_date is not None else pd.Timestamp.now().normalize()
+        index = pd.date_range(start + pd.Timedelta(days=1), periods=horizon_days, freq='D')
+        return pd.DataFrame(np.clip(values, 0, 100), index=index, columns=self.asset_ids)
+
+    def _accumulate(self, row, x, sign):
+        """Add (sign=1) or remove (sign=-1) one day of scores from the sums"""
+        valid = np.isfinite(row)
+        y = np.where(valid, row, 0.0)
+        log_y = np.where(valid, np.log(np.clip(row, 1e-6, None)), 0.0)
+        w = sign * valid
+
+        self._n += w
+        self._sx += w * x
+        self._sxx += w * x * x
+        self._sy += sign * y
+        self._sxy += sign * x * y
+        self._syy += sign * y * y
+        self._sl += sign * log_y
+        self._sxl += sign * x * log_y
+        self._sll += sign * log_y * log_y
+
+    def _solve(self):
+        """Closed-form least squares for all assets from the running sums"""
+        n = np.maximum(self._n, 1)
+        sxx_c = self._sxx - self._sx ** 2 / n
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope, intercept, r2 = self._regress(n, sxx_c, self._sy, self._sxy, self._syy)
+            log_slope, log_intercept, log_r2 = self._regress(n, sxx_c, self._sl, self._sxl, self._sll)
+
+        if self.model == 'linear':
+            use_exp = np.zeros(len(slope), dtype=bool)
+        elif self.model == 'exponential':
+            use_exp = np.ones(len(slope), dtype=bool)
+        else:
+            use_exp = log_r2 > r2
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Days (from the newest score) until the curve crosses the threshold
+            linear_rul = (self.failure_threshold - intercept) / slope
+            exp_rul = (np.log(self.failure_threshold) - log_intercept) / log_slope
+
+        linear_rul = np.where(slope < 0, linear_rul, np.inf)
+        exp_rul = np.where(log_slope < 0, exp_rul, np.inf)
+        rul = np.clip(np.where(use_exp, exp_rul, linear_rul), 0, None)
+
+        # Not enough points to fit a trend
+        rul[self._n < 2] = np.inf
+
+        # Daily change expressed in health points for both models
+        daily_change = np.where(use_exp, self._current * (np.exp(log_slope) - 1), slope)
+
+        return {
+            'slope': np.nan_to_num(slope),
+            'intercept': np.where(np.isfinite(intercept), intercept, self._current),
+            'log_slope': np.nan_to_num(log_slope),
+            'log_intercept': np.where(np.isfinite(log_intercept), log_intercept, np.log(np.clip(self._current, 1e-6, None))),
+            'model': np.where(use_exp, 'exponential', 'linear').astype(object),
+            'daily_change': np.nan_to_num(daily_change),
+            'r_squared': np.nan_to_num(np.where(use_exp, log_r2, r2)),
+            'rul_days': rul
+        }
+
+    def _regress(self, n, sxx_c, sy, sxy, syy):
+        """Slope, intercept at x = 0 and R² from running sums"""
+        sxy_c = sxy - self._sx * sy / n
+        syy_c = syy - sy ** 2 / n
+
+        slope = sxy_c / sxx_c
+        intercept = (sy - slope * self._sx) / n
+        r2 = slope * sxy_c / syy_c
+        return slope, intercept, r2
+
+    def _latest_scores(self):
+        """Most recent observed score per asset from the buffer"""
+        ordered = np.roll(self._buffer, -self._head, axis=0)
+        latest = pd.DataFrame(ordered).ffill().to_numpy()[-1]
+        return np.asarray(latest, dtype=np.float64)
+
+    def _add_assets(self, new_ids):
+        """Extend all per-asset state with assets seen for the first time"""
+        k = len(new_ids)
+        self.asset_ids = np.concatenate([self.asset_ids, new_ids])
+        self._index = pd.Index(self.asset_ids)
+        self._buffer = np.concatenate([self._buffer, np.full((self.window_days, k), np.nan)], axis=1)
+        for name in ('_n', '_sx', '_sxx', '_sy', '_sxy', '_syy', '_sl', '_sxl', '_sll'):
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(k)]))
+        self._current = np.concatenate([self._current, np.full(k, np.nan)])
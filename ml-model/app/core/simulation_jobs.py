@@ -0,0 +1,263 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import streamlit as st
+
+from .prediction_engine import SimulationEngine
+
+# Job lifecycle states
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class SimulationCancelled(Exception):
+    """Raised inside a running simulation once its job has been cancelled"""
+
+
+class SimulationJob:
+    """State of one simulation submitted to the job manager"""
+
+    def __init__(self, scenario_params, owner=None, progress_callback=None):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.scenario_params = scenario_params
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.submitted_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+
+        self._progress_callback = progress_callback
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+        self._lock = threading.Lock()
+        self._future = None
+
+    @property
+    def done(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+
+    def report_progress(self, fraction, message=None):
+        """
+        Record progress from inside the running simulation
+
+        Args:
+            fraction (float): Completed share between 0 and 1
+            message (str): Optional description of the current stage
+
+        Raises:
+            SimulationCancelled: If the job was cancelled since the last update
+        """
+
+        if self._cancel_event.is_set():
+            raise SimulationCancelled(self.job_id)
+
+        with self._lock:
+            self.progress = min(max(float(fraction), 0.0), 1.0)
+            if message is not None:
+                self.message = message
+
+        self._notify()
+
+    def wait(self, timeout=None):
+        """Block until the job has finished; returns False on timeout"""
+        return self._done_event.wait(timeout)
+
+    def to_dict(self):
+        """Snapshot of the job state for display"""
+        with self._lock:
+            return {
+                'job_id': self.job_id,
+                'owner': self.owner,
+                'status': self.status,
+                'progress': self.progress,
+                'message': self.message,
+                'submitted_at': self.submitted_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'error': self.error
+            }
+
+    def _set_state(self, status, message=None, **fields):
+        with self._lock:
+            self.status = status
+            if message is not None:
+                self.message = message
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+        if status in FINISHED_STATES:
+            self._done_event.set()
+        self._notify()
+
+    def _notify(self):
+        if self._progress_callback is None:
+            return
+        try:
+            self._progress_callback(self)
+        except Exception:
+            # A broken listener must never take the simulation down with it
+            pass
+
+
+class SimulationJobManager:
+    """Runs scenario simulations on a background worker pool"""
+
+    def __init__(self, max_workers=4, engine_factory=SimulationEngine):
+        self.engine_factory = engine_factory
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pragati-sim")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, scenario_params, owner=None, progress_callback=None):
+        """
+        Queue a scenario simulation
+
+        Args:
+            scenario_params (dict): Parameters for SimulationEngine.run_scenario_simulation
+            owner (str): Optional owner key (e.g. a session id) used to list jobs
+            progress_callback (callable): Optional callback(job) on every state change
+
+        Returns:
+            str: Id of the submitted job
+        """
+
+        job = SimulationJob(dict(scenario_params), owner, progress_callback)
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        job._future = self._executor.submit(self._run, job)
+        return job.job_id
+
+    def get(self, job_id):
+        """Return the job with the given id, or None if unknown"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """Return a status snapshot for a job, or None if unknown"""
+        job = self.get(job_id)
+        return job.to_dict() if job is not None else None
+
+    def result(self, job_id, timeout=None):
+        """
+        Retrieve the result of a job, waiting for it if necessary
+
+        Args:
+            job_id (str): Job to fetch
+            timeout (float): Seconds to wait; None waits indefinitely
+
+        Returns:
+            dict or None: Simulation results, None if the job did not complete
+
+        Raises:
+            KeyError: If the job id is unknown
+            TimeoutError: If the job is still running after the timeout
+        """
+
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+
+        if not job.wait(timeout):
+            raise TimeoutError(f"Simulation job {job_id} still running")
+
+        return job.result if job.status == COMPLETED else None
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job
+
+        Queued jobs are dropped immediately; running jobs stop at their next
+        progress update.
+
+        Returns:
+            bool: True if the job was cancelled or will stop shortly
+        """
+
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+
+        job._cancel_event.set()
+        if job._future is not None and job._future.cancel():
+            job._set_state(CANCELLED, "Cancelled before start", finished_at=datetime.now())
+
+        return True
+
+    def list_jobs(self, owner=None):
+        """List job snapshots, newest first, optionally for one owner"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if owner is None or job.owner == owner]
+
+        snapshots = [job.to_dict() for job in jobs]
+        return sorted(snapshots, key=lambda x: x['submitted_at'], reverse=True)
+
+    def clear_finished(self, owner=None):
+        """Forget finished jobs; returns the number removed"""
+        with self._lock:
+            finished = [
+                job_id for job_id, job in self._jobs.items()
+                if job.done and (owner is None or job.owner == owner)
+            ]
+            for job_id in finished:
+                del self._jobs[job_id]
+
+        return len(finished)
+
+    def shutdown(self, wait=False):
+        """Cancel outstanding jobs and stop the worker pool"""
+        with self._lock:
+            job_ids = list(self._jobs)
+
+        for job_id in job_ids:
+            self.cancel(job_id)
+
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job):
+        """Worker entry point for a single job"""
+        if job.cancel_requested:
+            job._set_state(CANCELLED, "Cancelled before start", finished_at=datetime.now())
+            return
+
+        job._set_state(RUNNING, "Starting", started_at=datetime.now())
+
+        try:
+            engine = self.engine_factory()
+            result = engine.run_scenario_simulation(job.scenario_params, job.report_progress)
+        except SimulationCancelled:
+            job._set_state(CANCELLED, "Cancelled", finished_at=datetime.now())
+        except Exception as e:
+            job._set_state(FAILED, "Simulation failed", error=str(e), finished_at=datetime.now())
+        else:
+            job._set_state(COMPLETED, "Simulation complete", progress=1.0, result=result,
+                           finished_at=datetime.now())
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_manager(max_workers=4):
+    """
+    Process-wide simulation job manager shared by all sessions
+
+    Args:
+        max_workers (int): Number of background worker threads
+
+    Returns:
+        SimulationJobManager: Shared job manager
+    """
+
+    return SimulationJobManager(max_workers=max_workers)
@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Movement history kept for playback, counted back from the newest sample
+DEFAULT_WINDOW_HOURS = 24
+
+# Spacing of the precomputed keyframes
+DEFAULT_KEYFRAME_MINUTES = 15
+
+# Samples further apart than this are not interpolated; the train is shown
+# at its last sample until it is this stale, then drops off the map
+DEFAULT_MAX_GAP_MINUTES = 15
+
+# Per-sample columns carried into each frame alongside the position
+FRAME_COLUMNS = [
+    'current_station', 'next_station', 'delay_minutes', 'speed_kmh',
+    'platform', 'status', 'passenger_count'
+]
+
+
+class TrajectoryPlayback:
+    """Time-indexed train positions for scrubbing through movement history"""
+
+    def __init__(self, movement_data, window_hours=DEFAULT_WINDOW_HOURS,
+                 keyframe_minutes=DEFAULT_KEYFRAME_MINUTES, max_gap_minutes=DEFAULT_MAX_GAP_MINUTES):
+        data = movement_data.dropna(subset=['timestamp', 'train_number', 'lat', 'lon'])
+        times = pd.to_datetime(data['timestamp']).to_numpy(dtype='datetime64[ns]')
+
+        if window_hours is not None and len(times):
+            keep = times >= times.max() - np.timedelta64(int(window_hours * 3600), 's')
+            data, times = data[keep], times[keep]
+
+        self.max_gap = max_gap_minutes * 60.0
+        self.keyframe_step = keyframe_minutes * 60.0
+        self.origin = times.min() if len(times) else np.datetime64(0, 'ns')
+
+        # Seconds since the first sample, as float so interpolation stays cheap
+        seconds = (times - self.origin) / np.timedelta64(1, 's')
+        codes, labels = pd.factorize(data['train_number'].astype(str))
+
+        # Columnar store sorted by train, then time: each train is one
+        # contiguous, time-ordered run of samples
+        order = np.lexsort((seconds, codes))
+        self.train_labels = np.asarray(labels, dtype=object)
+        self.codes = codes[order]
+        self.seconds = seconds[order]
+        self.lat = data['lat'].to_numpy(dtype=np.float64)[order]
+        self.lon = data['lon'].to_numpy(dtype=np.float64)[order]
+        self.attributes = {
+            column: data[column].to_numpy()[order]
+            for column in FRAME_COLUMNS if column in data.columns
+        }
+
+        n_trains = len(self.train_labels)
+        self.run_start = np.searchsorted(self.codes, np.arange(n_trains), side='left')
+        self.run_end = np.searchsorted(self.codes, np.arange(n_trains), side='right')
+        self.duration = float(self.seconds.max()) if len(self.seconds) else 0.0
+
+        self._build_keyframes()
+
+    @property
+    def start_time(self):
+        """Timestamp of the first sample in the playback window"""
+        return pd.Timestamp(self.origin)
+
+    @property
+    def end_time(self):
+        """Timestamp of the last sample in the playback window"""
+        return pd.Timestamp(self.origin + np.timedelta64(int(round(self.duration * 1e9)), 'ns'))
+
+    def _build_keyframes(self):
+        """Index of each train's latest sample at every keyframe time"""
+        self.keyframe_times = np.arange(0.0, self.duration + self.keyframe_step, self.keyframe_step)
+        n_trains = len(self.train_labels)
+
+        # Trains and times are packed into one sortable key so a single
+        # searchsorted call resolves every (keyframe, train) pair
+        span = self.duration + 1.0
+        key = self.codes * span + self.seconds
+        query = np.arange(n_trains)[None, :] * span + self.keyframe_times[:, None]
+        index = np.searchsorted(key, query.ravel(), side='right').reshape(query.shape) - 1
+
+        # -1 marks a train that has no sample yet at that keyframe
+        self.keyframes = np.where(index >= self.run_start[None, :], index, -1).astype(np.int64)
+
+        # Longest run of samples a train has between two keyframes bounds the
+        # forward scan needed from the nearest keyframe
+        if len(self.seconds):
+            bucket = np.minimum((self.seconds // self.keyframe_step).astype(np.int64), len(self.keyframe_times) - 1)
+            per_bucket = np.bincount(self.codes * len(self.keyframe_times) + bucket)
+            self.max_steps = int(per_bucket.max())
+        else:
+            self.max_steps = 0
+
+    def _seconds(self, timestamp):
+        """Seconds since the playback origin for a timestamp"""
+        return (pd.Timestamp(timestamp).to_datetime64() - self.origin) / np.timedelta64(1, 's')
+
+    def sample_index(self, timestamp):
+        """
+        Index of every train's latest sample at or before a timestamp
+
+        Args:
+            timestamp (datetime-like): Point in time to look up
+
+        Returns:
+            np.ndarray: One sample index per train, -1 where the train has none yet
+        """
+
+        t = self._seconds(timestamp)
+        if len(self.keyframe_times) == 0 or t < 0:
+            return np.full(len(self.train_labels), -1, dtype=np.int64)
+
+        # Binary search for the keyframe, then step each train forward over
+        # the few samples recorded since it
+        k = min(np.searchsorted(self.keyframe_times, t, side='right') - 1, len(self.keyframe_times) - 1)
+        index = self.keyframes[k].copy()
+        candidate = np.where(index < 0, self.run_start, index + 1)
+
+        for _ in range(self.max_steps):
+            step = (candidate < self.run_end) & (self.seconds[np.minimum(candidate, len(self.seconds) - 1)] <= t)
+            if not step.any():
+                break
+            index = np.where(step, candidate, index)
+            candidate = candidate + step
+
+        return index
+
+    def frame(self, timestamp):
+        """
+        Interpolated fleet state at a point in time
+
+        Args:
+            timestamp (datetime-like): Point in time to show
+
+        Returns:
+            pd.DataFrame: One row per train on the network, with train_number,
+                lat, lon, the sample time and the attributes of its latest sample
+        """
+
+        t = self._seconds(timestamp)
+        index = self.sample_index(timestamp)
+
+        active = index >= 0
+        trains = np.flatnonzero(active)
+        current = index[active]
+
+        # Linear interpolation towards the next sample of the same train,
+        # unless the gap is too long to trust a straight line
+        following = np.minimum(current + 1, max(len(self.seconds) - 1, 0))
+        has_next = (current + 1 < self.run_end[trains])
+        gap = self.seconds[following] - self.seconds[current]
+        moving = has_next & (gap > 0) & (gap <= self.max_gap)
+        fraction = np.where(moving, (t - self.seconds[current]) / np.where(gap > 0, gap, 1.0), 0.0)
+
+        # Trains whose history ended (or paused) too long ago leave the map
+        visible = moving | (t - self.seconds[current] <= self.max_gap)
+        trains, current, following, fraction = trains[visible], current[visible], following[visible], fraction[visible]
+
+        frame = pd.DataFrame({
+            'train_number': self.train_labels[trains],
+            'lat': self.lat[current] + (self.lat[following] - self.lat[current]) * fraction,
+            'lon': self.lon[current] + (self.lon[following] - self.lon[current]) * fraction,
+            'sample_time': self.origin + (self.seconds[current] * 1e9).astype('timedelta64[ns]')
+        })
+        for column, values in self.attributes.items():
+            frame[column] = values[current]
+
+        return frame
+
+    def timeline(self, step_minutes=5):
+        """
+        Evenly spaced timestamps covering the playback window
+
+        Args:
+            step_minutes (int): Spacing between timestamps
+
+        Returns:
+            list: pd.Timestamp values from start_time to end_time
+        """
+
+        return list(pd.date_range(self.start_time, self.end_time, freq=f'{step_minutes}min'))
+
+
+@st.cache_resource(show_spinner=False)
+def build_trajectory_playback(movement_data, window_hours=DEFAULT_WINDOW_HOURS,
+                              keyframe_minutes=DEFAULT_KEYFRAME_MINUTES):
+    """
+    Build (and cache per process) the playback index for a movement log
+
+    Args:
+        movement_data (pd.DataFrame): Train movement log with timestamp, train_number, lat and lon
+        window_hours (float): Hours of history to keep before the newest sample; None keeps all
+        keyframe_minutes (int): Spacing of the precomputed keyframes
+
+    Returns:
+        TrajectoryPlayback: Index ready for frame lookups
+    """
+
+    return TrajectoryPlayback(movement_data, window_hours=window_hours, keyframe_minutes=keyframe_minutes)
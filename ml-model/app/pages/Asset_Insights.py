@@ -4,6 +4,16 @@ import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime, timedelta
+from core.rul_forecaster import RULForecaster
+from core.data_loader import load_movement_data, load_static_data
+from core.prediction_engine import predict_maintenance, detect_anomalies
+from core.alert_pipeline import get_alert_pipeline
+from core.maintenance_scheduler import schedule_maintenance
+from components.figure_cache import cached_figure
+from components.downsampling import downsample_indices
+from components.chart_rendering import apply_render_mode, uses_webgl
+from components.alert_store import AlertStore
+from components.kpi_component import display_alert_summary
 
 # Page config
 st.set_page_config(
@@ -158,31 +168,39 @@ if "Loco #30556" in selected_asset:
         # Make recent performance worse
         loco_performance[-7:] = loco_performance[-7:] - np.linspace(0, 10, 7)
         
-        fig_performance = go.Figure()
+        def build_performance_chart():
+            fig = go.Figure()
         
-        fig_performance.add_trace(go.Scatter(
-            x=dates,
-            y=normal_performance,
-            mode='lines',
-            name='30-day Average',
-            line=dict(color='blue', dash='dash')
-        ))
+            fig.add_trace(go.Scatter(
+                x=dates,
+                y=normal_performance,
+                mode='lines',
+                name='30-day Average',
+                line=dict(color='blue', dash='dash')
+            ))
         
-        fig_performance.add_trace(go.Scatter(
-            x=dates,
-            y=loco_performance,
-            mode='lines+markers',
-            name='Loco #30556',
-            line=dict(color='red'),
-            marker=dict(size=4)
-        ))
+            fig.add_trace(go.Scatter(
+                x=dates,
+                y=loco_performance,
+                mode='lines+markers',
+                name='Loco #30556',
+                line=dict(color='red'),
+                marker=dict(size=4)
+            ))
         
-        fig_performance.update_layout(
-            title='Acceleration Performance Trend',
-            xaxis_title='Date',
-            yaxis_title='Performance Index',
-            height=400,
-            showlegend=True
+            fig.update_layout(
+                title='Acceleration Performance Trend',
+                xaxis_title='Date',
+                yaxis_title='Performance Index',
+                height=400,
+                showlegend=True
+            )
+            return apply_render_mode(fig)
+        
+        fig_performance = cached_figure(
+            'asset_acceleration_trend',
+            build_performance_chart,
+            traces=[{'x': dates, 'y': normal_performance}, {'x': dates, 'y': loco_performance}]
         )
         
         st.plotly_chart(fig_performance, use_container_width=True)
@@ -191,35 +209,43 @@ if "Loco #30556" in selected_asset:
         st.markdown("#### ⚡ Power Consumption Analysis")
         
         # Generate power consumption data
-        hours = list(range(24))
-        normal_power = [800, 750, 700, 680, 720, 850, 950, 1200, 1300, 1250, 1100, 1150,
-                       1200, 1250, 1300, 1350, 1400, 1200, 1100, 1000, 950, 900, 850, 820]
-        loco_power = [p * 1.09 for p in normal_power]  # 9% higher consumption
+        hours = np.arange(24)
+        normal_power = np.array([800, 750, 700, 680, 720, 850, 950, 1200, 1300, 1250, 1100, 1150,
+                                 1200, 1250, 1300, 1350, 1400, 1200, 1100, 1000, 950, 900, 850, 820])
+        loco_power = normal_power * 1.09  # 9% higher consumption
         
-        fig_power = go.Figure()
+        def build_power_chart():
+            fig = go.Figure()
         
-        fig_power.add_trace(go.Scatter(
-            x=hours,
-            y=normal_power,
-            mode='lines',
-            name='Normal Range',
-            line=dict(color='green')
-        ))
+            fig.add_trace(go.Scatter(
+                x=hours,
+                y=normal_power,
+                mode='lines',
+                name='Normal Range',
+                line=dict(color='green')
+            ))
         
-        fig_power.add_trace(go.Scatter(
-            x=hours,
-            y=loco_power,
-            mode='lines+markers',
-            name='Loco #30556 (Current)',
-            line=dict(color='orange'),
-            marker=dict(size=4)
-        ))
+            fig.add_trace(go.Scatter(
+                x=hours,
+                y=loco_power,
+                mode='lines+markers',
+                name='Loco #30556 (Current)',
+                line=dict(color='orange'),
+                marker=dict(size=4)
+            ))
+        
+            fig.update_layout(
+                title='24-Hour Power Consumption Pattern',
+                xaxis_title='Hour of Day',
+                yaxis_title='Power Draw (kW)',
+                height=400
+            )
+            return apply_render_mode(fig)
         
-        fig_power.update_layout(
-            title='24-Hour Power Consumption Pattern',
-            xaxis_title='Hour of Day',
-            yaxis_title='Power Draw (kW)',
-            height=400
+        fig_power = cached_figure(
+            'asset_power_consumption',
+            build_power_chart,
+            traces=[{'x': hours, 'y': normal_power}, {'x': hours, 'y': loco_power}]
         )
         
         st.plotly_chart(fig_power, use_container_width=True)
@@ -277,6 +303,24 @@ if "Loco #30556" in selected_asset:
         for i, rec in enumerate(recommendations, 1):
             st.markdown(f"**{i}.** {rec}")
 
+# Live sensor alerts, deduplicated and rate-limited so a noisy sensor
+# cannot flood the panel on every rerun
+st.markdown("## 📡 Live Sensor Alerts")
+
+alert_pipeline = get_alert_pipeline()
+detect_anomalies(asset_id=selected_asset, pipeline=alert_pipeline)
+display_alert_summary(AlertStore(alert_pipeline.recent(selected_asset)), page_size=5, key="sensor_alerts")
+
+suppressed_alerts = alert_pipeline.suppressed(selected_asset)
+if suppressed_alerts:
+    st.warning(f"⚠️ {suppressed_alerts} lower-priority alerts for this asset were rate-limited")
+
+pipeline_stats = alert_pipeline.get_stats()
+st.caption(
+    f"{pipeline_stats['received']} readings flagged · {pipeline_stats['coalesced']} repeats coalesced · "
+    f"{pipeline_stats['suppressed']} rate-limited"
+)
+
 # Asset Performance Overview
 st.markdown("## 📊 Fleet Performance Overview")
 
@@ -292,13 +336,21 @@ with col1:
     
     df_loco = pd.DataFrame(loco_data)
     
-    fig_efficiency = px.bar(
-        df_loco,
-        x='Locomotive',
-        y='Efficiency (%)',
-        color='Status',
-        title='Locomotive Efficiency Comparison',
-        color_discrete_map={'Flagged': 'red', 'Good': 'orange', 'Excellent': 'green'}
+    def build_efficiency_chart():
+        fig = px.bar(
+            df_loco,
+            x='Locomotive',
+            y='Efficiency (%)',
+            color='Status',
+            title='Locomotive Efficiency Comparison',
+            color_discrete_map={'Flagged': 'red', 'Good': 'orange', 'Excellent': 'green'}
+        )
+        return fig
+    
+    fig_efficiency = cached_figure(
+        'fleet_efficiency',
+        build_efficiency_chart,
+        data=df_loco
     )
     
     st.plotly_chart(fig_efficiency, use_container_width=True)
@@ -307,17 +359,30 @@ with col2:
     # Maintenance schedule
     st.markdown("### 📅 Upcoming Maintenance Schedule")
     
+    @st.cache_data(ttl=3600)
+    def load_maintenance_schedule():
+        work_orders = predict_maintenance(seed=42, as_frame=True)
+        return schedule_maintenance(
+            work_orders, load_static_data(), load_movement_data(),
+            time_budget_seconds=2, seed=42
+        )
+    
+    maintenance_plan = load_maintenance_schedule()
+    upcoming = maintenance_plan['schedule'].head(8)
+    
     maintenance_schedule = {
-        'Asset': ['Loco #30245', 'Track UJN-INDB', 'Signal NAD/5', 'Coach Set A', 'OHE RTM-NAD'],
-        'Type': ['A-Check', 'Ultrasonic Test', 'Relay Replacement', 'Interior Refresh', 'Insulator Check'],
-        'Due Date': ['18/09/2025', '20/09/2025', '22/09/2025', '25/09/2025', '28/09/2025'],
-        'Priority': ['High', 'Medium', 'Low', 'Medium', 'High']
+        'Asset': upcoming['asset_id'],
+        'Type': upcoming['maintenance_type'],
+        'Depot': upcoming['depot_name'],
+        'Block': upcoming['block_start'].dt.strftime('%d/%m/%Y %H:%M'),
+        'Due Date': upcoming['due_date'].dt.strftime('%d/%m/%Y'),
+        'Priority': upcoming['priority']
     }
     
     df_maintenance = pd.DataFrame(maintenance_schedule)
     
     def highlight_priority(row):
-        if row['Priority'] == 'High':
+        if row['Priority'] in ('Critical', 'High'):
             return ['background-color: #ffebee'] * len(row)
         elif row['Priority'] == 'Medium':
             return ['background-color: #fff3e0'] * len(row)
@@ -326,6 +391,11 @@ with col2:
     
     styled_maintenance = df_maintenance.style.apply(highlight_priority, axis=1)
     st.dataframe(styled_maintenance, use_container_width=True, hide_index=True)
+    st.caption(
+        f"{len(maintenance_plan['schedule'])} work orders scheduled, "
+        f"{maintenance_plan['late_orders']} past due, "
+        f"{len(maintenance_plan['unscheduled'])} awaiting depot capacity"
+    )
 
 # Predictive Analytics
 st.markdown("## 🔮 Predictive Analytics")
@@ -336,25 +406,33 @@ with col1:
     st.markdown("### 📈 Failure Probability")
     
     # Risk assessment gauge
-    fig_gauge = go.Figure(go.Indicator(
-        mode = "gauge+number+delta",
-        value = 23,
-        domain = {'x': [0, 1], 'y': [0, 1]},
-        title = {'text': "Loco #30556 Risk Score"},
-        delta = {'reference': 15},
-        gauge = {
-            'axis': {'range': [None, 100]},
-            'bar': {'color': "darkblue"},
-            'steps': [
-                {'range': [0, 25], 'color': "lightgray"},
-                {'range': [25, 50], 'color': "gray"},
-                {'range': [50, 100], 'color': "red"}],
-            'threshold': {
-                'line': {'color': "red", 'width': 4},
-                'thickness': 0.75,
-                'value': 90}}))
-    
-    fig_gauge.update_layout(height=300)
+    def build_risk_gauge():
+        fig = go.Figure(go.Indicator(
+            mode = "gauge+number+delta",
+            value = 23,
+            domain = {'x': [0, 1], 'y': [0, 1]},
+            title = {'text': "Loco #30556 Risk Score"},
+            delta = {'reference': 15},
+            gauge = {
+                'axis': {'range': [None, 100]},
+                'bar': {'color': "darkblue"},
+                'steps': [
+                    {'range': [0, 25], 'color': "lightgray"},
+                    {'range': [25, 50], 'color': "gray"},
+                    {'range': [50, 100], 'color': "red"}],
+                'threshold': {
+                    'line': {'color': "red", 'width': 4},
+                    'thickness': 0.75,
+                    'value': 90}}))
+    
+        fig.update_layout(height=300)
+        return fig
+    
+    fig_gauge = cached_figure(
+        'failure_risk_gauge',
+        build_risk_gauge
+    )
+    
     st.plotly_chart(fig_gauge, use_container_width=True)
 
 with col2:
@@ -381,12 +459,20 @@ with col3:
     
     df_cost = pd.DataFrame(cost_data)
     
-    fig_cost = px.bar(
-        df_cost,
-        x='Scenario',
-        y='Cost (₹)',
-        title='Maintenance Cost Comparison',
-        color='Scenario'
+    def build_cost_chart():
+        fig = px.bar(
+            df_cost,
+            x='Scenario',
+            y='Cost (₹)',
+            title='Maintenance Cost Comparison',
+            color='Scenario'
+        )
+        return fig
+    
+    fig_cost = cached_figure(
+        'maintenance_cost',
+        build_cost_chart,
+        data=df_cost
     )
     
     st.plotly_chart(fig_cost, use_container_width=True)
@@ -396,39 +482,112 @@ st.markdown("## 📉 Asset Health Trends")
 
 # Generate trend data for multiple assets
 asset_names = ['Loco #30556', 'Loco #30245', 'Loco #30789', 'Track UJN-INDB', 'Signal RTM/3']
-dates = pd.date_range(start='2025-08-01', end='2025-09-16', freq='D')
 
-fig_trends = go.Figure()
+@st.cache_resource
+def load_health_forecaster(asset_names, start_date, end_date):
+    dates = pd.date_range(start=start_date, end=end_date, freq='D')
+    
+    # Sample health scores for all assets at once
+    rng = np.random.default_rng(10)
+    health_scores = 95 + rng.normal(0, 2, (len(dates), len(asset_names)))  # Stable
+    
+    # Loco #30556 is declining
+    health_scores[:, 0] += rng.normal(-2, 2, len(dates))
+    health_scores[-14:, 0] -= np.linspace(0, 8, 14)
+    
+    history = pd.DataFrame(health_scores, index=dates, columns=list(asset_names))
+    
+    # Fitted on the history up to yesterday; today's scores roll in the way a daily feed would
+    forecaster = RULForecaster(window_days=14).fit(history.iloc[:-1])
+    forecaster.update(history.iloc[-1], date=history.index[-1])
+    return history, forecaster
+
+health_history, health_forecaster = load_health_forecaster(tuple(asset_names), '2025-08-01', '2025-09-16')
+health_forecast = health_forecaster.forecast(horizon_days=14)
+history_days = (health_history.index[-1] - health_history.index[0]).days + 1
+
+# Zoom window; every series is re-decimated to the chart width for the visible range
+trend_dates = health_history.index.union(health_forecast.index)
+trend_start, trend_end = st.select_slider(
+    "Zoom",
+    options=list(trend_dates),
+    value=(trend_dates[0], trend_dates[-1]),
+    format_func=lambda d: d.strftime('%d %b'),
+    key="health_trend_zoom"
+)
+zoom_range = None if (trend_start, trend_end) == (trend_dates[0], trend_dates[-1]) else (trend_start, trend_end)
 
-colors = ['red', 'green', 'blue', 'orange', 'purple']
+# History and forecast trace of every asset, in the order they are drawn
+health_traces = []
+for asset in asset_names:
+    for series in (health_history[asset], health_forecast[asset]):
+        keep = downsample_indices(series.index.to_numpy(), series.to_numpy(), x_range=zoom_range)
+        health_traces.append({'x': series.index[keep], 'y': series.to_numpy()[keep]})
 
-for i, asset in enumerate(asset_names):
-    # Generate sample health scores
-    np.random.seed(i * 10)
-    if asset == 'Loco #30556':
-        health_scores = 95 + np.random.normal(-2, 3, len(dates))  # Declining
-        health_scores[-14:] = health_scores[-14:] - np.linspace(0, 8, 14)
-    else:
-        health_scores = 95 + np.random.normal(0, 2, len(dates))  # Stable
-    
-    fig_trends.add_trace(go.Scatter(
-        x=dates,
-        y=health_scores,
-        mode='lines',
-        name=asset,
-        line=dict(color=colors[i])
-    ))
-
-fig_trends.update_layout(
-    title='Asset Health Score Trends (30 Days)',
-    xaxis_title='Date',
-    yaxis_title='Health Score (%)',
-    height=400,
-    showlegend=True
+def build_health_trends():
+    fig = go.Figure()
+    
+    colors = ['red', 'green', 'blue', 'orange', 'purple']
+    
+    for i, asset in enumerate(asset_names):
+        history, forecast = health_traces[2 * i], health_traces[2 * i + 1]
+        fig.add_trace(go.Scatter(
+            x=history['x'],
+            y=history['y'],
+            mode='lines',
+            name=asset,
+            line=dict(color=colors[i])
+        ))
+        
+        fig.add_trace(go.Scatter(
+            x=forecast['x'],
+            y=forecast['y'],
+            mode='lines',
+            name=f"{asset} (forecast)",
+            line=dict(color=colors[i], dash='dot'),
+            showlegend=False
+        ))
+    
+    fig.add_hline(
+        y=health_forecaster.failure_threshold,
+        line_dash='dash',
+        line_color='gray',
+        annotation_text='Maintenance threshold'
+    )
+    
+    fig.update_layout(
+        title=f'Asset Health Score Trends ({history_days} Days) with {len(health_forecast)}-Day Forecast',
+        xaxis_title='Date',
+        yaxis_title='Health Score (%)',
+        height=400,
+        showlegend=True
+    )
+    return apply_render_mode(fig)
+
+fig_trends = cached_figure(
+    'asset_health_trends',
+    build_health_trends,
+    traces=health_traces,
+    data=[list(asset_names), health_forecaster.failure_threshold, history_days, len(health_forecast)],
+    style={'webgl': uses_webgl(health_traces)}
 )
 
 st.plotly_chart(fig_trends, use_container_width=True)
 
+# Remaining useful life from the fitted degradation curves
+st.markdown("### ⏳ Remaining Useful Life Forecast")
+
+rul = health_forecaster.predict_rul().sort_values('rul_days')
+df_rul = pd.DataFrame({
+    'Asset': rul['asset_id'],
+    'Current Health (%)': rul['current_health'],
+    'Trend (pts/day)': rul['daily_change'],
+    'Model': rul['model'].str.title(),
+    'RUL (days)': rul['rul_days'].where(np.isfinite(rul['rul_days'])).round(0),
+    'Predicted Threshold Date': rul['predicted_failure_date'].dt.strftime('%d/%m/%Y')
+})
+st.dataframe(df_rul, use_container_width=True, hide_index=True)
+
 # Action Buttons
 st.markdown("---")
 col1, col2, col3, col4 = st.columns(4)
@@ -3,10 +3,20 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import folium
-from streamlit_folium import st_folium
 import numpy as np
 from datetime import datetime, timedelta
-import time
+
+from components.map_component import (
+    display_live_map, prepare_base_map, add_live_train_updates, add_heat_tile_layer, add_lod_polylines,
+    release_live_map, live_map_zoom
+)
+from components.heat_tiles import refresh_heat_tiles
+from components.fragment_timing import timed_fragment, fragment_timings
+from components.kpi_component import format_performance_metrics
+from components.figure_cache import cached_figure
+from core.data_loader import load_movement_data
+from core.kpi_aggregates import get_kpi_aggregator
+from core.movement_cube import CUBE_MEASURES, HISTOGRAM_DIMENSIONS, get_movement_cube
 
 # Page config
 st.set_page_config(
@@ -56,10 +66,33 @@ st.markdown(f"**Last Updated:** {current_time}")
 st.markdown("## 🗺️ Live Operations Map")
 st.markdown("**Visible Sections:** RTM-NAD, RTM-DHD, RTM-COR, NAD-UJN, UJN-INDB, UJN-BPL")
 
-# Create the railway map
-def create_railway_map():
+LIVE_MAP_KEY = "divisional_live_map"
+LIVE_MAP_ZOOM = 9
+
+# Refresh cadence (seconds) of each independently rerunning section
+REFRESH_SECONDS = {
+    'map': 10,
+    'advisories': 60,
+    'kpis': 30,
+    'train_table': 15,
+    'signals': 30,
+    'delay_cube': 300
+}
+
+# Train popup rows: label -> column
+TRAIN_POPUP_FIELDS = {
+    'Name': 'name',
+    'Speed (km/h)': 'speed',
+    'Next Stop': 'next_stop',
+    'Delay': 'delay',
+    'Loco Pilot': 'loco_pilot'
+}
+
+# Static base map: built once per process and traffic history day, shared by every session
+@st.cache_resource(show_spinner=False)
+def create_base_map(heat_partition=None):
     # Center map on Ratlam Division
-    m = folium.Map(location=[23.3315, 75.0367], zoom_start=9)
+    m = folium.Map(location=[23.3315, 75.0367], zoom_start=LIVE_MAP_ZOOM)
     
     # Ratlam Division stations with coordinates
     stations = {
@@ -86,6 +119,15 @@ def create_railway_map():
             icon=folium.Icon(color='blue', icon='home')
         ).add_to(m)
     
+    # Pre-rendered traffic density of a past day, drawn under the live trains
+    if heat_partition is not None:
+        add_heat_tile_layer(m, heat_partition, opacity=0.6)
+    
+    return prepare_base_map(m)
+
+# Cached fragment inputs: each refreshes no more often than its fragment
+@st.cache_data(ttl=REFRESH_SECONDS['map'], show_spinner=False)
+def load_live_trains():
     # Sample train positions with specific details
     trains = [
         {
@@ -110,50 +152,182 @@ def create_railway_map():
         }
     ]
     
-    # Add trains to map with detailed tooltips
-    for train in trains:
-        color = 'green' if train['status'] == 'rt' else 'orange' if train['status'] == 'delay' else 'red'
-        
-        folium.Marker(
-            [train['lat'], train['lon']],
-            popup=f"""
-            <b>{train['id']}</b><br>
-            <b>Name:</b> {train['name']}<br>
-            <b>Speed:</b> {train['speed']} km/h<br>
-            <b>Next Stop:</b> {train['next_stop']}<br>
-            <b>Delay:</b> {train['delay']}<br>
-            <b>Loco Pilot:</b> {train['loco_pilot']}
-            """,
-            tooltip=f"{train['id']}",
-            icon=folium.Icon(color=color, icon='train', prefix='fa')
-        ).add_to(m)
-    
-    # Add track sections
-    track_sections = [
+    trains_df = pd.DataFrame(trains).rename(columns={'id': 'train_number'})
+    trains_df['delay_band'] = trains_df['status'].map({'rt': 0, 'delay': 1, 'late': 2})
+    return trains_df
+
+@st.cache_data(ttl=REFRESH_SECONDS['map'], show_spinner=False)
+def load_track_sections():
+    return [
         {'name': 'RTM-NAD', 'coords': [[23.3315, 75.0367], [23.4583, 75.4167]], 'status': 'clear'},
         {'name': 'NAD-UJN', 'coords': [[23.4583, 75.4167], [23.1765, 75.7885]], 'status': 'occupied'},
         {'name': 'UJN-INDB', 'coords': [[23.1765, 75.7885], [22.7196, 75.8577]], 'status': 'occupied'},
     ]
+
+@st.cache_data(ttl=REFRESH_SECONDS['advisories'], show_spinner=False)
+def load_advisories():
+    return [
+        {
+            'key': '1', 'level': 'high',
+            'html': """
+<div class="alert-high">
+    <h4>🚨 ADVISORY CARD 1 - HIGH PRIORITY</h4>
+    <p><strong>Conflict:</strong> Overtake</p>
+    <p><strong>Trains:</strong> 12962 Avantika Exp & 19303 INDB-BPL Exp</p>
+    <p><strong>Location:</strong> near Naranjpura (NRG)</p>
+    <p><strong>Time to Conflict:</strong> 11 minutes</p>
+    <p><strong>Recommended Action:</strong> Halt 19303 on Vikramnagar Loop for 8 min</p>
+    <p><strong>Predicted Outcome:</strong> Avantika Exp RT; 19303 total delay: 12 min</p>
+</div>
+""",
+            'accepted': "Recommendation accepted! Dispatching instructions to station controller.",
+            'simulating': "Opening simulation sandbox with current scenario..."
+        },
+        {
+            'key': '2', 'level': 'medium',
+            'html': """
+<div class="alert-medium">
+    <h4>⚠️ ADVISORY CARD 2 - MEDIUM PRIORITY</h4>
+    <p><strong>Platform Conflict:</strong> Ujjain Jn Platform 3</p>
+    <p><strong>Affected Train:</strong> 22911 Shipra Express</p>
+    <p><strong>Issue:</strong> Platform occupied by delayed goods train</p>
+    <p><strong>Recommendation:</strong> Re-route to Platform 5</p>
+    <p><strong>Impact:</strong> Avoids 20-minute delay</p>
+</div>
+""",
+            'accepted': "Platform re-assignment accepted!",
+            'simulating': "Testing platform reallocation scenario..."
+        }
+    ]
+
+# New movements are folded into the shared rolling aggregates at most once
+# per KPI refresh; reading the KPIs never rescans the movement history
+@st.cache_data(ttl=REFRESH_SECONDS['kpis'], show_spinner=False)
+def refresh_kpi_aggregates():
+    aggregator = get_kpi_aggregator()
+    return aggregator.ingest_new(load_movement_data())
+
+def load_kpis():
+    refresh_kpi_aggregates()
+    aggregator = get_kpi_aggregator()
+    window = aggregator.snapshot()
+    last_hour = aggregator.snapshot(recent_minutes=60)
     
-    for section in track_sections:
-        color = 'red' if section['status'] == 'occupied' else 'green'
-        folium.PolyLine(
-            section['coords'],
-            color=color,
-            weight=3,
-            opacity=0.8,
-            popup=f"{section['name']} - {section['status']}"
-        ).add_to(m)
+    kpis = [
+        {
+            'label': "🎯 Divisional Punctuality",
+            'value': f"{window['on_time_performance']:.1f}%",
+            'delta': f"{last_hour['on_time_performance'] - window['on_time_performance']:+.1f}%"
+        },
+        {
+            'label': "⏱️ Average Delay",
+            'value': f"{window['average_delay']:.1f} mins",
+            'delta': f"{last_hour['average_delay'] - window['average_delay']:+.1f} mins",
+            'delta_color': "inverse"
+        },
+        {
+            'label': "🚂 Trains On Time",
+            'value': f"{window['trains_on_time']}/{window['trains_active']}",
+            'delta': None
+        },
+        {
+            'label': "👥 Capacity Utilization",
+            'value': f"{window['capacity_utilization']:.1f}%",
+            'delta': f"{last_hour['capacity_utilization'] - window['capacity_utilization']:+.1f}%"
+        }
+    ]
+    return kpis, window
+
+# Row colours of the train status table
+STATUS_COLORS = {
+    'On Time': 'background-color: #e8f5e8',
+    'Slight Delay': 'background-color: #fff3e0'
+}
+LATE_COLOR = 'background-color: #ffebee'
+
+@st.cache_data(ttl=REFRESH_SECONDS['train_table'], show_spinner=False)
+def load_train_status():
+    # Create detailed train status table
+    train_status_data = {
+        'Train No.': ['12919', '19303', '22911', '12962', '09351'],
+        'Train Name': ['Malwa SF Express', 'INDB-BPL Express', 'Shipra Express', 'Avantika Express', 'UJN-INDB Passenger'],
+        'Current Location': ['Near NRG', 'Dewas Jn', 'Ratlam Jn', 'Near VKG', 'Ujjain Jn'],
+        'Next Stop': ['UJN', 'UJN', 'NAD', 'UJN', 'DWX'],
+        'Speed (km/h)': [95, 78, 105, 85, 65],
+        'Delay (mins)': [10, 5, 0, 8, 15],
+        'Status': ['Late', 'Slight Delay', 'On Time', 'Slight Delay', 'Late'],
+        'Platform': ['TBD', 'TBD', 'Departed', '5', '2'],
+        'Loco Pilot': ['LP-001', 'LP-045', 'LP-023', 'LP-067', 'LP-012']
+    }
+    
+    df_trains = pd.DataFrame(train_status_data)
     
-    return m
+    # Colour code the status once per refresh rather than per rendered row
+    row_colors = df_trains['Status'].map(STATUS_COLORS).fillna(LATE_COLOR)
+    styles = pd.DataFrame(
+        np.repeat(row_colors.to_numpy()[:, None], len(df_trains.columns), axis=1),
+        index=df_trains.index,
+        columns=df_trains.columns
+    )
+    return df_trains, styles
+
+@st.cache_data(ttl=REFRESH_SECONDS['signals'], show_spinner=False)
+def load_signal_status():
+    signal_data = {
+        'Signal ID': ['RTM/1', 'NAD/3', 'UJN/5', 'INDB/2', 'DWX/1', 'NRG/2'],
+        'Location': ['Ratlam Jn', 'Nagda Jn', 'Ujjain Jn', 'Indore Jn', 'Dewas', 'Naranjipura'],
+        'Aspect': ['Green', 'Yellow', 'Green', 'Red', 'Green', 'Yellow'],
+        'Last Updated': ['10:45', '10:43', '10:44', '10:42', '10:45', '10:44']
+    }
+    track_data = {
+        'Track Section': ['RTM-NAD', 'NAD-UJN', 'UJN-INDB', 'RTM-DHD', 'UJN-VKG'],
+        'Status': ['Clear', 'Occupied', 'Occupied', 'Clear', 'Occupied'],
+        'Occupying Train': ['-', '22911', '19303', '-', '12962'],
+        'Notes': ['Available', 'Shipra Exp', 'INDB-BPL Exp', 'Available', 'Avantika Exp']
+    }
+    return pd.DataFrame(signal_data), pd.DataFrame(track_data)
+
+# Live overlay: train positions and section occupancy, rebuilt on every refresh
+def create_live_overlay(trains_df, base_map, zoom):
+    overlay = folium.FeatureGroup(name='Live Operations')
+    
+    # Only trains that moved, appeared or left since this session's last
+    # refresh are sent; the browser updates its existing markers in place
+    add_live_train_updates(overlay, trains_df, key=LIVE_MAP_KEY, fields=TRAIN_POPUP_FIELDS, base_map=base_map)
+    
+    # Add track sections, with levels of detail around the zoom the map last reported
+    add_lod_polylines(overlay, [
+        (section['coords'], {
+            'color': 'red' if section['status'] == 'occupied' else 'green',
+            'weight': 3,
+            'opacity': 0.8,
+            'popup': f"{section['name']} - {section['status']}"
+        })
+        for section in load_track_sections()
+    ], zoom, min_zoom=LIVE_MAP_ZOOM)
+    
+    return overlay
 
 # Display map
-with st.container():
+@timed_fragment("Live map", run_every=REFRESH_SECONDS['map'])
+def render_live_map():
+    trains_df = load_live_trains()
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        railway_map = create_railway_map()
-        map_data = st_folium(railway_map, width=800, height=500)
+        # Only reads the rendered days; new ones are rendered in the background
+        heat_partitions = refresh_heat_tiles(load_movement_data)
+        history_day = st.selectbox(
+            "Traffic history overlay:", ["None"] + heat_partitions[::-1], key="traffic_history_day"
+        )
+        heat_partition = None if history_day == "None" else history_day
+        
+        # Only the overlay changes between refreshes; the base map stays mounted
+        base_map = create_base_map(heat_partition)
+        display_live_map(
+            base_map, create_live_overlay(trains_df, base_map, live_map_zoom(LIVE_MAP_KEY, LIVE_MAP_ZOOM)),
+            key=LIVE_MAP_KEY, width=800, height=500
+        )
     
     with col2:
         st.markdown("### 🚂 Active Trains")
@@ -164,161 +338,97 @@ with st.container():
         
         st.markdown("---")
         
-        trains_data = [
-            {'Train': '12919', 'Name': 'Malwa SF Express', 'Status': 'Late 10m', 'Speed': '95 km/h'},
-            {'Train': '19303', 'Name': 'INDB-BPL Express', 'Status': 'Late 5m', 'Speed': '78 km/h'},
-            {'Train': '22911', 'Name': 'Shipra Express', 'Status': 'RT', 'Speed': '105 km/h'},
-            {'Train': '12962', 'Name': 'Avantika Express', 'Status': 'Late 8m', 'Speed': '85 km/h'}
-        ]
-        
-        for train in trains_data:
-            status_class = "status-rt" if "RT" in train['Status'] else "status-delay" if "5m" in train['Status'] or "8m" in train['Status'] else "status-late"
+        for train in trains_df.itertuples():
+            status_text = "RT" if train.status == 'rt' else f"Late {train.delay}"
             st.markdown(f"""
-            <div class="train-status {status_class}">
-                <strong>{train['Train']}</strong><br>
-                {train['Name']}<br>
-                {train['Status']} | {train['Speed']}
+            <div class="train-status status-{train.status}">
+                <strong>{train.train_number}</strong><br>
+                {train.name}<br>
+                {status_text} | {train.speed} km/h
             </div>
             """, unsafe_allow_html=True)
 
+# Full reruns (page load, returning from another page) may remount the map, so
+# its first refresh sends the whole fleet; fragment refreshes send deltas
+release_live_map(LIVE_MAP_KEY)
+render_live_map()
+
 # Predictive Advisory Panel
 st.markdown("## 🎯 Predictive Advisory Panel")
 st.markdown("**Real-time conflict detection and optimization recommendations (Highest priority on top)**")
 
-# High Priority Alert
-st.markdown("""
-<div class="alert-high">
-    <h4>🚨 ADVISORY CARD 1 - HIGH PRIORITY</h4>
-    <p><strong>Conflict:</strong> Overtake</p>
-    <p><strong>Trains:</strong> 12962 Avantika Exp & 19303 INDB-BPL Exp</p>
-    <p><strong>Location:</strong> near Naranjpura (NRG)</p>
-    <p><strong>Time to Conflict:</strong> 11 minutes</p>
-    <p><strong>Recommended Action:</strong> Halt 19303 on Vikramnagar Loop for 8 min</p>
-    <p><strong>Predicted Outcome:</strong> Avantika Exp RT; 19303 total delay: 12 min</p>
-</div>
-""", unsafe_allow_html=True)
-
-col1, col2 = st.columns(2)
-with col1:
-    if st.button("✅ Accept", key="accept_1", type="primary"):
-        st.success("Recommendation accepted! Dispatching instructions to station controller.")
-
-with col2:
-    if st.button("🔬 Simulate", key="simulate_1"):
-        st.info("Opening simulation sandbox with current scenario...")
-
-# Medium Priority Alerts
-st.markdown("""
-<div class="alert-medium">
-    <h4>⚠️ ADVISORY CARD 2 - MEDIUM PRIORITY</h4>
-    <p><strong>Platform Conflict:</strong> Ujjain Jn Platform 3</p>
-    <p><strong>Affected Train:</strong> 22911 Shipra Express</p>
-    <p><strong>Issue:</strong> Platform occupied by delayed goods train</p>
-    <p><strong>Recommendation:</strong> Re-route to Platform 5</p>
-    <p><strong>Impact:</strong> Avoids 20-minute delay</p>
-</div>
-""", unsafe_allow_html=True)
-
-col3, col4 = st.columns(2)
-with col3:
-    if st.button("✅ Accept", key="accept_2", type="primary"):
-        st.success("Platform re-assignment accepted!")
+# Accept/Simulate only rerun this panel
+@timed_fragment("Advisory panel", run_every=REFRESH_SECONDS['advisories'])
+def render_advisory_panel():
+    for advisory in load_advisories():
+        st.markdown(advisory['html'], unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("✅ Accept", key=f"accept_{advisory['key']}", type="primary"):
+                st.success(advisory['accepted'])
+        
+        with col2:
+            if st.button("🔬 Simulate", key=f"simulate_{advisory['key']}"):
+                st.info(advisory['simulating'])
 
-with col4:
-    if st.button("🔬 Simulate", key="simulate_2"):
-        st.info("Testing platform reallocation scenario...")
+render_advisory_panel()
 
 # Real-time KPIs
 st.markdown("## 📊 Real-time Performance KPIs")
 
-col1, col2, col3, col4 = st.columns(4)
-
-with col1:
-    st.metric(
-        label="🎯 Divisional Punctuality",
-        value="92%",
-        delta="2%"
-    )
-
-with col2:
-    st.metric(
-        label="⏱️ Average Delay",
-        value="7.3 mins",
-        delta="-1.2 mins"
-    )
-
-with col3:
-    st.metric(
-        label="🚂 Trains On Time",
-        value="41/45",
-        delta="3"
-    )
+@timed_fragment("KPIs", run_every=REFRESH_SECONDS['kpis'])
+def render_kpis():
+    kpis, window = load_kpis()
+    for column, kpi in zip(st.columns(len(kpis)), kpis):
+        with column:
+            st.metric(
+                label=kpi['label'],
+                value=kpi['value'],
+                delta=kpi['delta'],
+                delta_color=kpi.get('delta_color', "normal")
+            )
+    
+    if window['window_end'] is not None:
+        st.caption(
+            f"Rolling window {window['window_start']:%d/%m %H:%M} – {window['window_end']:%d/%m %H:%M} "
+            f"({window['movements']} movements); changes compare the last hour to the window"
+        )
+    
+    delay_percentiles = [window[f'delay_p{q}'] for q in (50, 90, 99)]
+    if not any(pd.isna(delay_percentiles)):
+        st.caption("Delay percentiles p50 / p90 / p99: " + " / ".join(f"{value:.1f}" for value in delay_percentiles) + " mins")
 
-with col4:
-    st.metric(
-        label="🔄 Route Efficiency",
-        value="94.5%",
-        delta="1.8%"
-    )
+render_kpis()
 
 # Live train status table
 st.markdown("## 🚂 Live Train Status")
 
-# Create detailed train status table
-train_status_data = {
-    'Train No.': ['12919', '19303', '22911', '12962', '09351'],
-    'Train Name': ['Malwa SF Express', 'INDB-BPL Express', 'Shipra Express', 'Avantika Express', 'UJN-INDB Passenger'],
-    'Current Location': ['Near NRG', 'Dewas Jn', 'Ratlam Jn', 'Near VKG', 'Ujjain Jn'],
-    'Next Stop': ['UJN', 'UJN', 'NAD', 'UJN', 'DWX'],
-    'Speed (km/h)': [95, 78, 105, 85, 65],
-    'Delay (mins)': [10, 5, 0, 8, 15],
-    'Status': ['Late', 'Slight Delay', 'On Time', 'Slight Delay', 'Late'],
-    'Platform': ['TBD', 'TBD', 'Departed', '5', '2'],
-    'Loco Pilot': ['LP-001', 'LP-045', 'LP-023', 'LP-067', 'LP-012']
-}
-
-df_trains = pd.DataFrame(train_status_data)
+@timed_fragment("Train table", run_every=REFRESH_SECONDS['train_table'])
+def render_train_table():
+    df_trains, styles = load_train_status()
+    styled_df = df_trains.style.apply(lambda _: styles, axis=None)
+    st.dataframe(styled_df, use_container_width=True)
 
-# Color code the status
-def highlight_status(row):
-    if row['Status'] == 'On Time':
-        return ['background-color: #e8f5e8'] * len(row)
-    elif row['Status'] == 'Slight Delay':
-        return ['background-color: #fff3e0'] * len(row)
-    else:
-        return ['background-color: #ffebee'] * len(row)
-
-styled_df = df_trains.style.apply(highlight_status, axis=1)
-st.dataframe(styled_df, use_container_width=True)
+render_train_table()
 
 # Signal and Track Status
 st.markdown("## 🚦 Signal & Infrastructure Status")
 
-col1, col2 = st.columns(2)
-
-with col1:
-    st.markdown("### 🚦 Signal Status")
-    signal_data = {
-        'Signal ID': ['RTM/1', 'NAD/3', 'UJN/5', 'INDB/2', 'DWX/1', 'NRG/2'],
-        'Location': ['Ratlam Jn', 'Nagda Jn', 'Ujjain Jn', 'Indore Jn', 'Dewas', 'Naranjipura'],
-        'Aspect': ['Green', 'Yellow', 'Green', 'Red', 'Green', 'Yellow'],
-        'Last Updated': ['10:45', '10:43', '10:44', '10:42', '10:45', '10:44']
-    }
+@timed_fragment("Signal status", run_every=REFRESH_SECONDS['signals'])
+def render_signal_status():
+    df_signals, df_tracks = load_signal_status()
+    col1, col2 = st.columns(2)
     
-    df_signals = pd.DataFrame(signal_data)
-    st.dataframe(df_signals, use_container_width=True)
-
-with col2:
-    st.markdown("### 🛤️ Track Status")
-    track_data = {
-        'Track Section': ['RTM-NAD', 'NAD-UJN', 'UJN-INDB', 'RTM-DHD', 'UJN-VKG'],
-        'Status': ['Clear', 'Occupied', 'Occupied', 'Clear', 'Occupied'],
-        'Occupying Train': ['-', '22911', '19303', '-', '12962'],
-        'Notes': ['Available', 'Shipra Exp', 'INDB-BPL Exp', 'Available', 'Avantika Exp']
-    }
+    with col1:
+        st.markdown("### 🚦 Signal Status")
+        st.dataframe(df_signals, use_container_width=True)
     
-    df_tracks = pd.DataFrame(track_data)
-    st.dataframe(df_tracks, use_container_width=True)
+    with col2:
+        st.markdown("### 🛤️ Track Status")
+        st.dataframe(df_tracks, use_container_width=True)
+
+render_signal_status()
 
 # Section-wise traffic density
 st.markdown("## 🛤️ Section-wise Traffic Analysis")
@@ -336,28 +446,131 @@ df_sections = pd.DataFrame(sections_data)
 col1, col2 = st.columns(2)
 
 with col1:
-    fig_capacity = px.bar(
-        df_sections, 
-        x='Section', 
-        y='Capacity Utilization (%)',
-        title='Section-wise Capacity Utilization',
-        color='Capacity Utilization (%)',
-        color_continuous_scale='RdYlGn_r'
+    def build_capacity_chart():
+        fig = px.bar(
+            df_sections, 
+            x='Section', 
+            y='Capacity Utilization (%)',
+            title='Section-wise Capacity Utilization',
+            color='Capacity Utilization (%)',
+            color_continuous_scale='RdYlGn_r'
+        )
+        fig.update_layout(height=400)
+        return fig
+    
+    fig_capacity = cached_figure(
+        'section_capacity',
+        build_capacity_chart,
+        data=df_sections
     )
-    fig_capacity.update_layout(height=400)
     st.plotly_chart(fig_capacity, use_container_width=True)
 
 with col2:
-    fig_speed = px.line(
-        df_sections, 
-        x='Section', 
-        y='Average Speed (km/h)',
-        title='Average Speed by Section',
-        markers=True
+    def build_speed_chart():
+        fig = px.line(
+            df_sections, 
+            x='Section', 
+            y='Average Speed (km/h)',
+            title='Average Speed by Section',
+            markers=True
+        )
+        fig.update_layout(height=400)
+        return fig
+    
+    fig_speed = cached_figure(
+        'section_speed',
+        build_speed_chart,
+        data=df_sections
     )
-    fig_speed.update_layout(height=400)
     st.plotly_chart(fig_speed, use_container_width=True)
 
+# Delay slice-and-dice over the movement history
+st.markdown("## 🧊 Delay Analysis")
+
+CUBE_DIMENSION_LABELS = {
+    'station': "Station",
+    'hour': "Hour of Day",
+    'weekday': "Weekday",
+    'train': "Train",
+    'day': "Day"
+}
+
+# Only day partitions with new or changed movements are re-aggregated
+@st.cache_data(ttl=REFRESH_SECONDS['delay_cube'], show_spinner=False)
+def refresh_movement_cube():
+    return len(get_movement_cube().update(load_movement_data()))
+
+# Changing the grouping only reruns this section; queries hit the cached cube
+@timed_fragment("Delay analysis")
+def render_delay_analysis():
+    refresh_movement_cube()
+    
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        by = st.multiselect(
+            "Group by",
+            list(CUBE_DIMENSION_LABELS),
+            default=['station', 'hour'],
+            format_func=CUBE_DIMENSION_LABELS.get,
+            key="delay_cube_by"
+        )
+    with col2:
+        measure = st.selectbox(
+            "Measure",
+            CUBE_MEASURES,
+            format_func=lambda m: "Reported delay" if m == 'delay_minutes' else "Departure delay",
+            key="delay_cube_measure"
+        )
+    
+    percentiles = (50, 90, 99) if set(by) <= set(HISTOGRAM_DIMENSIONS) else None
+    result = get_movement_cube().query(by, measure=measure, percentiles=percentiles)
+    
+    if result.empty:
+        st.info("No movements recorded for this view yet.")
+        return
+    
+    if len(by) == 2:
+        def build_cube_heatmap():
+            fig = px.imshow(
+                result['mean'].unstack(by[1]),
+                labels={'x': CUBE_DIMENSION_LABELS[by[1]], 'y': CUBE_DIMENSION_LABELS[by[0]], 'color': "Avg delay (min)"},
+                title=f"Average Delay by {CUBE_DIMENSION_LABELS[by[0]]} × {CUBE_DIMENSION_LABELS[by[1]]}",
+                color_continuous_scale='RdYlGn_r',
+                aspect='auto'
+            )
+            fig.update_layout(height=400)
+            return fig
+        
+        fig_cube = cached_figure(
+            'delay_cube_heatmap',
+            build_cube_heatmap,
+            data=result['mean'],
+            style={'by': by}
+        )
+        st.plotly_chart(fig_cube, use_container_width=True)
+    
+    st.dataframe(result.round(1), use_container_width=True)
+    if percentiles is None:
+        st.caption("Delay percentiles are available when grouping by station, hour, weekday or day.")
+    
+    # Every station's daily delay series is analysed in one batch
+    st.markdown("### 📈 Station Delay Trends")
+    daily = get_movement_cube().query(['station', 'day'], measure=measure).reset_index()
+    trends = format_performance_metrics(daily, time_column='day', value_column='mean', by='station')
+    trends['slope'] = trends['slope'] * 24
+    st.dataframe(
+        trends.drop(columns='trend').rename(columns={
+            'current_value': "Latest Day (min)",
+            'average': "Average (min)",
+            'slope': "Trend (min/day)",
+            'change_percent': "Change (%)",
+            'points': "Days"
+        }),
+        use_container_width=True
+    )
+
+render_delay_analysis()
+
 # Auto-refresh and navigation
 st.markdown("---")
 col1, col2, col3 = st.columns([1, 2, 1])
@@ -370,4 +583,13 @@ with col2:
         if st.button("🎮 Open Simulation"):
             st.switch_page("pages/Simulation_Sandbox.py")
 
-st.markdown("**Note:** Signal aspects automatically update every 30 seconds. Track status updates in real-time.")
\ No newline at end of file
+st.markdown(f"**Note:** Signal aspects automatically update every {REFRESH_SECONDS['signals']} seconds. "
+            f"Train positions refresh every {REFRESH_SECONDS['map']} seconds.")
+
+# Per-section render timings for this session
+@st.fragment(run_every=REFRESH_SECONDS['map'])
+def render_fragment_timings():
+    with st.expander("⏱️ Section Render Timings"):
+        st.dataframe(fragment_timings(), use_container_width=True, hide_index=True)
+
+render_fragment_timings()
\ No newline at end of file
@@ -3,7 +3,16 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-from datetime import datetime, timedelta
+import uuid
+from datetime import timedelta
+from core.data_loader import load_movement_data, preprocess_movement_data
+from core.delay_propagation import simulate_delay_propagation
+from core.simulation_jobs import get_job_manager, COMPLETED, FINISHED_STATES
+from core.trajectory_playback import build_trajectory_playback
+from components.figure_cache import cached_figure
+from components.map_component import (
+    get_base_railway_map, create_live_overlay, display_live_map, add_live_train_updates, release_live_map
+)
 
 # Page config
 st.set_page_config(
@@ -49,6 +58,16 @@ st.markdown("**What-if Scenario Analysis and Predictive Modeling**")
 # Initialize session state
 if 'simulation_results' not in st.session_state:
     st.session_state.simulation_results = None
+if 'propagation_result' not in st.session_state:
+    st.session_state.propagation_result = None
+if 'simulation_owner' not in st.session_state:
+    st.session_state.simulation_owner = uuid.uuid4().hex
+if 'pending_simulations' not in st.session_state:
+    st.session_state.pending_simulations = {}
+
+job_manager = get_job_manager()
+
+movement_data = preprocess_movement_data(load_movement_data())
 
 # Input Panel
 st.markdown("""
@@ -69,7 +88,10 @@ with col1:
     )
     
     # Train/Station Selection
-    if event_type in ["Add Delay", "New Unscheduled Train"]:
+    if event_type == "Add Delay":
+        entity_options = sorted(movement_data['train_number'].astype(str).unique())
+        entity_label = "Select Train"
+    elif event_type == "New Unscheduled Train":
         entity_options = ["12919 - Malwa SF Express", "19303 - INDB-BPL Express", 
                          "22911 - Shipra Express", "12962 - Avantika Express", 
                          "09351 - UJN-INDB Passenger"]
@@ -88,6 +110,7 @@ with col2:
     if event_type == "Add Delay":
         delay_duration = st.number_input("Delay Duration (mins):", min_value=1, max_value=120, value=15)
         delay_reason = st.selectbox("Reason:", ["Technical Problem", "Signal Failure", "Track Maintenance", "Weather", "Passenger Issue"])
+        stack_delay = st.checkbox("Add on top of previous delay simulation", value=False)
         
     elif event_type == "Maintenance Block":
         block_start = st.time_input("Block Start Time:")
@@ -115,20 +138,74 @@ location_code = st.text_input("**Location (Station Code):**", value="UJN", help=
 
 # Run Simulation Button
 if st.button("🚀 Run Simulation", type="primary"):
-    with st.spinner("Running advanced simulation..."):
-        # Simulate processing time
-        import time
-        time.sleep(2)
-        
-        # Generate simulation results based on input
-        st.session_state.simulation_results = {
-            'event_type': event_type,
-            'location': location_code,
-            'entity': selected_entity,
-            'timestamp': datetime.now().strftime("%H:%M:%S")
-        }
+    propagation = None
+    if event_type == "Add Delay":
+        previous = st.session_state.propagation_result if stack_delay else None
+        propagation = simulate_delay_propagation(
+            movement_data, selected_entity, delay_duration, previous=previous
+        )
+        scenario_params = {"type": "delay_impact", "delay_duration": delay_duration, "location": location_code}
+    else:
+        scenario_params = {"type": "general", "event": event_type, "location": location_code}
+    
+    # Run the simulation in the background so the rest of the page stays responsive
+    job_id = job_manager.submit(scenario_params, owner=st.session_state.simulation_owner)
+    st.session_state.pending_simulations[job_id] = {
+        'event_type': event_type,
+        'location': location_code,
+        'entity': selected_entity,
+        'propagation': propagation
+    }
+    st.info(f"Simulation job {job_id} submitted")
+
+# Background simulation jobs for this session
+simulation_jobs = job_manager.list_jobs(owner=st.session_state.simulation_owner)
+jobs_active = any(job['status'] not in FINISHED_STATES for job in simulation_jobs)
+
+@st.fragment(run_every=1.0 if jobs_active else None)
+def render_simulation_jobs():
+    jobs = job_manager.list_jobs(owner=st.session_state.simulation_owner)
+    if not jobs:
+        return
+    
+    st.markdown("### ⏳ Simulation Jobs")
+    for job in jobs:
+        col_progress, col_action = st.columns([4, 1])
+        with col_progress:
+            st.progress(job['progress'], text=f"**{job['job_id']}** · {job['status'].title()} — {job['message']}")
+        with col_action:
+            if job['status'] not in FINISHED_STATES:
+                if st.button("✖ Cancel", key=f"cancel_{job['job_id']}"):
+                    job_manager.cancel(job['job_id'])
+            elif job['status'] == COMPLETED and job['finished_at'] is not None:
+                st.caption(f"Done {job['finished_at'].strftime('%H:%M:%S')}")
+    
+    if st.button("🧹 Clear finished jobs", key="clear_jobs"):
+        job_manager.clear_finished(owner=st.session_state.simulation_owner)
+        st.rerun()
+    
+    # Pick up jobs that finished since the last poll
+    finished = False
+    for job_id, details in list(st.session_state.pending_simulations.items()):
+        status = job_manager.status(job_id)
+        if status is not None and status['status'] not in FINISHED_STATES:
+            continue
         
-        st.success("✅ Simulation completed successfully!")
+        del st.session_state.pending_simulations[job_id]
+        finished = True
+        if status is not None and status['status'] == COMPLETED:
+            st.session_state.propagation_result = details.pop('propagation')
+            st.session_state.simulation_results = {
+                **details,
+                'job_id': job_id,
+                'result': job_manager.result(job_id, timeout=0),
+                'timestamp': status['finished_at'].strftime("%H:%M:%S")
+            }
+    
+    if finished:
+        st.rerun()
+
+render_simulation_jobs()
 
 # Output Panel
 if st.session_state.simulation_results:
@@ -149,6 +226,14 @@ if st.session_state.simulation_results:
         'Impact': ['▲ 135 min', '▼ 8%', '▼ 7.3%', '▼ 13%']
     }
     
+    propagation = st.session_state.propagation_result
+    if propagation is not None:
+        baseline_total = float(np.maximum(propagation.graph.baseline_delays, 0).sum())
+        simulated_total = propagation.total_network_delay()
+        kpi_data['Current Plan'][0] = f"{baseline_total:.0f} min"
+        kpi_data['Simulated Plan'][0] = f"{simulated_total:.0f} min"
+        kpi_data['Impact'][0] = f"▲ {simulated_total - baseline_total:.0f} min"
+    
     df_kpi = pd.DataFrame(kpi_data)
     
     # Style the dataframe
@@ -166,13 +251,30 @@ if st.session_state.simulation_results:
     # Affected Trains List
     st.markdown("### 🚂 Affected Trains List")
     
-    affected_trains_data = {
-        'Train No.': ['12919', '22911', '19303', '12962', '09351'],
-        'Name': ['Malwa Express', 'Shipra Express', 'INDB-BPL Express', 'Avantika Express', 'UJN-INDB Passenger'],
-        'Original Delay': ['10m', 'RT', '5m', '8m', '15m'],
-        'New Predicted Delay': ['35m', '18m', '12m', '25m', '45m'],
-        'Impact': ['▲ 25m', '▲ 18m', '▲ 7m', '▲ 17m', '▲ 30m']
-    }
+    if propagation is not None:
+        affected = propagation.affected_trains()
+        trains = affected['train_number'].tolist()
+        original_delays = affected['original_delay'].to_numpy()
+        predicted_delays = affected['new_delay'].to_numpy()
+        
+        affected_trains_data = {
+            'Train No.': trains,
+            'Original Delay': [f"{d:g}m" if d > 0 else 'RT' for d in original_delays],
+            'New Predicted Delay': [f"{d:g}m" for d in predicted_delays],
+            'Impact': [f"▲ {d:g}m" for d in affected['impact']]
+        }
+    else:
+        trains = ['12919', '22911', '19303', '12962', '09351']
+        original_delays = np.array([10, 0, 5, 8, 15])
+        predicted_delays = np.array([35, 18, 12, 25, 45])
+        
+        affected_trains_data = {
+            'Train No.': trains,
+            'Name': ['Malwa Express', 'Shipra Express', 'INDB-BPL Express', 'Avantika Express', 'UJN-INDB Passenger'],
+            'Original Delay': ['10m', 'RT', '5m', '8m', '15m'],
+            'New Predicted Delay': ['35m', '18m', '12m', '25m', '45m'],
+            'Impact': ['▲ 25m', '▲ 18m', '▲ 7m', '▲ 17m', '▲ 30m']
+        }
     
     df_affected = pd.DataFrame(affected_trains_data)
     styled_affected = df_affected.style.applymap(style_impact, subset=['Impact'])
@@ -185,21 +287,25 @@ if st.session_state.simulation_results:
         st.markdown("### 📉 Delay Analysis")
         
         # Create delay comparison chart
-        trains = ['12919', '22911', '19303', '12962', '09351']
-        original_delays = [10, 0, 5, 8, 15]
-        predicted_delays = [35, 18, 12, 25, 45]
+        def build_delay_chart():
+            fig = go.Figure(data=[
+                go.Bar(name='Original Delay', x=trains, y=original_delays, marker_color='lightblue'),
+                go.Bar(name='Predicted Delay', x=trains, y=predicted_delays, marker_color='coral')
+            ])
         
-        fig_delay = go.Figure(data=[
-            go.Bar(name='Original Delay', x=trains, y=original_delays, marker_color='lightblue'),
-            go.Bar(name='Predicted Delay', x=trains, y=predicted_delays, marker_color='coral')
-        ])
+            fig.update_layout(
+                title='Delay Comparison (minutes)',
+                xaxis_title='Train Number',
+                yaxis_title='Delay (minutes)',
+                barmode='group',
+                height=400
+            )
+            return fig
         
-        fig_delay.update_layout(
-            title='Delay Comparison (minutes)',
-            xaxis_title='Train Number',
-            yaxis_title='Delay (minutes)',
-            barmode='group',
-            height=400
+        fig_delay = cached_figure(
+            'sandbox_delay_comparison',
+            build_delay_chart,
+            traces=[{'x': trains, 'y': original_delays}, {'x': trains, 'y': predicted_delays}]
         )
         
         st.plotly_chart(fig_delay, use_container_width=True)
@@ -241,19 +347,28 @@ if st.session_state.simulation_results:
     # Scenario Timeline
     st.markdown("### ⏰ Predicted Timeline")
     
-    timeline_data = {
-        'Time': ['10:15', '10:30', '10:45', '11:00', '11:15', '11:30'],
-        'Event': [
-            'Scenario starts at UJN',
-            'First train (22911) affected',
-            'Platform conflict detected',
-            'Secondary delays begin',
-            'Peak impact on network',
-            'System begins recovery'
-        ],
-        'Network Delay': ['250m', '285m', '340m', '385m', '375m', '320m'],
-        'Trains Affected': [0, 1, 2, 4, 5, 5]
-    }
+    if propagation is not None:
+        timeline = propagation.network_delay_timeline()
+        timeline_data = {
+            'Time': timeline['time'].dt.strftime('%H:%M'),
+            'Baseline Network Delay': [f"{d:g}m" for d in timeline['baseline_network_delay']],
+            'Network Delay': [f"{d:g}m" for d in timeline['simulated_network_delay']],
+            'Trains Affected': timeline['trains_affected']
+        }
+    else:
+        timeline_data = {
+            'Time': ['10:15', '10:30', '10:45', '11:00', '11:15', '11:30'],
+            'Event': [
+                'Scenario starts at UJN',
+                'First train (22911) affected',
+                'Platform conflict detected',
+                'Secondary delays begin',
+                'Peak impact on network',
+                'System begins recovery'
+            ],
+            'Network Delay': ['250m', '285m', '340m', '385m', '375m', '320m'],
+            'Trains Affected': [0, 1, 2, 4, 5, 5]
+        }
     
     df_timeline = pd.DataFrame(timeline_data)
     st.dataframe(df_timeline, use_container_width=True, hide_index=True)
@@ -289,6 +404,60 @@ historical_data = {
 df_historical = pd.DataFrame(historical_data)
 st.dataframe(df_historical, use_container_width=True, hide_index=True)
 
+# Movement Playback
+st.markdown("## ⏯️ Movement Playback")
+
+PLAYBACK_MAP_KEY = "sandbox_playback_map"
+PLAYBACK_POPUP_FIELDS = {
+    'Current': 'current_station',
+    'Next': 'next_station',
+    'Delay (min)': 'delay_minutes',
+    'Speed (km/h)': 'speed_kmh'
+}
+
+playback = build_trajectory_playback(movement_data)
+
+# Moving the slider reruns only the playback, so the map stays mounted and
+# receives just the trains that changed; a full rerun may remount it
+release_live_map(PLAYBACK_MAP_KEY)
+
+@st.fragment
+def render_playback():
+    if len(playback.train_labels) == 0:
+        st.info("No train positions in the movement log to play back.")
+    else:
+        playback_start = playback.start_time.to_pydatetime()
+        playback_end = max(playback.end_time.to_pydatetime(), playback_start + timedelta(minutes=1))
+        
+        playback_time = st.slider(
+            "Playback time",
+            min_value=playback_start,
+            max_value=playback_end,
+            value=playback_start,
+            step=timedelta(minutes=1),
+            format="DD/MM HH:mm"
+        )
+        
+        playback_frame = playback.frame(playback_time)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Trains on Network", len(playback_frame))
+        with col2:
+            average_delay = playback_frame['delay_minutes'].mean() if 'delay_minutes' in playback_frame else 0
+            st.metric("Average Delay", f"{0 if pd.isna(average_delay) else average_delay:.1f} min")
+        with col3:
+            st.metric("Window", f"{playback_start:%d/%m %H:%M} – {playback_end:%H:%M}")
+        
+        base_map = get_base_railway_map()
+        playback_overlay = create_live_overlay(name='Playback')
+        add_live_train_updates(playback_overlay, playback_frame, key=PLAYBACK_MAP_KEY, fields=PLAYBACK_POPUP_FIELDS,
+                               base_map=base_map)
+        display_live_map(base_map, playback_overlay, key=PLAYBACK_MAP_KEY,
+                         width=800, height=450, returned_objects=[])
+
+render_playback()
+
 # Advanced Controls
 st.markdown("---")
 st.markdown("## ⚙️ Advanced Simulation Controls")
@@ -319,6 +488,7 @@ with col2:
 with col3:
     if st.button("🔄 Reset Simulation"):
         st.session_state.simulation_results = None
+        st.session_state.propagation_result = None
         st.rerun()
 
 with col4:
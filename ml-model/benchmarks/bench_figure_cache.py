@@ -0,0 +1,86 @@
+# PRAGATI AI - Plotly figure cache benchmark
+# Times the KPI chart components built from scratch, served from the figure
+# cache and patched with new values, then reruns of the chart-heavy pages
+# with a cold and a warm cache.
+#
+# Usage: python benchmarks/bench_figure_cache.py [repeats]
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).parent.parent / "app"
+sys.path.insert(0, str(APP_DIR))
+
+from components.figure_cache import clear_figure_cache, figure_cache_stats
+from components.kpi_component import create_gauge_chart, create_performance_dashboard, create_trend_chart
+
+CHART_PAGES = ["Asset_Insights.py", "Simulation_Sandbox.py", "Divisional_Dashboard.py"]
+
+
+def trend_data(n_points, seed):
+    """Hourly KPI series"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': pd.date_range('2025-09-01', periods=n_points, freq='h'),
+        'on_time_performance': 90 + rng.normal(0, 3, n_points)
+    })
+
+
+def component_charts(seed):
+    """Build every KPI component chart for one set of values"""
+    rng = np.random.default_rng(seed)
+    create_gauge_chart(float(rng.uniform(60, 100)), "Punctuality")
+    create_performance_dashboard({
+        'on_time_performance': float(rng.uniform(60, 100)),
+        'capacity_utilization': float(rng.uniform(60, 100)),
+        'fuel_efficiency': float(rng.uniform(60, 100)),
+        'asset_health': float(rng.uniform(60, 100))
+    })
+    create_trend_chart(trend_data(720, seed), 'timestamp', 'on_time_performance', "On-Time Trend")
+
+
+def time_components(repeats, mode):
+    """Mean milliseconds per round of component charts"""
+    started = time.perf_counter()
+    for i in range(repeats):
+        if mode == "build":
+            clear_figure_cache()
+        component_charts(seed=i if mode == "patch" else 0)
+    return (time.perf_counter() - started) / repeats * 1000
+
+
+def time_page_reruns(page, repeats):
+    """Mean milliseconds per page rerun with a cleared and a warm figure cache, interleaved"""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP_DIR / "pages" / page), default_timeout=120)
+    app.run()
+
+    totals = {'cold': 0.0, 'warm': 0.0}
+    for _ in range(repeats):
+        for mode in totals:
+            if mode == 'cold':
+                clear_figure_cache()
+            started = time.perf_counter()
+            app.run()
+            totals[mode] += time.perf_counter() - started
+    return {mode: total / repeats * 1000 for mode, total in totals.items()}
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    print(f"{'components':>24} {'ms/round':>9}")
+    for mode in ("build", "hit", "patch"):
+        component_charts(seed=0)
+        print(f"{mode:>24} {time_components(repeats, mode):>9.1f}")
+    print(figure_cache_stats())
+
+    print(f"\n{'page':>24} {'cold ms':>9} {'warm ms':>9}")
+    for page in CHART_PAGES:
+        timings = time_page_reruns(page, repeats)
+        print(f"{page:>24} {timings['cold']:>9.1f} {timings['warm']:>9.1f}")
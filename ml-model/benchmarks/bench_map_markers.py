@@ -0,0 +1,55 @@
+# PRAGATI AI - Map marker rendering benchmark
+# Compares the per-row folium.Marker path with the bulk column-array and
+# GeoJSON FeatureCollection layers.
+#
+# Usage: python benchmarks/bench_map_markers.py [n_trains ...]
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+
+from components.map_component import create_railway_map, add_train_markers
+
+
+def generate_trains(n_trains, seed=42):
+    """Sample fleet positions around the Mumbai division"""
+    rng = np.random.default_rng(seed)
+    stations = np.array(["Mumbai Central", "Dadar", "Thane", "Kalyan", "Lonavala", "Pune"], dtype=object)
+
+    return pd.DataFrame({
+        'train_number': (12000 + np.arange(n_trains)).astype(str),
+        'from_station': stations[rng.integers(0, len(stations), n_trains)],
+        'to_station': stations[rng.integers(0, len(stations), n_trains)],
+        'current_station': stations[rng.integers(0, len(stations), n_trains)],
+        'delay_minutes': rng.integers(-5, 45, n_trains),
+        'platform': rng.integers(1, 12, n_trains),
+        'lat': 19.0760 + rng.uniform(-0.5, 0.5, n_trains),
+        'lon': 72.8777 + rng.uniform(-0.5, 0.5, n_trains)
+    })
+
+
+def time_render(train_data, mode):
+    """Seconds to add the markers and serialise the map to HTML, and the HTML size"""
+    started = time.perf_counter()
+    railway_map = add_train_markers(create_railway_map(), train_data, mode=mode)
+    html = railway_map.get_root().render()
+    return time.perf_counter() - started, len(html)
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+
+    base_size = len(create_railway_map().get_root().render())
+
+    print(f"{'trains':>8} {'mode':>8} {'seconds':>9} {'html KB':>9} {'B/train':>8}")
+    for n_trains in sizes:
+        trains = generate_trains(n_trains)
+        for mode in ("markers", "bulk", "geojson"):
+            seconds, size = time_render(trains, mode)
+            per_train = (size - base_size) / n_trains
+            print(f"{n_trains:>8} {mode:>8} {seconds:>9.3f} {size / 1024:>9.0f} {per_train:>8.0f}")
@@ -0,0 +1,43 @@
+# PRAGATI AI - Historical traffic heat tile renderer
+# Renders movement history into z/x/y PNG heat tiles under app/static/tiles,
+# one pyramid per day. Days whose data did not change are skipped.
+#
+# Usage: python scripts/render_heat_tiles.py [movement_log.csv] [--layer NAME]
+#            [--weight COLUMN] [--format png|webp]
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "app"))
+
+from components.heat_tiles import HeatTileStore
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render historical traffic heat tiles")
+    parser.add_argument("movement_log", nargs="?",
+                        default=str(Path(__file__).parent.parent / "data" / "simulated_movement_log.csv"))
+    parser.add_argument("--layer", default="traffic", help="Tile layer name")
+    parser.add_argument("--weight", default=None, help="Column to weight movements by, e.g. delay_minutes")
+    parser.add_argument("--format", default="png", choices=["png", "webp"], help="Tile image format")
+    parser.add_argument("--rebuild", action="store_true", help="Re-render every partition")
+    args = parser.parse_args()
+
+    movement_data = pd.read_csv(args.movement_log)
+    store = HeatTileStore(args.layer, image_format=args.format)
+    if args.rebuild:
+        store.invalidate()
+
+    started = time.perf_counter()
+    rendered = store.update(movement_data, weight_column=args.weight)
+    elapsed = time.perf_counter() - started
+
+    for partition in rendered:
+        info = store.manifest['partitions'][partition]
+        print(f"{partition}: {info['points']} movements -> {info['tiles']} tiles")
+    print(f"{len(rendered)} partition(s) rendered, {len(store.partitions()) - len(rendered)} up to date "
+          f"({elapsed:.1f}s) in {store.path}")
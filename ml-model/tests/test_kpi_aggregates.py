@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from core.kpi_aggregates import RollingKPIAggregator
+
+
+def movement_log(n_rows=600, seed=0):
+    """Movement log where every timestamp is shared by several rows"""
+    rng = np.random.default_rng(seed)
+    times = pd.Timestamp('2025-09-01') + pd.to_timedelta(np.sort(rng.integers(0, 120, n_rows)), unit='min')
+    return pd.DataFrame({
+        'timestamp': times,
+        'current_station': rng.choice(['RTM', 'DHD', 'NAD'], n_rows),
+        'train_number': rng.choice(['12951', '12953', '19019'], n_rows).astype(str),
+        'delay_minutes': rng.exponential(5, n_rows)
+    })
+
+
+def test_ingest_new_keeps_rows_sharing_the_watermark_time():
+    log = movement_log()
+    shared = log['timestamp'] == log['timestamp'].iloc[300]
+    split = np.flatnonzero(shared)[1]
+
+    aggregator = RollingKPIAggregator(window_hours=48)
+    assert aggregator.ingest_new(log.iloc[:split]) == split
+    assert aggregator.ingest_new(log) == len(log) - split
+    assert aggregator.ingest_new(log) == 0
+    assert aggregator.totals[0] == len(log)
+
+
+def test_ingest_new_unordered_log_matches_one_batch():
+    log = movement_log(seed=1)
+    shuffled = log.sample(frac=1, random_state=0)
+
+    aggregator = RollingKPIAggregator(window_hours=48)
+    for end in range(50, len(log) + 50, 50):
+        aggregator.ingest_new(log.iloc[:end])
+    assert aggregator.ingest_new(shuffled) == 0
+    assert aggregator.totals[0] == len(log)
+
+    reference = RollingKPIAggregator(window_hours=48)
+    reference.ingest(log)
+    np.testing.assert_allclose(aggregator.totals, reference.totals)
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from components.map_component import LiveTrainFeed
+
+
+def positions(shift=0.0):
+    return pd.DataFrame({
+        'train_number': ['12951', '12953'],
+        'lat': [22.0 + shift, 23.0 + shift],
+        'lon': [75.0, 76.0],
+        'delay_minutes': [0, 20]
+    })
+
+
+def test_resync_request_answered_by_one_keyframe():
+    feed = LiveTrainFeed('trains')
+    assert feed.update(positions())['r']
+    missed = feed.update(positions(0.1))
+    unusable = feed.update(positions(0.2))
+    assert not missed['r'] and not unusable['r']
+
+    # The browser never got the first delta, so it could not apply the second
+    request = {'id': 'trains', 'v': 1, 'at': unusable['v']}
+    assert feed.needs_resync(request)
+    keyframe = feed.update(positions(0.3), reset=feed.needs_resync(request))
+    assert keyframe['r']
+
+    # The same request keeps coming back with the component value until the map moves
+    assert not feed.needs_resync(request)
+    assert not feed.update(positions(0.4), reset=feed.needs_resync(request))['r']
+
+
+def test_resync_request_for_another_feed_is_ignored():
+    feed = LiveTrainFeed('trains')
+    feed.update(positions())
+    assert not feed.needs_resync({'id': 'playback', 'v': None, 'at': 5})
+    assert not feed.needs_resync(None)
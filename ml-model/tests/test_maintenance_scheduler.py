@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from core.data_loader import generate_sample_asset_data, load_movement_data, load_static_data
+from core.maintenance_scheduler import MaintenanceScheduler
+from core.prediction_engine import predict_maintenance
+
+
+def block_loads(schedule, block_hours):
+    """Orders per (depot, block start) across every block each order covers"""
+    blocks = ((schedule['block_end'] - schedule['block_start']) / pd.Timedelta(hours=block_hours)).astype(int)
+    rows = schedule.loc[schedule.index.repeat(blocks), ['depot_id', 'block_start']]
+    offsets = rows.groupby(level=0).cumcount().to_numpy()
+    rows['block_start'] = rows['block_start'] + pd.to_timedelta(offsets * block_hours, unit='h')
+    return rows.value_counts()
+
+
+def test_local_search_stays_feasible_and_never_worse_than_greedy():
+    static_data = load_static_data()
+    work_orders = predict_maintenance(generate_sample_asset_data(5000, seed=1), seed=1, as_frame=True)
+    scheduler = MaintenanceScheduler(static_data, load_movement_data())
+
+    result = scheduler.schedule(work_orders, time_budget_seconds=2, seed=0)
+
+    capacity = {depot['id']: depot.get('capacity', 1) for depot in static_data['maintenance_depots']}
+    loads = block_loads(result['schedule'], scheduler.block_hours)
+    limits = np.array([capacity[depot] for depot, _ in loads.index])
+    assert (loads.to_numpy() <= limits).all()
+    assert result['total_disruption'] <= result['greedy_disruption']
+    assert result['local_search_improvements'] > 0
@@ -0,0 +1,17 @@
+import numpy as np
+
+from core.data_loader import generate_sample_asset_data
+from core.prediction_engine import MaintenancePredictor
+
+
+def test_assets_without_health_score_are_not_scored():
+    assets = generate_sample_asset_data(20, seed=3)
+    assets['health_score'] = assets['health_score'].astype(object)
+    assets.loc[[2, 7], 'health_score'] = [np.nan, 'n/a']
+
+    predictions = MaintenancePredictor().score_assets(assets)
+
+    assert len(predictions) == 18
+    assert not predictions['asset_id'].isin(assets.loc[[2, 7], 'asset_id']).any()
+    assert predictions['days_until_maintenance'].between(1, 30).all()
+    assert (predictions['estimated_cost'] > 0).all()
@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from core.rul_forecaster import RULForecaster
+
+
+def health_history(n_days=47, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2025-08-01', periods=n_days, freq='D')
+    drift = np.arange(n_days)[:, None] * np.array([-0.3, 0.0, -0.1])
+    return pd.DataFrame(95 + rng.normal(0, 2, (n_days, 3)) + drift, index=dates, columns=['LOC-001', 'SIG-002', 'TRA-003'])
+
+
+def test_updates_without_fit_match_one_fit():
+    history = health_history()
+
+    incremental = RULForecaster(window_days=14)
+    for date, scores in history.iterrows():
+        incremental.update(scores, date=date)
+
+    reference = RULForecaster(window_days=14).fit(history)
+    pd.testing.assert_frame_equal(incremental.predict_rul(), reference.predict_rul(), check_exact=False)